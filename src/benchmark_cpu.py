@@ -0,0 +1,149 @@
+import os
+
+# Tem de ser definido antes de importar o Numba para contar as alocações
+os.environ.setdefault("NUMBA_NRT_STATS", "1")
+
+import argparse
+import time
+import numpy as np
+from numba import njit
+from numba.core.runtime import rtsys
+from cpu import Renderer
+from cpu.kernels import NORMAL_CENTRAL, ray_march, ray_march_xyz
+
+
+@njit
+def march_rays(
+    origin,
+    directions,
+    object_positions,
+    object_sizes,
+    object_colors,
+    object_types,
+    max_distance,
+    epsilon,
+    max_steps,
+    light_position,
+    light_color,
+    ambient_light,
+    bvh,
+    out,
+):
+    """Marcha todos os raios com os kernels baseados em np.ndarray."""
+    for i in range(len(directions)):
+        out[i] = ray_march(
+            origin,
+            directions[i],
+            object_positions,
+            object_sizes,
+            object_colors,
+            object_types,
+            max_distance,
+            epsilon,
+            max_steps,
+            light_position,
+            light_color,
+            ambient_light,
+            bvh,
+        )
+
+
+@njit
+def march_rays_xyz(
+    origin,
+    directions,
+    object_positions,
+    object_sizes,
+    object_colors,
+    object_types,
+    max_distance,
+    epsilon,
+    max_steps,
+    light_position,
+    light_color,
+    ambient_light,
+    bvh,
+    out,
+):
+    """Marcha todos os raios com os kernels por componentes."""
+    for i in range(len(directions)):
+        out[i, 0], out[i, 1], out[i, 2], _ = ray_march_xyz(
+            origin[0],
+            origin[1],
+            origin[2],
+            directions[i, 0],
+            directions[i, 1],
+            directions[i, 2],
+            object_positions,
+            object_sizes,
+            object_colors,
+            object_types,
+            max_distance,
+            epsilon,
+            max_steps,
+            light_position,
+            light_color,
+            ambient_light,
+            bvh,
+            NORMAL_CENTRAL,  # Mesmo trabalho que estimate_normal
+            1.0,  # Sem over-relaxation, como ray_march
+            0.0,  # Sem coarse depth: marcha desde a câmera
+        )
+
+
+def camera_rays(resolution: int) -> np.ndarray:
+    """Direções normalizadas dos raios de um frame, como em render_frame."""
+    uv = np.arange(resolution) * (2 / resolution)
+    uv_x, uv_y = np.meshgrid(uv - 1, 1 - uv)
+    directions = np.stack([uv_x, uv_y, np.ones_like(uv_x)], axis=-1).reshape(-1, 3)
+    return directions / np.linalg.norm(directions, axis=1)[:, None]
+
+
+def measure(kernel, args, rays: int):
+    """Devolve (alocações por raio, raios por segundo) de uma chamada ao kernel."""
+    kernel(*args)  # Compila fora da medição
+
+    before = rtsys.get_allocation_stats()
+    start = time.perf_counter()
+    kernel(*args)
+    elapsed = time.perf_counter() - start
+    after = rtsys.get_allocation_stats()
+
+    return (after.alloc - before.alloc) / rays, rays / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare per-ray allocations of the CPU ray marching kernels."
+    )
+    parser.add_argument("--resolution", type=int, default=150)
+    args = parser.parse_args()
+
+    renderer = Renderer()
+    directions = camera_rays(args.resolution)
+    out = np.zeros((len(directions), 3))
+    kernel_args = (
+        renderer.camera_position,
+        directions,
+        *renderer.scene.arrays(),
+        renderer.max_distance,
+        renderer.epsilon,
+        renderer.max_steps,
+        renderer.light_position,
+        renderer.light_color,
+        renderer.ambient_light,
+        renderer.empty_bvh,
+        out,
+    )
+
+    print(f"{len(directions)} rays, {len(renderer.scene)} objects")
+    for name, kernel in (("ndarray", march_rays), ("xyz", march_rays_xyz)):
+        allocations, rays_per_second = measure(kernel, kernel_args, len(directions))
+        print(
+            f"{name:>8}: {allocations:8.2f} allocations/ray, "
+            f"{rays_per_second:12.0f} rays/s"
+        )
+
+
+if __name__ == "__main__":
+    main()
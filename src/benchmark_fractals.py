@@ -0,0 +1,68 @@
+import argparse
+import time
+import numpy as np
+from cpu.fractals import (
+    DEFAULT_POWER,
+    JULIA_BAILOUT,
+    JULIA_CONSTANT,
+    MANDELBULB_BAILOUT,
+    julia,
+    mandelbulb,
+    power_de_numpy,
+)
+
+
+def sample_points(count: int, seed: int = 0) -> np.ndarray:
+    """Pontos uniformes no cubo [-1.5, 1.5]^3, que contém os dois fractais."""
+    return np.random.default_rng(seed).uniform(-1.5, 1.5, (count, 3))
+
+
+def points_per_second(function, points: np.ndarray, repeats: int) -> float:
+    function(points[:16])  # Aquece (a compilação/cache do Numba fica de fora)
+
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function(points)
+        best = min(best, time.perf_counter() - start)
+    return len(points) / best
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measure the throughput of the CPU fractal distance estimators."
+    )
+    parser.add_argument("--points", type=int, default=200_000)
+    parser.add_argument("--power", type=float, default=DEFAULT_POWER)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument(
+        "--skip-numpy", action="store_true", help="Only time the Numba kernels"
+    )
+    args = parser.parse_args()
+
+    points = sample_points(args.points)
+    power = args.power
+    cases = [
+        ("mandelbulb numba", lambda p: mandelbulb(p, power)),
+        ("julia numba", lambda p: julia(p, power)),
+    ]
+    if not args.skip_numpy:
+        cases += [
+            (
+                "mandelbulb numpy",
+                lambda p: power_de_numpy(p, power, None, MANDELBULB_BAILOUT),
+            ),
+            (
+                "julia numpy",
+                lambda p: power_de_numpy(p, power, JULIA_CONSTANT, JULIA_BAILOUT),
+            ),
+        ]
+
+    print(f"{len(points)} points, power {power}")
+    for name, function in cases:
+        rate = points_per_second(function, points, args.repeats)
+        print(f"{name:>17}: {rate:12.0f} points/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+import argparse
+import numpy as np
+from cpu import BVH
+from cpu.kernels import calculate_distance_xyz
+from dsf import Cube, Scene, Sphere
+
+
+def overlapping_scene(rng, objects: int) -> Scene:
+    """Esferas e cubos aleatórios num volume pequeno, para se sobreporem."""
+    scene = Scene()
+    for i in range(objects):
+        position = rng.uniform(-3.0, 3.0, 3)
+        size = float(rng.uniform(0.3, 1.5))
+        color = rng.uniform(0.0, 1.0, 3)
+        if i % 2:
+            scene.add(Sphere(position=position, radius=size, color=color))
+        else:
+            scene.add(Cube(position=position, size=size, color=color))
+    return scene
+
+
+def check_scene(scene: Scene, points: np.ndarray) -> tuple:
+    """Devolve (pontos diferentes, pontos dentro de objetos) BVH vs procura linear."""
+    positions, sizes, _, types = scene.arrays()
+    bvh = BVH()
+    bvh.update(scene)
+    bvh_arrays = bvh.arrays()
+    linear = BVH().arrays()  # Vazia: calculate_distance_xyz faz a procura linear
+
+    mismatches = 0
+    inside = 0
+    for px, py, pz in points:
+        expected, _ = calculate_distance_xyz(
+            px, py, pz, positions, sizes, types, linear
+        )
+        dist, closest = calculate_distance_xyz(
+            px, py, pz, positions, sizes, types, bvh_arrays
+        )
+        # closest pode diferir num empate, mas tem de estar à distância devolvida
+        closest_dist, _ = calculate_distance_xyz(
+            px,
+            py,
+            pz,
+            positions[closest : closest + 1],
+            sizes[closest : closest + 1],
+            types[closest : closest + 1],
+            linear,
+        )
+        if dist != expected or closest_dist != dist:
+            mismatches += 1
+        inside += expected < 0.0
+    return mismatches, inside
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Check that bvh_distance matches the linear scan, "
+        "for points inside and outside overlapping geometry."
+    )
+    parser.add_argument("--scenes", type=int, default=40)
+    parser.add_argument("--objects", type=int, default=30)
+    parser.add_argument("--points", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    mismatches = inside = 0
+    for _ in range(args.scenes):
+        scene = overlapping_scene(rng, args.objects)
+        points = rng.uniform(-4.5, 4.5, (args.points, 3))
+        scene_mismatches, scene_inside = check_scene(scene, points)
+        mismatches += scene_mismatches
+        inside += scene_inside
+
+    total = args.scenes * args.points
+    print(f"{total} points ({inside} inside geometry): {mismatches} mismatches")
+    if mismatches:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+import argparse
+import numpy as np
+import pygame as pg
+from pygame.locals import *
+from OpenGL.GL import *
+from dsf import Cube, Group, Sphere, specialize_shader
+from dsf.compiler import scene_dist_color
+from lib.program_cache import load_program
+
+# Avalia sceneDistColor e sceneDistGrad num ponto por píxel (lido de u_points)
+FRAGMENT_TEMPLATE = """\
+#version 330
+
+uniform sampler2D u_points;
+uniform float u_blend_strength;
+
+// @scene
+
+layout(location = 0) out vec4 distColor;
+layout(location = 1) out vec4 distGrad;
+
+void main() {
+    vec3 p = texelFetch(u_points, ivec2(gl_FragCoord.xy), 0).xyz;
+    distColor = sceneDistColor(p);
+    distGrad = sceneDistGrad(p);
+}
+"""
+
+OPERATIONS = ["union", "blend", "cut", "mask"]
+
+
+def random_shape(rng):
+    position = rng.uniform(-2.0, 2.0, 3)
+    color = rng.uniform(0.0, 1.0, 3)
+    if rng.random() < 0.5:
+        return Sphere(
+            position=position, radius=float(rng.uniform(0.3, 1.2)), color=color
+        )
+    return Cube(
+        position=position,
+        size=rng.uniform(0.4, 1.8, 3) if rng.random() < 0.5 else rng.uniform(0.4, 1.8),
+        color=color,
+        roundness=float(rng.uniform(0.0, 0.2)),
+    )
+
+
+def random_nodes(rng, count: int, depth: int = 1) -> list:
+    """Formas e grupos aleatórios, com todas as operações e forças de blend."""
+    nodes = []
+    for _ in range(count):
+        if depth > 0 and rng.random() < 0.25:
+            node = Group(random_nodes(rng, int(rng.integers(1, 4)), depth - 1))
+        else:
+            node = random_shape(rng)
+        node.operation = OPERATIONS[int(rng.integers(len(OPERATIONS)))]
+        # Algumas forças são o uniform (string), como na janela interativa
+        node.blendStrength = (
+            "u_blend_strength" if rng.random() < 0.3 else float(rng.uniform(0.0, 0.8))
+        )
+        nodes.append(node)
+    return nodes
+
+
+def create_context() -> None:
+    pg.init()
+    pg.display.gl_set_attribute(pg.GL_CONTEXT_MAJOR_VERSION, 3)
+    pg.display.gl_set_attribute(pg.GL_CONTEXT_MINOR_VERSION, 3)
+    pg.display.gl_set_attribute(pg.GL_CONTEXT_PROFILE_MASK, pg.GL_CONTEXT_PROFILE_CORE)
+    pg.display.set_mode((1, 1), OPENGL | DOUBLEBUF | HIDDEN)
+
+
+class ShaderEvaluator:
+    def __init__(self, width: int, height: int) -> None:
+        """
+        Avalia o código gerado por dsf.compiler na GPU, um ponto por píxel.
+
+        Os pontos vão numa textura RGB32F e as duas funções da cena são
+        escritas em dois anexos RGBA32F do mesmo framebuffer.
+
+        width, height: Tamanho da grelha de pontos
+        """
+        self.width = width
+        self.height = height
+        with open("glsl/vertex_shader.glsl", "r") as f:
+            self.vertex_source = f.read()
+
+        self.points_texture = glGenTextures(1)
+        glBindTexture(GL_TEXTURE_2D, self.points_texture)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_NEAREST)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_NEAREST)
+
+        self.framebuffer = glGenFramebuffers(1)
+        glBindFramebuffer(GL_FRAMEBUFFER, self.framebuffer)
+        self.targets = glGenTextures(2)
+        for i, texture in enumerate(self.targets):
+            glBindTexture(GL_TEXTURE_2D, texture)
+            glTexImage2D(
+                GL_TEXTURE_2D, 0, GL_RGBA32F, width, height, 0, GL_RGBA, GL_FLOAT, None
+            )
+            glFramebufferTexture2D(
+                GL_FRAMEBUFFER, GL_COLOR_ATTACHMENT0 + i, GL_TEXTURE_2D, texture, 0
+            )
+        glDrawBuffers(2, [GL_COLOR_ATTACHMENT0, GL_COLOR_ATTACHMENT1])
+        glBindTexture(GL_TEXTURE_2D, 0)
+
+        vertices = np.array(
+            [-1.0, -1.0, 0.0, 1.0, -1.0, 0.0, 1.0, 1.0, 0.0, -1.0, 1.0, 0.0],
+            dtype=np.float32,
+        )
+        indices = np.array([0, 1, 2, 2, 3, 0], dtype=np.uint32)
+        self.vao = glGenVertexArrays(1)
+        glBindVertexArray(self.vao)
+        glBindBuffer(GL_ARRAY_BUFFER, glGenBuffers(1))
+        glBufferData(GL_ARRAY_BUFFER, vertices.nbytes, vertices, GL_STATIC_DRAW)
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, glGenBuffers(1))
+        glBufferData(GL_ELEMENT_ARRAY_BUFFER, indices.nbytes, indices, GL_STATIC_DRAW)
+
+    def evaluate(self, nodes, points: np.ndarray, blend_strength: float) -> tuple:
+        """Devolve (sceneDistColor, sceneDistGrad) como arrays (N, 4) float32."""
+        program = load_program(
+            self.vertex_source, specialize_shader(FRAGMENT_TEMPLATE, nodes)
+        )
+        glUseProgram(program)
+        glUniform1i(glGetUniformLocation(program, "u_points"), 0)
+        glUniform1f(glGetUniformLocation(program, "u_blend_strength"), blend_strength)
+
+        glBindVertexArray(self.vao)
+        position = glGetAttribLocation(program, "vPosition")
+        glEnableVertexAttribArray(position)
+        glVertexAttribPointer(position, 3, GL_FLOAT, GL_FALSE, 0, None)
+
+        glActiveTexture(GL_TEXTURE0)
+        glBindTexture(GL_TEXTURE_2D, self.points_texture)
+        grid = np.ascontiguousarray(points, dtype=np.float32)
+        glTexImage2D(
+            GL_TEXTURE_2D,
+            0,
+            GL_RGB32F,
+            self.width,
+            self.height,
+            0,
+            GL_RGB,
+            GL_FLOAT,
+            grid,
+        )
+
+        glBindFramebuffer(GL_FRAMEBUFFER, self.framebuffer)
+        glViewport(0, 0, self.width, self.height)
+        glDrawElements(GL_TRIANGLES, 6, GL_UNSIGNED_INT, None)
+
+        outputs = []
+        for i in range(2):
+            glReadBuffer(GL_COLOR_ATTACHMENT0 + i)
+            data = glReadPixels(0, 0, self.width, self.height, GL_RGBA, GL_FLOAT)
+            outputs.append(np.frombuffer(data, dtype=np.float32).reshape(-1, 4))
+        glBindFramebuffer(GL_FRAMEBUFFER, 0)
+        glDeleteProgram(program)
+        return tuple(outputs)
+
+
+def check_scene(evaluator, nodes, points, blend_strength, tolerance) -> int:
+    """Número de pontos em que o shader difere da referência em NumPy."""
+    distance, color = scene_dist_color(
+        nodes, points, {"u_blend_strength": blend_strength}
+    )
+    dist_color, dist_grad = evaluator.evaluate(nodes, points, blend_strength)
+
+    limit = tolerance * (1.0 + np.abs(distance))
+    wrong = np.abs(dist_color[:, 3] - distance) > limit
+    wrong |= np.abs(dist_grad[:, 3] - distance) > limit
+    wrong |= np.abs(dist_color[:, :3] - color).max(axis=1) > tolerance
+    return int(np.count_nonzero(wrong))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Check the GLSL generated by dsf.compiler against the NumPy "
+        "reference (scene_dist_color), for random scene trees."
+    )
+    parser.add_argument("--scenes", type=int, default=40)
+    parser.add_argument("--objects", type=int, default=8)
+    parser.add_argument("--width", type=int, default=64)
+    parser.add_argument("--height", type=int, default=64)
+    parser.add_argument("--tolerance", type=float, default=1e-4)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    create_context()
+    evaluator = ShaderEvaluator(args.width, args.height)
+
+    rng = np.random.default_rng(args.seed)
+    mismatches = 0
+    for _ in range(args.scenes):
+        nodes = random_nodes(rng, args.objects)
+        points = rng.uniform(-3.0, 3.0, (args.width * args.height, 3))
+        blend_strength = float(rng.uniform(0.05, 0.8))
+        mismatches += check_scene(
+            evaluator, nodes, points, blend_strength, args.tolerance
+        )
+
+    total = args.scenes * args.width * args.height
+    print(f"{total} points: {mismatches} mismatches")
+    if mismatches:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
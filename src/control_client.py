@@ -0,0 +1,313 @@
+import argparse
+import asyncio
+import collections
+import threading
+import time
+import websockets
+import protocol
+
+DEFAULT_URI = "ws://localhost:8765"
+
+
+class ControlClient:
+    def __init__(
+        self, uri: str = DEFAULT_URI, reconnect_delay: float = 0.5, binary: bool = True
+    ) -> None:
+        """
+        Cliente websocket com uma única ligação, numa thread em segundo plano.
+
+        send() nunca bloqueia: atualizações ao mesmo parâmetro que ainda não
+        foram enviadas são juntadas (fica o último valor). send_ordered() é para
+        comandos que não podem ser juntados nem reordenados (ex.: add_primitive).
+        Os valores são validados logo em send() (ver protocol.parse_value).
+
+        O servidor envia o estado da janela ao ligar e depois os deltas
+        aceites de todos os clientes; ficam em state e em take_updates().
+
+        uri: Endereço do servidor websocket
+        reconnect_delay: Espera (s) antes de tentar ligar de novo
+        binary: Envia tudo o que está pendente numa só mensagem binária
+                (protocol.encode); False usa o protocolo de texto, uma
+                mensagem por atualização
+        """
+        self.uri = uri
+        self.reconnect_delay = reconnect_delay
+        self.binary = binary
+
+        self.lock = threading.Lock()
+        self.pending = {}  # parâmetro -> (valor, instante em que foi pedido)
+        self.ordered = collections.deque()  # (comando, valor, instante)
+        self.connected = False
+
+        # Estado da janela, mantido a partir do que o servidor envia
+        self.state = protocol.ControlState()
+        self.remote_updates = collections.deque(maxlen=4096)
+        self.window_stats = None  # Última resposta a get_stats
+
+        self.loop = None
+        self.wakeup = None
+        self.thread = None
+        self.running = False
+
+        # Estatísticas
+        self.sent = 0  # Atualizações enviadas
+        self.frames = 0  # Mensagens websocket enviadas
+        self.bytes_sent = 0
+        self.coalesced = 0
+        self.latency_total = 0.0  # Soma das latências pedido -> envio (s)
+        self.latency_max = 0.0
+        self.rtt = None  # Último ping/pong (s)
+        self.sent_times = collections.deque(maxlen=4096)
+        self.received = 0  # Atualizações recebidas do servidor
+
+    def start(self) -> "ControlClient":
+        ready = threading.Event()
+        self.running = True
+        self.thread = threading.Thread(target=self._thread_main, args=(ready,))
+        self.thread.daemon = True
+        self.thread.start()
+        ready.wait()
+        return self
+
+    def stop(self, timeout: float = 2.0) -> None:
+        """Envia o que falta (se estiver ligado) e termina a thread."""
+        if not self.running:
+            return
+        self.running = False
+        self.loop.call_soon_threadsafe(self.wakeup.set)
+        self.thread.join(timeout)
+
+    def send(self, parameter: str, value) -> None:
+        """Agenda parameter:value; um valor ainda não enviado é substituído."""
+        value = protocol.parse_value(parameter, value)
+        now = time.perf_counter()
+        with self.lock:
+            if parameter in self.pending:
+                self.coalesced += 1
+                # Mantém o instante do pedido mais antigo para medir a latência real
+                now = self.pending[parameter][1]
+            self.pending[parameter] = (value, now)
+        self._wake()
+
+    def send_ordered(self, command: str, value) -> None:
+        """Agenda command:value sem juntar com outros pedidos."""
+        value = protocol.parse_value(command, value)
+        with self.lock:
+            self.ordered.append((command, value, time.perf_counter()))
+        self._wake()
+
+    def request_stats(self) -> None:
+        """Pede as estatísticas da janela; a resposta fica em window_stats."""
+        self.send("get_stats", ())
+
+    def take_updates(self) -> list:
+        """Devolve e limpa as atualizações recebidas desde a última chamada."""
+        with self.lock:
+            updates = list(self.remote_updates)
+            self.remote_updates.clear()
+        return updates
+
+    def state_updates(self) -> list:
+        """Estado atual da janela como lista de (comando, valores)."""
+        with self.lock:
+            return self.state.updates()
+
+    def stats(self) -> dict:
+        """Mensagens enviadas, juntadas, por segundo e latências (ms)."""
+        now = time.perf_counter()
+        with self.lock:
+            recent = sum(1 for t in self.sent_times if now - t <= 1.0)
+            return {
+                "connected": self.connected,
+                "sent": self.sent,
+                "frames": self.frames,
+                "bytes_sent": self.bytes_sent,
+                "coalesced": self.coalesced,
+                "received": self.received,
+                "queued": len(self.pending) + len(self.ordered),
+                "messages_per_s": recent,
+                "latency_avg_ms": (
+                    1000 * self.latency_total / self.sent if self.sent else 0.0
+                ),
+                "latency_max_ms": 1000 * self.latency_max,
+                "rtt_ms": None if self.rtt is None else 1000 * self.rtt,
+            }
+
+    def _wake(self) -> None:
+        if self.loop is not None and not self.wakeup.is_set():
+            self.loop.call_soon_threadsafe(self.wakeup.set)
+
+    def _thread_main(self, ready: threading.Event) -> None:
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.wakeup = asyncio.Event()
+        ready.set()
+        self.loop.run_until_complete(self._run())
+        self.loop.close()
+
+    def _take(self) -> list:
+        """Retira da fila todas as mensagens prontas a enviar."""
+        with self.lock:
+            messages = [(c, v, t, False) for c, v, t in self.ordered]
+            messages += [(p, v, t, True) for p, (v, t) in self.pending.items()]
+            self.ordered.clear()
+            self.pending.clear()
+        return messages
+
+    def _restore(self, messages: list) -> None:
+        """Volta a pôr na fila mensagens não enviadas (sem apagar valores novos)."""
+        with self.lock:
+            for command, value, requested, coalesce in reversed(messages):
+                if not coalesce:
+                    self.ordered.appendleft((command, value, requested))
+                elif command not in self.pending:
+                    self.pending[command] = (value, requested)
+
+    async def _run(self) -> None:
+        while self.running:
+            try:
+                async with websockets.connect(self.uri) as websocket:
+                    self.connected = True
+                    with self.lock:
+                        self.state = protocol.ControlState()
+                    tasks = [
+                        asyncio.ensure_future(self._send_loop(websocket)),
+                        asyncio.ensure_future(self._receive(websocket)),
+                        asyncio.ensure_future(self._ping(websocket)),
+                    ]
+                    try:
+                        # Termina quando se pára o cliente ou a ligação fecha
+                        done, _ = await asyncio.wait(
+                            tasks[:2], return_when=asyncio.FIRST_COMPLETED
+                        )
+                        for task in done:
+                            task.result()
+                    finally:
+                        for task in tasks:
+                            task.cancel()
+                        await asyncio.gather(*tasks, return_exceptions=True)
+            except (OSError, websockets.exceptions.WebSocketException):
+                pass
+            finally:
+                self.connected = False
+
+            if self.running:
+                await asyncio.sleep(self.reconnect_delay)
+
+    def _frames(self, messages: list) -> list:
+        """Agrupa as mensagens em (início, fim, dados) a enviar numa mensagem cada."""
+        if not self.binary:
+            return [
+                (index, index + 1, protocol.format_text(command, value))
+                for index, (command, value, _, _) in enumerate(messages)
+            ]
+
+        frames = []
+        for start in range(0, len(messages), protocol.MAX_RECORDS):
+            batch = messages[start : start + protocol.MAX_RECORDS]
+            data = protocol.encode((command, value) for command, value, _, _ in batch)
+            frames.append((start, start + len(batch), data))
+        return frames
+
+    async def _send_loop(self, websocket) -> None:
+        while True:
+            await self.wakeup.wait()
+            self.wakeup.clear()
+
+            messages = self._take()
+            for start, end, data in self._frames(messages):
+                try:
+                    await websocket.send(data)
+                except (
+                    websockets.exceptions.WebSocketException,
+                    asyncio.CancelledError,
+                ):
+                    self._restore(messages[start:])
+                    raise
+
+                now = time.perf_counter()
+                with self.lock:
+                    self.frames += 1
+                    self.bytes_sent += len(data)
+                    for _, _, requested, _ in messages[start:end]:
+                        self.sent += 1
+                        self.sent_times.append(now)
+                        latency = now - requested
+                        self.latency_total += latency
+                        self.latency_max = max(self.latency_max, latency)
+
+            if not self.running:
+                return
+
+    async def _receive(self, websocket) -> None:
+        """Recebe o snapshot inicial, os deltas e as respostas a get_stats."""
+        async for message in websocket:
+            stats = protocol.parse_stats(message)
+            if stats is not None:
+                self.window_stats = stats
+                continue
+
+            try:
+                updates = [
+                    (command, protocol.parse_value(command, value))
+                    for command, value in protocol.decode_message(message)
+                ]
+            except ValueError as error:
+                print(f"Invalid state update received: {error}")
+                continue
+
+            with self.lock:
+                self.state.apply_all(updates)
+                self.remote_updates.extend(updates)
+                self.received += len(updates)
+
+    async def _ping(self, websocket, interval: float = 1.0) -> None:
+        """Mede periodicamente a ida e volta até ao servidor."""
+        while True:
+            start = time.perf_counter()
+            pong = await websocket.ping()
+            await pong
+            self.rtt = time.perf_counter() - start
+            await asyncio.sleep(interval)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Flood a render window with slider updates and report throughput."
+    )
+    parser.add_argument("--uri", default=DEFAULT_URI)
+    parser.add_argument("--updates", type=int, default=10000)
+    parser.add_argument("--parameter", default="change_blend_strength")
+    parser.add_argument(
+        "--text", action="store_true", help="Use the legacy text protocol"
+    )
+    args = parser.parse_args()
+
+    client = ControlClient(args.uri, binary=not args.text).start()
+    start = time.perf_counter()
+    for i in range(args.updates):
+        client.send(args.parameter, 3.0 * i / args.updates)
+    enqueue_s = time.perf_counter() - start
+
+    deadline = time.perf_counter() + 10.0
+    while client.stats()["queued"] and time.perf_counter() < deadline:
+        time.sleep(0.01)
+    time.sleep(1.1)  # Deixa passar um ping para medir a ida e volta
+    client.stop()
+
+    stats = client.stats()
+    print(
+        f"{args.updates} updates enqueued in {1000 * enqueue_s:.1f} ms "
+        f"({args.updates / enqueue_s:.0f}/s)"
+    )
+    print(
+        f"sent {stats['sent']} in {stats['frames']} messages "
+        f"({stats['bytes_sent']} bytes), coalesced {stats['coalesced']}, "
+        f"latency avg {stats['latency_avg_ms']:.2f} ms, "
+        f"max {stats['latency_max_ms']:.2f} ms, "
+        f"rtt {stats['rtt_ms'] or 0.0:.2f} ms, connected {stats['connected']}"
+    )
+
+
+if __name__ == "__main__":
+    main()
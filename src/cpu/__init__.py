@@ -0,0 +1,4 @@
+from .sdf import object_distance, object_normal
+from .bvh import BVH, bvh_distance
+from .resolution import ResolutionController
+from .renderer import Renderer, default_scene
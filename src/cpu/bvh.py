@@ -0,0 +1,225 @@
+import numpy as np
+from . import signatures as sig
+from .jit import kernel
+from .sdf import object_distance
+
+
+class BVH:
+    def __init__(self, leaf_size: int = 4) -> None:
+        """
+        Bounding volume hierarchy da cena, guardada em arrays planos para o Numba.
+
+        Os nós estão em pré-ordem (o filho esquerdo vem logo a seguir ao pai) e
+        cada nó guarda o índice do nó seguinte fora da sua sub-árvore (skip), o
+        que permite percorrer a árvore sem pilha.
+
+        leaf_size: Número máximo de objetos por folha
+        """
+        self.leaf_size = leaf_size
+        self.object_count = 0
+
+        self.node_min = np.zeros((0, 3), dtype=np.float32)
+        self.node_max = np.zeros((0, 3), dtype=np.float32)
+        self.node_start = np.zeros(0, dtype=np.int32)
+        self.node_count = np.zeros(0, dtype=np.int32)  # 0 = nó interno
+        self.node_skip = np.zeros(0, dtype=np.int32)
+        self.object_order = np.zeros(0, dtype=np.int32)
+
+    def arrays(self):
+        """Devolve o tuplo de arrays esperado por bvh_distance."""
+        return (
+            self.node_min,
+            self.node_max,
+            self.node_start,
+            self.node_count,
+            self.node_skip,
+            self.object_order,
+        )
+
+    def update(self, scene) -> None:
+        """Faz refit se o número de objetos não mudou, senão reconstrói."""
+        if scene.count == self.object_count and scene.count > 0:
+            self.refit(scene)
+        else:
+            self.rebuild(scene)
+
+    def rebuild(self, scene) -> None:
+        """Reconstrói a árvore a partir dos arrays de uma dsf.Scene."""
+        positions, sizes, _, types = scene.arrays()
+        object_min, object_max = object_bounds(positions, sizes, types)
+        centers = (object_min + object_max) * 0.5
+
+        node_min, node_max = [], []
+        node_start, node_count, node_skip = [], [], []
+        order = np.arange(scene.count, dtype=np.int32)
+
+        def build(start, end):
+            index = len(node_start)
+            subset = order[start:end]
+            node_min.append(object_min[subset].min(axis=0))
+            node_max.append(object_max[subset].max(axis=0))
+            node_start.append(start)
+
+            if end - start <= self.leaf_size:
+                node_count.append(end - start)
+                node_skip.append(index + 1)
+                return
+
+            node_count.append(0)
+            node_skip.append(-1)
+
+            # Divide pela mediana no eixo onde os centros estão mais espalhados
+            spread = centers[subset].max(axis=0) - centers[subset].min(axis=0)
+            axis = np.argmax(spread)
+            middle = (end - start) // 2
+            order[start:end] = subset[np.argpartition(centers[subset, axis], middle)]
+
+            build(start, start + middle)
+            build(start + middle, end)
+            node_skip[index] = len(node_start)
+
+        if scene.count > 0:
+            build(0, scene.count)
+
+        self.node_min = np.array(node_min, dtype=np.float32).reshape(-1, 3)
+        self.node_max = np.array(node_max, dtype=np.float32).reshape(-1, 3)
+        self.node_start = np.array(node_start, dtype=np.int32)
+        self.node_count = np.array(node_count, dtype=np.int32)
+        self.node_skip = np.array(node_skip, dtype=np.int32)
+        self.object_order = order
+        self.object_count = scene.count
+
+    def refit(self, scene) -> None:
+        """
+        Atualiza as caixas depois de os objetos se moverem, mantendo a topologia.
+
+        Mais barato que rebuild, mas a qualidade da árvore degrada se os
+        objetos se afastarem muito das posições originais.
+        """
+        if scene.count != self.object_count:
+            raise ValueError("refit requires the same number of objects as the build")
+
+        positions, sizes, _, types = scene.arrays()
+        object_min, object_max = object_bounds(positions, sizes, types)
+        refit_nodes(
+            object_min,
+            object_max,
+            self.node_min,
+            self.node_max,
+            self.node_start,
+            self.node_count,
+            self.node_skip,
+            self.object_order,
+        )
+
+
+def object_bounds(positions, sizes, types):
+    """Caixas alinhadas aos eixos de cada objeto: (mínimos, máximos)."""
+    # Esferas usam o raio, cubos metade da aresta
+    extent = np.where(types == 0, sizes, sizes / 2).astype(np.float32)[:, None]
+    return positions - extent, positions + extent
+
+
+@kernel(
+    (
+        sig.positions,
+        sig.positions,
+        sig.positions,
+        sig.positions,
+        sig.indices,
+        sig.indices,
+        sig.indices,
+        sig.indices,
+    )
+)
+def refit_nodes(
+    object_min,
+    object_max,
+    node_min,
+    node_max,
+    node_start,
+    node_count,
+    node_skip,
+    object_order,
+):
+    # Em pré-ordem os filhos vêm depois dos pais, por isso basta percorrer ao contrário
+    for node in range(len(node_count) - 1, -1, -1):
+        if node_count[node] > 0:
+            first = object_order[node_start[node]]
+            node_min[node] = object_min[first]
+            node_max[node] = object_max[first]
+            for k in range(node_start[node] + 1, node_start[node] + node_count[node]):
+                i = object_order[k]
+                for axis in range(3):
+                    node_min[node, axis] = min(
+                        node_min[node, axis], object_min[i, axis]
+                    )
+                    node_max[node, axis] = max(
+                        node_max[node, axis], object_max[i, axis]
+                    )
+        else:
+            # Filhos: o esquerdo é node + 1, o direito é o skip do esquerdo
+            left = node + 1
+            right = node_skip[left]
+            for axis in range(3):
+                node_min[node, axis] = min(node_min[left, axis], node_min[right, axis])
+                node_max[node, axis] = max(node_max[left, axis], node_max[right, axis])
+
+
+@kernel((sig.scalar, sig.scalar, sig.scalar, sig.row, sig.row))
+def box_distance(px, py, pz, box_min, box_max):
+    """Distância de um ponto a uma caixa (0 se estiver dentro)."""
+    dx = max(box_min[0] - px, 0.0, px - box_max[0])
+    dy = max(box_min[1] - py, 0.0, py - box_max[1])
+    dz = max(box_min[2] - pz, 0.0, pz - box_max[2])
+    return np.sqrt(dx * dx + dy * dy + dz * dz)
+
+
+@kernel(
+    (
+        sig.scalar,
+        sig.scalar,
+        sig.scalar,
+        sig.positions,
+        sig.sizes,
+        sig.object_types,
+        sig.bvh,
+    )
+)
+def bvh_distance(px, py, pz, object_positions, object_sizes, object_types, bvh):
+    """
+    Menor distância do ponto aos objetos, ignorando nós mais longe que o melhor.
+
+    :param px, py, pz: Componentes da posição atual.
+    :param object_positions: Array de posições dos objetos.
+    :param object_sizes: Array de tamanhos/raios dos objetos.
+    :param object_types: Array de tipos dos objetos (0=sphere, 1=cube).
+    :param bvh: Tuplo devolvido por BVH.arrays().
+    :return: (distância mínima, índice do objeto mais próximo ou -1).
+    """
+    node_min, node_max, node_start, node_count, node_skip, object_order = bvh
+
+    min_distance = np.inf
+    closest = -1
+    node = 0
+
+    while node < len(node_count):
+        # Dentro de objetos a distância é negativa: as caixas que contêm o
+        # ponto (distância 0) podem ter um objeto mais fundo e são sempre visitadas
+        box = box_distance(px, py, pz, node_min[node], node_max[node])
+        if box > 0.0 and box >= min_distance:
+            node = node_skip[node]
+        elif node_count[node] > 0:
+            for k in range(node_start[node], node_start[node] + node_count[node]):
+                i = object_order[k]
+                dist = object_distance(
+                    px, py, pz, object_positions[i], object_sizes[i], object_types[i]
+                )
+                if dist < min_distance:
+                    min_distance = dist
+                    closest = i
+            node = node_skip[node]
+        else:
+            node += 1
+
+    return min_distance, closest
@@ -0,0 +1,247 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from multiprocessing import shared_memory
+import numpy as np
+
+# Blocos de memória partilhada já abertos em cada processo de trabalho
+_attached = {}
+
+
+class SharedArrays:
+    def __init__(self) -> None:
+        """
+        Conjunto de arrays NumPy em multiprocessing.shared_memory.
+
+        Os processos de trabalho recebem só o layout (nomes, formas e tipos),
+        nunca os dados, e abrem os mesmos blocos sem cópias.
+        """
+        self.blocks = {}
+        self.arrays = {}
+
+    def publish(self, key: str, array: np.ndarray) -> np.ndarray:
+        """Copia o array para memória partilhada e devolve a vista partilhada."""
+        shared = self.allocate(key, array.shape, array.dtype)
+        shared[...] = array
+        return shared
+
+    def allocate(self, key: str, shape, dtype) -> np.ndarray:
+        """Devolve um array partilhado com a forma dada, reutilizando o bloco."""
+        dtype = np.dtype(dtype)
+        current = self.arrays.get(key)
+        if current is not None and current.shape == shape and current.dtype == dtype:
+            return current
+
+        self._release(key)
+        nbytes = int(np.prod(shape)) * dtype.itemsize
+        block = shared_memory.SharedMemory(create=True, size=max(1, nbytes))
+        self.blocks[key] = block
+        self.arrays[key] = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+        return self.arrays[key]
+
+    def layout(self) -> tuple:
+        """Descrição dos arrays que os processos de trabalho usam para os abrir."""
+        return tuple(
+            (key, self.blocks[key].name, array.shape, array.dtype.str)
+            for key, array in self.arrays.items()
+        )
+
+    def close(self) -> None:
+        for key in list(self.blocks):
+            self._release(key)
+
+    def _release(self, key: str) -> None:
+        block = self.blocks.pop(key, None)
+        self.arrays.pop(key, None)
+        if block is not None:
+            block.close()
+            block.unlink()
+
+
+def attach(layout: tuple) -> dict:
+    """Abre (uma vez por processo) os arrays descritos por SharedArrays.layout()."""
+    names = {name for _, name, _, _ in layout}
+    # Blocos que o processo pai entretanto substituiu deixam de ser usados
+    for name in [name for name in _attached if name not in names]:
+        _attached.pop(name).close()
+
+    arrays = {}
+    for key, name, shape, dtype in layout:
+        block = _attached.get(name)
+        if block is None:
+            block = shared_memory.SharedMemory(name=name)
+            _attached[name] = block
+        arrays[key] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+    return arrays
+
+
+def split_tiles(width: int, height: int, tile: int) -> list:
+    """Divide o frame em tiles (y0, y1, x0, x1) de no máximo tile x tile píxeis."""
+    return [
+        (y0, min(y0 + tile, height), x0, min(x0 + tile, width))
+        for y0 in range(0, height, tile)
+        for x0 in range(0, width, tile)
+    ]
+
+
+def _init_worker() -> None:
+    # Cada processo renderiza um tile de cada vez, num só núcleo
+    from . import kernels  # noqa: F401  (carrega os kernels da cache do Numba)
+
+
+def _render_tile(layout: tuple, params: tuple, tile: tuple) -> tuple:
+    from .kernels import render_tile
+
+    arrays = attach(layout)
+    (
+        camera_position,
+        max_distance,
+        epsilon,
+        max_steps,
+        light_position,
+        light_color,
+        ambient_light,
+        normal_mode,
+        relaxation,
+        coarse_block,
+    ) = params
+    bvh = tuple(arrays[f"bvh{i}"] for i in range(6))
+
+    start = time.perf_counter()
+    steps = render_tile(
+        camera_position,
+        arrays["positions"],
+        arrays["sizes"],
+        arrays["colors"],
+        arrays["types"],
+        max_distance,
+        epsilon,
+        max_steps,
+        light_position,
+        light_color,
+        ambient_light,
+        bvh,
+        normal_mode,
+        relaxation,
+        arrays["coarse_depth"],
+        coarse_block,
+        *tile,
+        arrays["framebuffer"],
+    )
+    return tile, time.perf_counter() - start, steps
+
+
+class TileFarm:
+    def __init__(
+        self,
+        renderer,
+        workers: int = None,
+        tile: int = 64,
+        start_method: str = "spawn",
+    ) -> None:
+        """
+        Renderiza os frames de um Renderer num conjunto de processos, por tiles.
+
+        A cena, a BVH e o framebuffer vivem em memória partilhada, por isso cada
+        tile só envia o layout e os parâmetros da câmera. Os tiles são
+        distribuídos dinamicamente (cada processo pede o seguinte ao terminar) e
+        ordenados pelo custo medido no frame anterior, do mais caro para o mais
+        barato, para que os tiles junto à geometria não atrasem o fim do frame.
+
+        renderer: Renderer com a cena e os parâmetros de render
+        workers: Número de processos (por omissão, um por núcleo)
+        tile: Lado dos tiles em píxeis
+        start_method: Método de arranque do multiprocessing ("spawn" evita
+                      herdar o estado das threads do Numba do processo pai)
+        """
+        self.renderer = renderer
+        self.workers = workers or os.cpu_count() or 1
+        self.tile = tile
+        self.shared = SharedArrays()
+        self.published_scene = None  # Cena e BVH que estão em memória partilhada
+        self.published_bvh = ()
+        self.tile_cost = {}  # Tempo (s) de cada tile no último frame
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context(start_method),
+            initializer=_init_worker,
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=True)
+        self.shared.close()
+
+    def render_to(self, framebuffer: np.ndarray) -> None:
+        """Renderiza a cena atual para um framebuffer (H, W, 3) float32."""
+        renderer = self.renderer
+        height, width = framebuffer.shape[:2]
+
+        # A cena e a BVH só são copiadas quando mudam; scene.dirty tem de ser
+        # lido antes de scene_bvh(), que o limpa
+        scene = renderer.scene
+        scene_changed = scene.dirty or scene is not self.published_scene
+        bvh = renderer.scene_bvh()
+        if scene_changed:
+            positions, sizes, colors, types = scene.arrays()
+            self.shared.publish("positions", positions)
+            self.shared.publish("sizes", sizes)
+            self.shared.publish("colors", colors)
+            self.shared.publish("types", types)
+            self.published_scene = scene
+
+        # Refit ou rebuild (cena alterada) ou outro tuplo (BVH ligada/desligada)
+        bvh_changed = len(bvh) != len(self.published_bvh) or any(
+            array is not published for array, published in zip(bvh, self.published_bvh)
+        )
+        if scene_changed or bvh_changed:
+            for i, array in enumerate(bvh):
+                self.shared.publish(f"bvh{i}", array)
+            self.published_bvh = bvh
+        output = self.shared.allocate("framebuffer", framebuffer.shape, np.float32)
+
+        # O prepass é calculado aqui e partilhado com todos os tiles
+        steps = renderer.update_coarse_depth(height, width)
+        self.shared.publish("coarse_depth", renderer.coarse_depth)
+
+        layout = self.shared.layout()
+        params = (
+            renderer.camera_position,
+            renderer.max_distance,
+            renderer.epsilon,
+            renderer.max_steps,
+            renderer.light_position,
+            renderer.light_color,
+            renderer.ambient_light,
+            renderer.normal_mode,
+            renderer.relaxation,
+            renderer.coarse_block,
+        )
+
+        tiles = split_tiles(width, height, self.tile)
+        tiles.sort(key=lambda t: self.tile_cost.get(t, 0.0), reverse=True)
+
+        pending = {
+            self.executor.submit(_render_tile, layout, params, tile) for tile in tiles
+        }
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                tile, cost, tile_steps = future.result()
+                self.tile_cost[tile] = cost
+                steps += tile_steps
+
+        framebuffer[...] = output
+        renderer.steps_per_pixel = steps / (width * height)
+
+    def render_image(self, width: int, height: int) -> np.ndarray:
+        """Renderiza a cena para um novo array (height, width, 3) float32."""
+        framebuffer = np.zeros((height, width, 3), dtype=np.float32)
+        self.render_to(framebuffer)
+        return framebuffer
@@ -0,0 +1,424 @@
+import math
+import numpy as np
+from numba import prange
+from . import signatures as sig
+from .jit import kernel
+
+# Parâmetros de SceneInfo nos shaders (glsl/window_mandelbulb, glsl/window_juliaset3d)
+MAX_ITERATIONS = 50
+DEFAULT_POWER = 10.0  # Potência inicial das janelas (fractalPower)
+MANDELBULB_BAILOUT = 2.0
+JULIA_BAILOUT = 9.0
+JULIA_CONSTANT = (0.355, 0.355, 0.355)
+
+
+# error_model="numpy": r = 0 dá NaN como na GPU, em vez de ZeroDivisionError
+@kernel((*(sig.scalar,) * 8, sig.integer, sig.integer), error_model="numpy")
+def power_de(x, y, z, cx, cy, cz, power, bailout, max_iterations, julia):
+    """
+    Estimador de distância de um fractal de potência (SceneInfo dos shaders).
+
+    Com julia = 0 é o Mandelbulb (a constante somada é o próprio ponto);
+    com julia = 1 soma a constante (cx, cy, cz). Devolve (iterações, distância)
+    com a mesma semântica da GLSL, incluindo iterações = max_iterations - 1
+    para pontos que não escapam.
+    """
+    if julia == 0:
+        cx, cy, cz = x, y, z
+
+    zx, zy, zz = x, y, z
+    dr = 1.0
+    r = 0.0
+    iterations = 0
+    for i in range(max_iterations):
+        iterations = i
+        r = math.sqrt(zx * zx + zy * zy + zz * zz)
+        if r > bailout:
+            break
+
+        # Coordenadas polares, escaladas e rodadas pela potência
+        theta = math.acos(zz / r) * power
+        phi = math.atan2(zy, zx) * power
+        dr = r ** (power - 1.0) * power * dr + 1.0
+        zr = r**power
+
+        sin_theta = math.sin(theta)
+        zx = zr * sin_theta * math.cos(phi) + cx
+        zy = zr * math.sin(phi) * sin_theta + cy
+        zz = zr * math.cos(theta) + cz
+
+    return iterations, 0.5 * math.log(r) * r / dr
+
+
+@kernel(
+    (
+        sig.points,
+        sig.scalar,
+        sig.vector,
+        sig.scalar,
+        sig.integer,
+        sig.integer,
+        sig.iteration_counts,
+        sig.distances,
+    ),
+    parallel=True,
+    error_model="numpy",
+)
+def power_de_batch(
+    points, power, constant, bailout, max_iterations, julia, iterations, distances
+):
+    """power_de para cada linha de points (N, 3), distribuído pelos núcleos."""
+    for i in prange(points.shape[0]):
+        iterations[i], distances[i] = power_de(
+            points[i, 0],
+            points[i, 1],
+            points[i, 2],
+            constant[0],
+            constant[1],
+            constant[2],
+            power,
+            bailout,
+            max_iterations,
+            julia,
+        )
+
+
+def _points(points) -> np.ndarray:
+    points = np.ascontiguousarray(points, dtype=np.float64)
+    if points.ndim != 2 or points.shape[1] != 3:
+        raise ValueError(f"Expected an (N, 3) point array, got shape {points.shape}")
+    return points
+
+
+def _batch(points, power, constant, bailout, max_iterations, julia):
+    points = _points(points)
+    iterations = np.empty(len(points), dtype=np.int32)
+    distances = np.empty(len(points), dtype=np.float64)
+    power_de_batch(
+        points,
+        float(power),
+        np.asarray(constant, dtype=np.float64),
+        float(bailout),
+        int(max_iterations),
+        int(julia),
+        iterations,
+        distances,
+    )
+    return iterations, distances
+
+
+def mandelbulb(
+    points,
+    power: float = DEFAULT_POWER,
+    bailout: float = MANDELBULB_BAILOUT,
+    max_iterations: int = MAX_ITERATIONS,
+):
+    """
+    Distâncias ao Mandelbulb (glsl/window_mandelbulb/fragment_shader.glsl).
+
+    :param points: Array (N, 3) de pontos.
+    :param power: Potência do fractal (uniform power).
+    :param bailout: Raio de escape.
+    :param max_iterations: Número máximo de iterações.
+    :return: (iterações (N,) int32, distâncias (N,) float64)
+    """
+    return _batch(points, power, (0.0, 0.0, 0.0), bailout, max_iterations, False)
+
+
+def julia(
+    points,
+    power: float = DEFAULT_POWER,
+    constant=JULIA_CONSTANT,
+    bailout: float = JULIA_BAILOUT,
+    max_iterations: int = MAX_ITERATIONS,
+):
+    """
+    Distâncias ao conjunto de Julia 3D (glsl/window_juliaset3d/fragment_shader.glsl).
+
+    :param points: Array (N, 3) de pontos.
+    :param power: Potência do fractal (uniform power).
+    :param constant: Constante do conjunto de Julia (x, y, z).
+    :param bailout: Raio de escape.
+    :param max_iterations: Número máximo de iterações.
+    :return: (iterações (N,) int32, distâncias (N,) float64)
+    """
+    return _batch(points, power, constant, bailout, max_iterations, True)
+
+
+def power_de_numpy(points, power, constant=None, bailout=2.0, max_iterations=50):
+    """
+    Referência em NumPy (vetorizada, sem Numba) de power_de.
+
+    :param constant: Constante de Julia, ou None para o Mandelbulb.
+    :return: (iterações (N,) int32, distâncias (N,) float64)
+    """
+    points = _points(points)
+    c = points if constant is None else np.broadcast_to(constant, points.shape)
+    z = points.copy()
+    dr = np.ones(len(points))
+    r = np.zeros(len(points))
+    iterations = np.zeros(len(points), dtype=np.int32)
+    active = np.ones(len(points), dtype=bool)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for i in range(max_iterations):
+            iterations[active] = i
+            r[active] = np.linalg.norm(z[active], axis=1)
+            active &= ~(r > bailout)
+            if not active.any():
+                break
+
+            za, ra = z[active], r[active]
+            theta = np.arccos(za[:, 2] / ra) * power
+            phi = np.arctan2(za[:, 1], za[:, 0]) * power
+            dr[active] = ra ** (power - 1.0) * power * dr[active] + 1.0
+            zr = ra**power
+            z[active] = (
+                zr[:, None]
+                * np.stack(
+                    [
+                        np.sin(theta) * np.cos(phi),
+                        np.sin(phi) * np.sin(theta),
+                        np.cos(theta),
+                    ],
+                    axis=1,
+                )
+                + c[active]
+            )
+
+        distances = 0.5 * np.log(r) * r / dr
+    return iterations, distances
+
+
+# Constantes do ray marching em glsl/window_mandelbulb/fragment_shader.glsl
+EPSILON = 0.001
+MAX_DISTANCE = 200.0
+MAX_STEPS = 250
+DARKNESS = 40.0
+BLACK_AND_WHITE = 0.1
+COLOUR_A_MIX = (1.0, 0.0, 0.0)
+COLOUR_B_MIX = (0.94, 0.0, 1.0)
+BACKGROUND_BOTTOM = (65.0 / 255.0, 3.0 / 255.0, 79.0 / 255.0)
+BACKGROUND_TOP = (16.0 / 255.0, 6.0 / 255.0, 28.0 / 255.0)
+MIN_LOD_ITERATIONS = 16  # colourB satura às 16 iterações
+
+
+@kernel((*(sig.scalar,) * 4,))
+def lod_budget(ray_distance, pixel_footprint, lod_cone, lod_iteration_falloff):
+    """
+    HitEpsilon e IterationBudget dos shaders dos fractais.
+
+    O epsilon nunca fica abaixo de lod_cone larguras do cone do píxel à
+    distância ray_distance, e as iterações descem com a distância até
+    MIN_LOD_ITERATIONS. Com os dois fatores a 0 dá (EPSILON, MAX_ITERATIONS).
+    """
+    epsilon = max(EPSILON, lod_cone * pixel_footprint * ray_distance)
+    budget = int(MAX_ITERATIONS / (1.0 + lod_iteration_falloff * ray_distance))
+    return epsilon, min(max(budget, MIN_LOD_ITERATIONS), MAX_ITERATIONS)
+
+
+@kernel((*(sig.scalar,) * 4, sig.integer), error_model="numpy")
+def mandelbulb_distance(x, y, z, power, iterations):
+    return power_de(x, y, z, 0.0, 0.0, 0.0, power, MANDELBULB_BAILOUT, iterations, 0)[1]
+
+
+@kernel((*(sig.scalar,) * 5, sig.integer, sig.integer), error_model="numpy")
+def mandelbulb_normal(x, y, z, power, e, iterations, normal_mode):
+    """
+    EstimateNormal do shader: 0 = diferenças centrais, outro = tetraédrico.
+
+    e e iterations são o epsilon e as iterações do LOD no ponto de impacto.
+    """
+    if normal_mode != 0:
+        d0 = mandelbulb_distance(x + e, y - e, z - e, power, iterations)
+        d1 = mandelbulb_distance(x - e, y - e, z + e, power, iterations)
+        d2 = mandelbulb_distance(x - e, y + e, z - e, power, iterations)
+        d3 = mandelbulb_distance(x + e, y + e, z + e, power, iterations)
+        nx = d0 - d1 - d2 + d3
+        ny = -d0 - d1 + d2 + d3
+        nz = -d0 + d1 - d2 + d3
+    else:
+        nx = mandelbulb_distance(x + e, y, z, power, iterations) - mandelbulb_distance(
+            x - e, y, z, power, iterations
+        )
+        ny = mandelbulb_distance(x, y + e, z, power, iterations) - mandelbulb_distance(
+            x, y - e, z, power, iterations
+        )
+        nz = mandelbulb_distance(x, y, z + e, power, iterations) - mandelbulb_distance(
+            x, y, z - e, power, iterations
+        )
+    length = math.sqrt(nx * nx + ny * ny + nz * nz)
+    return nx / length, ny / length, nz / length
+
+
+@kernel(
+    (
+        sig.vector,
+        sig.vector,
+        sig.scalar,
+        sig.scalar,
+        sig.scalar,
+        sig.vector,
+        sig.vector,
+        sig.integer,
+        sig.scalar,
+        sig.scalar,
+        *(sig.integer,) * 4,
+        sig.framebuffer,
+    ),
+    error_model="numpy",
+)
+def render_mandelbulb_tile(
+    camera_position,
+    camera_rotation,
+    power,
+    darkness,
+    black_and_white,
+    colour_a_mix,
+    colour_b_mix,
+    normal_mode,
+    lod_cone,
+    lod_iteration_falloff,
+    y0,
+    y1,
+    x0,
+    x1,
+    framebuffer,
+):
+    """
+    Renderiza o retângulo [y0, y1) x [x0, x1) do Mandelbulb, num só núcleo.
+
+    Os parâmetros são os de render_mandelbulb; y0, y1, x0 e x1 delimitam o
+    tile dentro do framebuffer completo (H, W, 3).
+    """
+    height, width = framebuffer.shape[0], framebuffer.shape[1]
+    pixel_footprint = 2.0 / min(width, height)
+
+    # rotationMatrix(pitch, yaw): colunas da mat3 do shader
+    cp, sp = math.cos(camera_rotation[0]), math.sin(camera_rotation[0])
+    cy, sy = math.cos(camera_rotation[1]), math.sin(camera_rotation[1])
+
+    for y in range(y0, y1):
+        # gl_FragCoord tem a origem em baixo; a linha 0 do framebuffer é o topo
+        v = (height - y - 0.5) / height
+        for x in range(x0, x1):
+            u = (x + 0.5) / width
+            su, sv = u * 2.0 - 1.0, v * 2.0 - 1.0
+            dx = su * cy + sv * sp * sy + cp * sy
+            dy = sv * cp - sp
+            dz = -su * sy + sv * sp * cy + cp * cy
+            length = math.sqrt(dx * dx + dy * dy + dz * dz)
+            dx, dy, dz = dx / length, dy / length, dz / length
+
+            r = BACKGROUND_BOTTOM[0] + (BACKGROUND_TOP[0] - BACKGROUND_BOTTOM[0]) * v
+            g = BACKGROUND_BOTTOM[1] + (BACKGROUND_TOP[1] - BACKGROUND_BOTTOM[1]) * v
+            b = BACKGROUND_BOTTOM[2] + (BACKGROUND_TOP[2] - BACKGROUND_BOTTOM[2]) * v
+
+            ox, oy, oz = camera_position[0], camera_position[1], camera_position[2]
+            ray_distance = 0.0
+            steps = 0
+            while ray_distance < MAX_DISTANCE and steps < MAX_STEPS:
+                steps += 1
+                epsilon, budget = lod_budget(
+                    ray_distance, pixel_footprint, lod_cone, lod_iteration_falloff
+                )
+                iterations, distance = power_de(
+                    ox, oy, oz, 0.0, 0.0, 0.0, power, MANDELBULB_BAILOUT, budget, 0
+                )
+                if distance < epsilon:
+                    nx, ny, nz = mandelbulb_normal(
+                        ox - dx * epsilon * 2.0,
+                        oy - dy * epsilon * 2.0,
+                        oz - dz * epsilon * 2.0,
+                        power,
+                        epsilon,
+                        budget,
+                        normal_mode,
+                    )
+                    colour_a = -((nx + ny + nz) * 0.5 + 1.5)
+                    colour_a = min(max(colour_a, 0.0), 1.0)
+                    colour_b = min(max(iterations / 16.0, 0.0), 1.0)
+                    r = colour_a * colour_a_mix[0] + colour_b * colour_b_mix[0]
+                    g = colour_a * colour_a_mix[1] + colour_b * colour_b_mix[1]
+                    b = colour_a * colour_a_mix[2] + colour_b * colour_b_mix[2]
+                    r = min(max(r, 0.0), 1.0)
+                    g = min(max(g, 0.0), 1.0)
+                    b = min(max(b, 0.0), 1.0)
+                    break
+                ox += dx * distance
+                oy += dy * distance
+                oz += dz * distance
+                ray_distance += distance
+
+            rim = steps / darkness
+            framebuffer[y, x, 0] = (r + (1.0 - r) * black_and_white) * rim
+            framebuffer[y, x, 1] = (g + (1.0 - g) * black_and_white) * rim
+            framebuffer[y, x, 2] = (b + (1.0 - b) * black_and_white) * rim
+
+
+@kernel(
+    (
+        sig.vector,
+        sig.vector,
+        sig.scalar,
+        sig.scalar,
+        sig.scalar,
+        sig.vector,
+        sig.vector,
+        sig.integer,
+        sig.scalar,
+        sig.scalar,
+        sig.framebuffer,
+    ),
+    parallel=True,
+    error_model="numpy",
+)
+def render_mandelbulb(
+    camera_position,
+    camera_rotation,
+    power,
+    darkness,
+    black_and_white,
+    colour_a_mix,
+    colour_b_mix,
+    normal_mode,
+    lod_cone,
+    lod_iteration_falloff,
+    framebuffer,
+):
+    """
+    Renderiza um frame do Mandelbulb como o main() do shader, linhas em paralelo.
+
+    :param camera_position: Posição da câmera (u_camera_position).
+    :param camera_rotation: (pitch, yaw) da câmera (u_camera_rotation).
+    :param power: Potência do fractal (power).
+    :param darkness: Divisor do número de passos no brilho (darkness).
+    :param black_and_white: Mistura com branco (blackAndWhite).
+    :param colour_a_mix: Cor da componente da normal (colourAMix).
+    :param colour_b_mix: Cor da componente das iterações (colourBMix).
+    :param normal_mode: 0 = diferenças centrais, outro = tetraédrico.
+    :param lod_cone: Epsilon mínimo em larguras do cone do píxel (u_lod_cone).
+    :param lod_iteration_falloff: Queda das iterações com a distância
+                                  (u_lod_iteration_falloff); 0 e 0 = sem LOD.
+    :param framebuffer: Buffer de saída (H, W, 3) float32, linha 0 = topo da imagem.
+    """
+    height, width = framebuffer.shape[0], framebuffer.shape[1]
+
+    for y in prange(height):
+        render_mandelbulb_tile(
+            camera_position,
+            camera_rotation,
+            power,
+            darkness,
+            black_and_white,
+            colour_a_mix,
+            colour_b_mix,
+            normal_mode,
+            lod_cone,
+            lod_iteration_falloff,
+            y,
+            y + 1,
+            0,
+            width,
+            framebuffer,
+        )
@@ -0,0 +1,129 @@
+import struct
+import zlib
+from abc import ABC, abstractmethod
+import numpy as np
+
+
+def to_uint8(framebuffer: np.ndarray) -> np.ndarray:
+    """Converte um framebuffer float (valores em [0, 1]) para RGB de 8 bits."""
+    return (np.clip(framebuffer, 0.0, 1.0) * 255.0 + 0.5).astype(np.uint8)
+
+
+def _png_chunk(kind: bytes, data: bytes) -> bytes:
+    crc = zlib.crc32(kind + data) & 0xFFFFFFFF
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", crc)
+
+
+def write_png(path: str, framebuffer: np.ndarray, compression: int = 6) -> None:
+    """
+    Escreve um framebuffer (H, W, 3) como PNG RGB de 8 bits.
+
+    Usa apenas zlib, para não depender de bibliotecas de imagem nos nós de render.
+
+    :param path: Caminho do ficheiro de saída.
+    :param framebuffer: Array (H, W, 3) float em [0, 1] ou uint8.
+    :param compression: Nível de compressão do zlib (0-9).
+    """
+    pixels = framebuffer if framebuffer.dtype == np.uint8 else to_uint8(framebuffer)
+    height, width = pixels.shape[:2]
+
+    # Cada linha começa com o byte do filtro (0 = sem filtro)
+    rows = np.zeros((height, width * 3 + 1), dtype=np.uint8)
+    rows[:, 1:] = pixels.reshape(height, width * 3)
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    with open(path, "wb") as f:
+        f.write(b"\x89PNG\r\n\x1a\n")
+        f.write(_png_chunk(b"IHDR", header))
+        f.write(_png_chunk(b"IDAT", zlib.compress(rows.tobytes(), compression)))
+        f.write(_png_chunk(b"IEND", b""))
+
+
+def rgb_to_yuv444(pixels: np.ndarray) -> np.ndarray:
+    """
+    Converte RGB de 8 bits (H, W, 3) para planos Y, Cb, Cr (3, H, W).
+
+    BT.601 em gama limitada (Y 16-235, Cb/Cr 16-240), o que os leitores de
+    Y4M assumem por omissão.
+    """
+    rgb = pixels.astype(np.float32)
+    r, g, b = rgb[..., 0], rgb[..., 1], rgb[..., 2]
+    y = 16.0 + (65.481 * r + 128.553 * g + 24.966 * b) / 255.0
+    cb = 128.0 + (-37.797 * r - 74.203 * g + 112.0 * b) / 255.0
+    cr = 128.0 + (112.0 * r - 93.786 * g - 18.214 * b) / 255.0
+    return (np.stack([y, cb, cr]) + 0.5).astype(np.uint8)
+
+
+class FrameWriter(ABC):
+    def __init__(self, path: str, width: int, height: int, frames: int) -> None:
+        """
+        Escreve uma sequência de frames RGB de 8 bits num só ficheiro, um a um.
+
+        Cada frame é escrito e largado assim que chega, por isso a memória não
+        cresce com o tamanho da sequência.
+
+        path: Ficheiro de saída
+        width, height: Tamanho dos frames
+        frames: Número total de frames (o cabeçalho do .npy precisa dele)
+        """
+        self.width = width
+        self.height = height
+        self.frames = frames
+        self.written = 0
+        self.file = open(path, "wb")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def write(self, pixels: np.ndarray) -> None:
+        if pixels.shape != (self.height, self.width, 3) or pixels.dtype != np.uint8:
+            raise ValueError(
+                f"Expected a ({self.height}, {self.width}, 3) uint8 frame, "
+                f"got {pixels.shape} {pixels.dtype}"
+            )
+        if self.written >= self.frames:
+            raise ValueError(f"Sequence already has {self.frames} frames")
+        self._write(pixels)
+        self.written += 1
+
+    @abstractmethod
+    def _write(self, pixels: np.ndarray) -> None:
+        """Escreve um frame já validado (H, W, 3) uint8 no ficheiro."""
+
+    def close(self) -> None:
+        self.file.close()
+
+
+class Y4MWriter(FrameWriter):
+    def __init__(
+        self, path: str, width: int, height: int, frames: int, fps: int = 30
+    ) -> None:
+        """Vídeo YUV4MPEG2 4:4:4 sem compressão (lido por ffmpeg, mpv, ...)."""
+        super().__init__(path, width, height, frames)
+        self.file.write(
+            f"YUV4MPEG2 W{width} H{height} F{fps}:1 Ip A1:1 C444\n".encode("ascii")
+        )
+
+    def _write(self, pixels: np.ndarray) -> None:
+        self.file.write(b"FRAME\n")
+        self.file.write(rgb_to_yuv444(pixels).tobytes())
+
+
+class NpyWriter(FrameWriter):
+    def __init__(self, path: str, width: int, height: int, frames: int) -> None:
+        """Array .npy (frames, H, W, 3) uint8, escrito frame a frame."""
+        super().__init__(path, width, height, frames)
+        np.lib.format.write_array_header_1_0(
+            self.file,
+            {
+                "descr": np.dtype(np.uint8).str,
+                "fortran_order": False,
+                "shape": (frames, height, width, 3),
+            },
+        )
+
+    def _write(self, pixels: np.ndarray) -> None:
+        self.file.write(np.ascontiguousarray(pixels).tobytes())
@@ -0,0 +1,131 @@
+import glob
+import hashlib
+import json
+import os
+import time
+from numba import config, njit
+from numba.core.caching import UserProvidedCacheLocator
+
+# Tempo de compilação (ou de carregamento da cache) de cada kernel nesta execução
+jit_times = {}
+
+
+def _cache_dir() -> str:
+    # A mesma pasta que o Numba usa para os ficheiros de cpu/
+    if config.CACHE_DIR:
+        return os.path.join(
+            config.CACHE_DIR,
+            UserProvidedCacheLocator.get_suitable_cache_subpath(__file__),
+        )
+    return os.path.join(os.path.dirname(__file__), "__pycache__")
+
+
+def _sources_hash() -> str:
+    digest = hashlib.sha1()
+    for path in sorted(glob.glob(os.path.join(os.path.dirname(__file__), "*.py"))):
+        digest.update(os.path.basename(path).encode())
+        with open(path, "rb") as file:
+            digest.update(file.read())
+    return digest.hexdigest()
+
+
+def _check_cache_stamp() -> None:
+    """
+    Invalida a cache do Numba quando algum ficheiro de cpu/ mudou.
+
+    O Numba só verifica o ficheiro de cada kernel: se um kernel chama uma
+    função de outro módulo que foi alterada, a versão em cache continua a usar
+    a antiga. A cache guarda por isso um hash de todas as fontes de cpu/ e é
+    apagada quando o hash não coincide.
+    """
+    cache_dir = _cache_dir()
+    stamp_path = os.path.join(cache_dir, "sources.sha1")
+    stamp = _sources_hash()
+    try:
+        with open(stamp_path, "r") as file:
+            if file.read().strip() == stamp:
+                return
+    except OSError:
+        pass
+
+    try:
+        for pattern in ("*.nbi", "*.nbc"):
+            for path in glob.glob(os.path.join(cache_dir, pattern)):
+                os.remove(path)
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(stamp_path, "w") as file:
+            file.write(stamp)
+    except OSError:
+        pass
+
+
+# Tem de correr antes de qualquer kernel ser decorado
+_check_cache_stamp()
+
+
+def kernel(*signatures, **options):
+    """
+    njit com assinaturas explícitas e cache em disco.
+
+    Como as assinaturas são dadas, o kernel é compilado (ou carregado da
+    cache) logo na importação do módulo em vez de no primeiro frame.
+    """
+
+    def decorate(func):
+        start = time.perf_counter()
+        dispatcher = njit(list(signatures), cache=True, **options)(func)
+        elapsed = time.perf_counter() - start
+
+        from_cache = sum(dispatcher.stats.cache_hits.values()) > 0
+        jit_times[f"{func.__module__}.{func.__name__}"] = (elapsed, from_cache)
+        return dispatcher
+
+    return decorate
+
+
+def _times_path() -> str:
+    return os.path.join(_cache_dir(), "jit_times.json")
+
+
+def jit_report() -> str:
+    """
+    Resumo do tempo de JIT desta execução e do tempo poupado pela cache.
+
+    Os tempos de compilação a frio são guardados junto da cache do Numba, para
+    comparar com o tempo de carregamento nas execuções seguintes.
+    """
+    path = _times_path()
+    try:
+        with open(path, "r") as file:
+            cold_times = json.load(file)
+    except (OSError, ValueError):
+        cold_times = {}
+
+    total = saved = 0.0
+    compiled, loaded = [], []
+    for name, (elapsed, from_cache) in jit_times.items():
+        total += elapsed
+        if from_cache:
+            loaded.append(name)
+            if name in cold_times:
+                saved += max(cold_times[name] - elapsed, 0.0)
+        else:
+            compiled.append(name)
+            cold_times[name] = elapsed
+
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as file:
+            json.dump(cold_times, file, indent=2)
+    except OSError:
+        pass
+
+    lines = [
+        f"JIT: {len(jit_times)} kernels ready in {total:.2f} s "
+        f"({len(loaded)} from cache, {len(compiled)} compiled)"
+    ]
+    if loaded:
+        lines.append(f"JIT: cache saved {saved:.2f} s of compilation")
+    for name in compiled:
+        lines.append(f"JIT: compiled {name} in {jit_times[name][0]:.2f} s")
+    return "\n".join(lines)
@@ -0,0 +1,990 @@
+import numpy as np
+from numba import prange
+from .bvh import bvh_distance
+from .sdf import object_distance, object_normal
+from . import signatures as sig
+from .jit import kernel
+
+# Modos de cálculo da normal
+NORMAL_CENTRAL = 0  # Diferenças centrais (6 avaliações da cena)
+NORMAL_TETRAHEDRAL = 1  # Vértices de um tetraedro (4 avaliações da cena)
+NORMAL_ANALYTIC = 2  # Gradiente analítico do objeto mais próximo
+
+
+@kernel((sig.vector,))
+def norm(vector):
+    return np.sqrt(np.sum(vector**2))
+
+
+@kernel((sig.vector, sig.positions, sig.sizes, sig.colors, sig.object_types))
+def calculate_distance(
+    point, object_positions, object_sizes, object_colors, object_types
+):
+    """
+    Calcula a menor distância do ponto até os objetos na cena.
+
+    :param point: Posição atual (np.ndarray).
+    :param object_positions: Array de posições dos objetos.
+    :param object_sizes: Array de tamanhos/raios dos objetos.
+    :param object_colors: Array de cores dos objetos.
+    :param object_types: Array de tipos dos objetos (0=sphere, 1=cube).
+    :return: (distância mínima, cor do objeto mais próximo).
+    """
+    min_distance = float("inf")
+    color = np.zeros(3, dtype=object_colors.dtype)  # Cor de fundo
+
+    for i in range(len(object_positions)):
+        if object_types[i] == 0:  # Sphere
+            dist = norm(point - object_positions[i]) - object_sizes[i]
+        elif object_types[i] == 1:  # Cube
+            half_size = np.array([object_sizes[i] / 2] * 3)
+            delta = np.abs(point - object_positions[i]) - half_size
+            outside = np.sqrt(np.sum(np.maximum(delta, 0) ** 2))
+            inside = np.max(np.minimum(delta, 0))
+            dist = outside + inside
+        else:
+            continue
+
+        if dist < min_distance:
+            min_distance = dist
+            color = object_colors[i]
+
+    return min_distance, color
+
+
+@kernel((sig.vector, sig.positions, sig.sizes, sig.colors, sig.object_types, sig.bvh))
+def scene_distance(
+    point, object_positions, object_sizes, object_colors, object_types, bvh
+):
+    """
+    Como calculate_distance, mas usa a BVH quando esta tem nós.
+
+    :param bvh: Tuplo devolvido por BVH.arrays() (vazio = procura linear).
+    :return: (distância mínima, cor do objeto mais próximo).
+    """
+    if len(bvh[3]) == 0:
+        return calculate_distance(
+            point, object_positions, object_sizes, object_colors, object_types
+        )
+
+    min_distance, closest = bvh_distance(
+        point[0], point[1], point[2], object_positions, object_sizes, object_types, bvh
+    )
+    if closest < 0:
+        return min_distance, np.zeros(3, dtype=object_colors.dtype)
+    return min_distance, object_colors[closest]
+
+
+@kernel(
+    (
+        sig.vector,
+        sig.positions,
+        sig.sizes,
+        sig.object_types,
+        sig.colors,
+        sig.scalar,
+        sig.bvh,
+    )
+)
+def estimate_normal(
+    point, object_positions, object_sizes, object_types, object_colors, epsilon, bvh
+):
+    """
+    Estima a normal da superfície em um ponto.
+
+    :param point: Ponto na superfície (np.ndarray).
+    :param object_positions: Array de posições dos objetos.
+    :param object_sizes: Array de tamanhos/raios dos objetos.
+    :param object_types: Array de tipos dos objetos (0=sphere, 1=cube).
+    :param object_colors: Array de cores dos objetos.
+    :param epsilon: Delta pequeno para aproximação.
+    :param bvh: Tuplo devolvido por BVH.arrays() (vazio = procura linear).
+    :return: Vetor normal (np.ndarray).
+    """
+    dx = np.array([epsilon, 0, 0])
+    dy = np.array([0, epsilon, 0])
+    dz = np.array([0, 0, epsilon])
+
+    nx, _ = scene_distance(
+        point + dx,
+        object_positions,
+        object_sizes,
+        object_colors,
+        object_types,
+        bvh,
+    )
+    px, _ = scene_distance(
+        point - dx,
+        object_positions,
+        object_sizes,
+        object_colors,
+        object_types,
+        bvh,
+    )
+    ny, _ = scene_distance(
+        point + dy,
+        object_positions,
+        object_sizes,
+        object_colors,
+        object_types,
+        bvh,
+    )
+    py, _ = scene_distance(
+        point - dy,
+        object_positions,
+        object_sizes,
+        object_colors,
+        object_types,
+        bvh,
+    )
+    nz, _ = scene_distance(
+        point + dz,
+        object_positions,
+        object_sizes,
+        object_colors,
+        object_types,
+        bvh,
+    )
+    pz, _ = scene_distance(
+        point - dz,
+        object_positions,
+        object_sizes,
+        object_colors,
+        object_types,
+        bvh,
+    )
+
+    normal = np.array([nx - px, ny - py, nz - pz])
+    return normal / norm(normal)
+
+
+@kernel((sig.vector, sig.vector, sig.row, sig.vector, sig.vector, sig.vector))
+def calculate_lighting(
+    point, normal, color, light_position, light_color, ambient_light
+):
+    """
+    Calcula a iluminação de um ponto na superfície.
+
+    :param point: Ponto na superfície (np.ndarray).
+    :param normal: Normal da superfície (np.ndarray).
+    :param color: Cor do objeto (np.ndarray).
+    :param light_position: Posição da luz (np.ndarray).
+    :param light_color: Cor da luz (np.ndarray).
+    :param ambient_light: Intensidade da luz ambiente (np.ndarray).
+    :return: Cor iluminada (np.ndarray).
+    """
+    # Direção da luz
+    light_dir = light_position - point
+    light_dir /= norm(light_dir)
+
+    # Intensidade difusa
+    diffuse_intensity = max(0, np.dot(normal, light_dir))
+    diffuse = color * diffuse_intensity * light_color
+
+    # Luz ambiente
+    ambient = color * ambient_light
+
+    # Cor final
+    return diffuse + ambient
+
+
+@kernel(
+    (
+        sig.vector,
+        sig.vector,
+        sig.positions,
+        sig.sizes,
+        sig.colors,
+        sig.object_types,
+        sig.scalar,
+        sig.scalar,
+        sig.integer,
+        sig.vector,
+        sig.vector,
+        sig.vector,
+        sig.bvh,
+    )
+)
+def ray_march(
+    ray_origin,
+    ray_direction,
+    object_positions,
+    object_sizes,
+    object_colors,
+    object_types,
+    max_distance,
+    epsilon,
+    max_steps,
+    light_position,
+    light_color,
+    ambient_light,
+    bvh,
+):
+    """
+    Realiza o Ray Marching para encontrar interseções com objetos na cena, incluindo iluminação.
+
+    :param ray_origin: Origem do raio (np.ndarray).
+    :param ray_direction: Direção do raio (np.ndarray).
+    :param object_positions: Array de posições dos objetos.
+    :param object_sizes: Array de tamanhos/raios dos objetos.
+    :param object_colors: Array de cores dos objetos.
+    :param object_types: Array de tipos dos objetos (0=sphere, 1=cube).
+    :param max_distance: Distância máxima do raio.
+    :param epsilon: Tolerância para considerar uma interseção.
+    :param max_steps: Número máximo de passos.
+    :param light_position: Posição da luz (np.ndarray).
+    :param light_color: Cor da luz (np.ndarray).
+    :param ambient_light: Intensidade da luz ambiente (np.ndarray).
+    :param bvh: Tuplo devolvido por BVH.arrays() (vazio = procura linear).
+    :return: Cor iluminada ou cor de fundo.
+    """
+    distance_traveled = 0.0
+
+    for _ in range(max_steps):
+        current_position = ray_origin + ray_direction * distance_traveled
+        min_distance, color = scene_distance(
+            current_position,
+            object_positions,
+            object_sizes,
+            object_colors,
+            object_types,
+            bvh,
+        )
+
+        if min_distance < epsilon:
+            # Estimar a normal na superfície
+            normal = estimate_normal(
+                current_position,
+                object_positions,
+                object_sizes,
+                object_types,
+                object_colors,
+                epsilon,
+                bvh,
+            )
+            # Calcular iluminação
+            return calculate_lighting(
+                current_position,
+                normal,
+                color,
+                light_position,
+                light_color,
+                ambient_light,
+            )
+
+        distance_traveled += min_distance
+        if distance_traveled > max_distance:
+            break
+
+    return np.array([0.0, 0.0, 0.0])  # Cor de fundo
+
+
+# Versões por componentes (x, y, z como floats) dos kernels acima.
+# Não alocam arrays dentro do ciclo de marcha, por isso são as usadas por
+# render_frame; as versões com np.ndarray ficam para uso avulso.
+
+
+@kernel(
+    (
+        sig.scalar,
+        sig.scalar,
+        sig.scalar,
+        sig.positions,
+        sig.sizes,
+        sig.object_types,
+        sig.bvh,
+    )
+)
+def calculate_distance_xyz(
+    px, py, pz, object_positions, object_sizes, object_types, bvh
+):
+    """
+    Calcula a menor distância do ponto até os objetos na cena.
+
+    :param px, py, pz: Componentes da posição atual.
+    :param object_positions: Array de posições dos objetos.
+    :param object_sizes: Array de tamanhos/raios dos objetos.
+    :param object_types: Array de tipos dos objetos (0=sphere, 1=cube).
+    :param bvh: Tuplo devolvido por BVH.arrays() (vazio = procura linear).
+    :return: (distância mínima, índice do objeto mais próximo ou -1).
+    """
+    if len(bvh[3]) > 0:
+        return bvh_distance(
+            px, py, pz, object_positions, object_sizes, object_types, bvh
+        )
+
+    min_distance = np.inf
+    closest = -1
+    for i in range(len(object_positions)):
+        dist = object_distance(
+            px, py, pz, object_positions[i], object_sizes[i], object_types[i]
+        )
+        if dist < min_distance:
+            min_distance = dist
+            closest = i
+
+    return min_distance, closest
+
+
+@kernel(
+    (
+        sig.scalar,
+        sig.scalar,
+        sig.scalar,
+        sig.positions,
+        sig.sizes,
+        sig.object_types,
+        sig.scalar,
+        sig.bvh,
+    )
+)
+def estimate_normal_xyz(
+    px, py, pz, object_positions, object_sizes, object_types, epsilon, bvh
+):
+    """
+    Estima a normal da superfície em um ponto por diferenças centrais.
+
+    :param px, py, pz: Componentes do ponto na superfície.
+    :param epsilon: Delta pequeno para aproximação.
+    :return: (nx, ny, nz) normalizado.
+    """
+    d = object_positions, object_sizes, object_types, bvh
+    nx = (
+        calculate_distance_xyz(px + epsilon, py, pz, *d)[0]
+        - calculate_distance_xyz(px - epsilon, py, pz, *d)[0]
+    )
+    ny = (
+        calculate_distance_xyz(px, py + epsilon, pz, *d)[0]
+        - calculate_distance_xyz(px, py - epsilon, pz, *d)[0]
+    )
+    nz = (
+        calculate_distance_xyz(px, py, pz + epsilon, *d)[0]
+        - calculate_distance_xyz(px, py, pz - epsilon, *d)[0]
+    )
+
+    length = np.sqrt(nx * nx + ny * ny + nz * nz)
+    return nx / length, ny / length, nz / length
+
+
+@kernel(
+    (
+        sig.scalar,
+        sig.scalar,
+        sig.scalar,
+        sig.positions,
+        sig.sizes,
+        sig.object_types,
+        sig.scalar,
+        sig.bvh,
+    )
+)
+def estimate_normal_tetrahedral_xyz(
+    px, py, pz, object_positions, object_sizes, object_types, epsilon, bvh
+):
+    """
+    Estima a normal com 4 amostras nos vértices de um tetraedro.
+
+    :param px, py, pz: Componentes do ponto na superfície.
+    :param epsilon: Delta pequeno para aproximação.
+    :return: (nx, ny, nz) normalizado.
+    """
+    d = object_positions, object_sizes, object_types, bvh
+    a = calculate_distance_xyz(px + epsilon, py - epsilon, pz - epsilon, *d)[0]
+    b = calculate_distance_xyz(px - epsilon, py - epsilon, pz + epsilon, *d)[0]
+    c = calculate_distance_xyz(px - epsilon, py + epsilon, pz - epsilon, *d)[0]
+    e = calculate_distance_xyz(px + epsilon, py + epsilon, pz + epsilon, *d)[0]
+
+    nx = a - b - c + e
+    ny = -a - b + c + e
+    nz = -a + b - c + e
+
+    length = np.sqrt(nx * nx + ny * ny + nz * nz)
+    return nx / length, ny / length, nz / length
+
+
+@kernel((*(sig.scalar,) * 6, *(sig.size,) * 3, sig.vector, sig.vector, sig.vector))
+def calculate_lighting_xyz(
+    px, py, pz, nx, ny, nz, r, g, b, light_position, light_color, ambient_light
+):
+    """
+    Calcula a iluminação de um ponto na superfície.
+
+    :param px, py, pz: Componentes do ponto na superfície.
+    :param nx, ny, nz: Componentes da normal da superfície.
+    :param r, g, b: Cor do objeto.
+    :return: (r, g, b) iluminado.
+    """
+    # Direção da luz
+    lx = light_position[0] - px
+    ly = light_position[1] - py
+    lz = light_position[2] - pz
+    length = np.sqrt(lx * lx + ly * ly + lz * lz)
+
+    # Intensidade difusa
+    diffuse_intensity = max(0.0, (nx * lx + ny * ly + nz * lz) / length)
+
+    # Difusa + ambiente
+    return (
+        r * (diffuse_intensity * light_color[0] + ambient_light[0]),
+        g * (diffuse_intensity * light_color[1] + ambient_light[1]),
+        b * (diffuse_intensity * light_color[2] + ambient_light[2]),
+    )
+
+
+@kernel(
+    (
+        *(sig.scalar,) * 6,
+        sig.positions,
+        sig.sizes,
+        sig.colors,
+        sig.object_types,
+        sig.scalar,
+        sig.scalar,
+        sig.integer,
+        sig.vector,
+        sig.vector,
+        sig.vector,
+        sig.bvh,
+        sig.integer,
+        sig.scalar,
+        sig.scalar,
+    )
+)
+def ray_march_xyz(
+    ox,
+    oy,
+    oz,
+    dx,
+    dy,
+    dz,
+    object_positions,
+    object_sizes,
+    object_colors,
+    object_types,
+    max_distance,
+    epsilon,
+    max_steps,
+    light_position,
+    light_color,
+    ambient_light,
+    bvh,
+    normal_mode,
+    relaxation,
+    start,
+):
+    """
+    Realiza o Ray Marching de um raio sem alocar memória.
+
+    Com relaxation (ω) > 1 cada passo avança ω vezes a distância; se a esfera
+    de segurança do novo ponto não chega à do ponto anterior, o passo pode ter
+    saltado a superfície e o raio volta ao passo normal a partir do ponto
+    anterior (over-relaxation com recuo, como RayMarch nos shaders).
+
+    :param ox, oy, oz: Componentes da origem do raio.
+    :param dx, dy, dz: Componentes da direção do raio (normalizada).
+    :param normal_mode: NORMAL_CENTRAL, NORMAL_TETRAHEDRAL ou NORMAL_ANALYTIC.
+    :param relaxation: Fator ω dos passos (1 = sphere tracing normal).
+    :param start: Distância já livre de objetos (coarse depth; 0 = desde a origem).
+    :return: (r, g, b, passos) com a cor iluminada ou de fundo.
+    """
+    distance_traveled = start
+    previous_distance = 0.0
+    step_length = 0.0
+    steps = 0
+
+    for _ in range(max_steps):
+        steps += 1
+        px = ox + dx * distance_traveled
+        py = oy + dy * distance_traveled
+        pz = oz + dz * distance_traveled
+        min_distance, closest = calculate_distance_xyz(
+            px, py, pz, object_positions, object_sizes, object_types, bvh
+        )
+
+        if (
+            step_length > previous_distance
+            and min_distance + previous_distance < step_length
+        ):
+            # Esferas separadas: recua para o passo normal do ponto anterior
+            distance_traveled -= step_length - previous_distance
+            step_length = previous_distance
+            continue
+
+        if min_distance < epsilon:
+            if normal_mode == NORMAL_ANALYTIC:
+                nx, ny, nz = object_normal(
+                    px,
+                    py,
+                    pz,
+                    object_positions[closest],
+                    object_sizes[closest],
+                    object_types[closest],
+                )
+            elif normal_mode == NORMAL_TETRAHEDRAL:
+                nx, ny, nz = estimate_normal_tetrahedral_xyz(
+                    px,
+                    py,
+                    pz,
+                    object_positions,
+                    object_sizes,
+                    object_types,
+                    epsilon,
+                    bvh,
+                )
+            else:
+                nx, ny, nz = estimate_normal_xyz(
+                    px,
+                    py,
+                    pz,
+                    object_positions,
+                    object_sizes,
+                    object_types,
+                    epsilon,
+                    bvh,
+                )
+            r, g, b = calculate_lighting_xyz(
+                px,
+                py,
+                pz,
+                nx,
+                ny,
+                nz,
+                object_colors[closest, 0],
+                object_colors[closest, 1],
+                object_colors[closest, 2],
+                light_position,
+                light_color,
+                ambient_light,
+            )
+            return r, g, b, steps
+
+        step_length = min_distance * relaxation
+        previous_distance = min_distance
+        distance_traveled += step_length
+        if distance_traveled > max_distance:
+            break
+
+    return 0.0, 0.0, 0.0, steps  # Cor de fundo
+
+
+@kernel((*(sig.scalar,) * 5,))
+def camera_ray_xyz(x, y, inv_width, inv_height, aspect):
+    """
+    Direção normalizada do raio da câmera que passa no píxel (x, y).
+
+    :param x, y: Coordenadas do píxel (linha 0 = topo da imagem).
+    :param inv_width, inv_height: 2 / largura e 2 / altura do frame.
+    :param aspect: Largura / altura (mantém os píxeis quadrados).
+    :return: (dx, dy, dz).
+    """
+    uv_x = (x * inv_width - 1.0) * aspect
+    uv_y = 1.0 - y * inv_height
+    length = np.sqrt(uv_x * uv_x + uv_y * uv_y + 1.0)
+    return uv_x / length, uv_y / length, 1.0 / length
+
+
+@kernel(
+    (
+        *(sig.scalar,) * 7,
+        sig.positions,
+        sig.sizes,
+        sig.object_types,
+        sig.scalar,
+        sig.scalar,
+        sig.integer,
+        sig.bvh,
+    )
+)
+def cone_march_xyz(
+    ox,
+    oy,
+    oz,
+    dx,
+    dy,
+    dz,
+    spread,
+    object_positions,
+    object_sizes,
+    object_types,
+    max_distance,
+    epsilon,
+    max_steps,
+    bvh,
+):
+    """
+    Marcha um cone de raios com origem comum, sem alocar memória.
+
+    À distância t, os raios do cone estão a menos de spread * t do eixo e a
+    distância da cena é 1-Lipschitz, por isso avançar (d - spread * t) /
+    (1 + spread), com d a distância no eixo, não atravessa nenhum objeto em
+    nenhum dos raios.
+
+    :param ox, oy, oz: Componentes da origem dos raios.
+    :param dx, dy, dz: Componentes da direção do eixo (normalizada).
+    :param spread: Maior distância entre a direção do eixo e a de um raio do cone.
+    :return: (distância que todos os raios podem avançar, passos).
+    """
+    distance_traveled = 0.0
+    steps = 0
+
+    for _ in range(max_steps):
+        steps += 1
+        min_distance, _ = calculate_distance_xyz(
+            ox + dx * distance_traveled,
+            oy + dy * distance_traveled,
+            oz + dz * distance_traveled,
+            object_positions,
+            object_sizes,
+            object_types,
+            bvh,
+        )
+        step_length = (min_distance - spread * distance_traveled) / (1.0 + spread)
+        if step_length < epsilon:
+            break
+        distance_traveled += step_length
+        if distance_traveled > max_distance:
+            break
+
+    return min(distance_traveled, max_distance), steps
+
+
+@kernel(
+    (
+        sig.vector,
+        sig.positions,
+        sig.sizes,
+        sig.object_types,
+        sig.scalar,
+        sig.scalar,
+        sig.integer,
+        sig.bvh,
+        *(sig.integer,) * 5,
+        sig.depth,
+    )
+)
+def coarse_depth_tile(
+    camera_position,
+    object_positions,
+    object_sizes,
+    object_types,
+    max_distance,
+    epsilon,
+    max_steps,
+    bvh,
+    width,
+    height,
+    block,
+    by0,
+    by1,
+    depth,
+):
+    """
+    Calcula as linhas [by0, by1) do coarse depth buffer, num só núcleo.
+
+    Os parâmetros são os de coarse_depth; by0 e by1 são linhas de blocos.
+    Devolve o total de passos dos cones.
+    """
+    inv_width = 2.0 / width
+    inv_height = 2.0 / height
+    aspect = width / height
+    total_steps = 0
+
+    for by in range(by0, by1):
+        y0 = by * block
+        y1 = min(y0 + block, height) - 1
+        for bx in range(depth.shape[1]):
+            x0 = bx * block
+            x1 = min(x0 + block, width) - 1
+
+            # Eixo do cone: raio do centro do bloco
+            dx, dy, dz = camera_ray_xyz(
+                0.5 * (x0 + x1), 0.5 * (y0 + y1), inv_width, inv_height, aspect
+            )
+
+            # Maior afastamento entre o eixo e os raios dos cantos do bloco
+            spread = 0.0
+            for corner in range(4):
+                cx, cy, cz = camera_ray_xyz(
+                    x0 if corner % 2 == 0 else x1,
+                    y0 if corner < 2 else y1,
+                    inv_width,
+                    inv_height,
+                    aspect,
+                )
+                spread = max(
+                    spread,
+                    np.sqrt((cx - dx) ** 2 + (cy - dy) ** 2 + (cz - dz) ** 2),
+                )
+
+            depth[by, bx], steps = cone_march_xyz(
+                camera_position[0],
+                camera_position[1],
+                camera_position[2],
+                dx,
+                dy,
+                dz,
+                spread,
+                object_positions,
+                object_sizes,
+                object_types,
+                max_distance,
+                epsilon,
+                max_steps,
+                bvh,
+            )
+            total_steps += steps
+
+    return total_steps
+
+
+@kernel(
+    (
+        sig.vector,
+        sig.positions,
+        sig.sizes,
+        sig.object_types,
+        sig.scalar,
+        sig.scalar,
+        sig.integer,
+        sig.bvh,
+        *(sig.integer,) * 3,
+        sig.depth,
+    ),
+    parallel=True,
+)
+def coarse_depth(
+    camera_position,
+    object_positions,
+    object_sizes,
+    object_types,
+    max_distance,
+    epsilon,
+    max_steps,
+    bvh,
+    width,
+    height,
+    block,
+    depth,
+):
+    """
+    Prepass de cone marching: distância segura por bloco de píxeis.
+
+    Cada bloco de block x block píxeis do frame marcha um cone que contém os
+    raios dos seus píxeis; depth[by, bx] é a distância que todos esses raios
+    podem avançar sem atravessar um objeto, e render_frame começa a marchar
+    cada raio a essa distância em vez de na câmera.
+
+    :param camera_position: Posição da câmera (np.ndarray).
+    :param width, height: Tamanho do frame completo.
+    :param block: Lado dos blocos em píxeis.
+    :param depth: Buffer de saída (ceil(H / block), ceil(W / block)) float64.
+    :return: Total de passos dos cones.
+    """
+    total_steps = 0
+
+    for by in prange(depth.shape[0]):
+        total_steps += coarse_depth_tile(
+            camera_position,
+            object_positions,
+            object_sizes,
+            object_types,
+            max_distance,
+            epsilon,
+            max_steps,
+            bvh,
+            width,
+            height,
+            block,
+            by,
+            by + 1,
+            depth,
+        )
+
+    return total_steps
+
+
+@kernel(
+    (
+        sig.vector,
+        sig.positions,
+        sig.sizes,
+        sig.colors,
+        sig.object_types,
+        sig.scalar,
+        sig.scalar,
+        sig.integer,
+        sig.vector,
+        sig.vector,
+        sig.vector,
+        sig.bvh,
+        sig.integer,
+        sig.scalar,
+        sig.depth,
+        sig.integer,
+        *(sig.integer,) * 4,
+        sig.framebuffer,
+    )
+)
+def render_tile(
+    camera_position,
+    object_positions,
+    object_sizes,
+    object_colors,
+    object_types,
+    max_distance,
+    epsilon,
+    max_steps,
+    light_position,
+    light_color,
+    ambient_light,
+    bvh,
+    normal_mode,
+    relaxation,
+    depth,
+    block,
+    y0,
+    y1,
+    x0,
+    x1,
+    framebuffer,
+):
+    """
+    Renderiza o retângulo [y0, y1) x [x0, x1) de um frame, num só núcleo.
+
+    Os parâmetros são os de render_frame; y0, y1, x0 e x1 delimitam o tile
+    dentro do framebuffer completo (H, W, 3), que define a projeção.
+    Devolve o total de passos de marcha do tile.
+    """
+    height, width = framebuffer.shape[0], framebuffer.shape[1]
+    inv_width = 2.0 / width
+    inv_height = 2.0 / height
+    aspect = width / height  # Mantém os píxeis quadrados em frames não quadrados
+    total_steps = 0
+
+    for y in range(y0, y1):
+        for x in range(x0, x1):
+            dx, dy, dz = camera_ray_xyz(x, y, inv_width, inv_height, aspect)
+            start = depth[y // block, x // block] if block > 0 else 0.0
+
+            r, g, b, steps = ray_march_xyz(
+                camera_position[0],
+                camera_position[1],
+                camera_position[2],
+                dx,
+                dy,
+                dz,
+                object_positions,
+                object_sizes,
+                object_colors,
+                object_types,
+                max_distance,
+                epsilon,
+                max_steps,
+                light_position,
+                light_color,
+                ambient_light,
+                bvh,
+                normal_mode,
+                relaxation,
+                start,
+            )
+            framebuffer[y, x, 0] = r
+            framebuffer[y, x, 1] = g
+            framebuffer[y, x, 2] = b
+            total_steps += steps
+
+    return total_steps
+
+
+@kernel(
+    (
+        sig.vector,
+        sig.positions,
+        sig.sizes,
+        sig.colors,
+        sig.object_types,
+        sig.scalar,
+        sig.scalar,
+        sig.integer,
+        sig.vector,
+        sig.vector,
+        sig.vector,
+        sig.bvh,
+        sig.integer,
+        sig.scalar,
+        sig.depth,
+        sig.integer,
+        sig.framebuffer,
+    ),
+    parallel=True,
+)
+def render_frame(
+    camera_position,
+    object_positions,
+    object_sizes,
+    object_colors,
+    object_types,
+    max_distance,
+    epsilon,
+    max_steps,
+    light_position,
+    light_color,
+    ambient_light,
+    bvh,
+    normal_mode,
+    relaxation,
+    depth,
+    block,
+    framebuffer,
+):
+    """
+    Renderiza um frame completo, distribuindo as linhas pelos núcleos disponíveis.
+
+    :param camera_position: Posição da câmera (np.ndarray).
+    :param object_positions: Array de posições dos objetos.
+    :param object_sizes: Array de tamanhos/raios dos objetos.
+    :param object_colors: Array de cores dos objetos.
+    :param object_types: Array de tipos dos objetos (0=sphere, 1=cube).
+    :param max_distance: Distância máxima do raio.
+    :param epsilon: Tolerância para considerar uma interseção.
+    :param max_steps: Número máximo de passos.
+    :param light_position: Posição da luz (np.ndarray).
+    :param light_color: Cor da luz (np.ndarray).
+    :param ambient_light: Intensidade da luz ambiente (np.ndarray).
+    :param bvh: Tuplo devolvido por BVH.arrays() (vazio = procura linear).
+    :param normal_mode: NORMAL_CENTRAL, NORMAL_TETRAHEDRAL ou NORMAL_ANALYTIC.
+    :param relaxation: Fator ω da over-relaxation (1 = sphere tracing normal).
+    :param depth: Coarse depth buffer de coarse_depth (ignorado com block = 0).
+    :param block: Lado dos blocos do coarse depth buffer (0 = sem prepass).
+    :param framebuffer: Buffer de saída (H, W, 3) float32, linha 0 = topo da imagem.
+    :return: Total de passos de marcha do frame.
+    """
+    height, width = framebuffer.shape[0], framebuffer.shape[1]
+    total_steps = 0
+
+    for y in prange(height):
+        total_steps += render_tile(
+            camera_position,
+            object_positions,
+            object_sizes,
+            object_colors,
+            object_types,
+            max_distance,
+            epsilon,
+            max_steps,
+            light_position,
+            light_color,
+            ambient_light,
+            bvh,
+            normal_mode,
+            relaxation,
+            depth,
+            block,
+            y,
+            y + 1,
+            0,
+            width,
+            framebuffer,
+        )
+
+    return total_steps
@@ -0,0 +1,153 @@
+import time
+import numpy as np
+from dsf import Sphere, Cube, Scene
+from .bvh import BVH
+from .jit import jit_report
+from .kernels import NORMAL_ANALYTIC, coarse_depth, render_frame
+
+
+def default_scene() -> Scene:
+    """Cena de demonstração: uma esfera vermelha e um cubo verde."""
+    scene = Scene()
+    scene.add(
+        Sphere(
+            position=np.array([0.0, 0.0, 5.0]),
+            radius=1.0,
+            color=np.array([1.0, 0.0, 0.0]),
+        )
+    )
+    scene.add(
+        Cube(
+            position=np.array([3.0, 3.0, 5.0]),
+            size=1.0,
+            color=np.array([0.0, 1.0, 0.0]),
+        )
+    )
+    return scene
+
+
+class Renderer:
+    def __init__(self, scene: Scene = None):
+        """
+        Estado do ray marcher em CPU, sem janela nem contexto OpenGL.
+
+        scene: Cena a renderizar (por omissão, default_scene())
+        """
+        self.camera_position = np.array([0.0, 0.0, 0.0])
+        self.camera_direction = np.array([0.0, 0.0, 1.0])
+        self.light_position = np.array([5.0, 5.0, -5.0])
+        self.light_color = np.array([1.0, 1.0, 1.0])
+        self.ambient_light = np.array([0.2, 0.2, 0.2])
+        self.max_distance = 80.0
+        self.epsilon = 0.001
+        self.max_steps = 50
+
+        # Aceleração para cenas grandes (só usada a partir de bvh_min_objects)
+        self.use_bvh = True
+        self.bvh_min_objects = 64
+        self.bvh = BVH()
+        self.bvh_stale = True  # A cena mudou desde o último update da BVH
+        self.empty_bvh = BVH().arrays()
+
+        # A cena só tem esferas e cubos, por isso a normal analítica é exata
+        self.normal_mode = NORMAL_ANALYTIC
+
+        # Over-relaxation dos passos (ω; 1 = sphere tracing normal)
+        self.relaxation = 1.0
+        self.steps_per_pixel = 0.0  # Média de passos de marcha do último frame
+
+        # Prepass de cone marching: distância segura por bloco de
+        # coarse_block x coarse_block píxeis, onde os raios começam (0 = desligado)
+        self.coarse_block = 0
+        self.coarse_depth = np.zeros((0, 0))
+
+        # Objetos da cena
+        self.scene = scene if scene is not None else default_scene()
+
+    def scene_bvh(self):
+        """
+        Devolve o tuplo da BVH a usar no frame (vazio = procura linear).
+
+        Consome scene.dirty em todos os frames, mesmo sem BVH, para que quem o
+        lê antes desta chamada (TileFarm) saiba se a cena mudou desde o frame
+        anterior.
+        """
+        if self.scene.dirty:
+            self.bvh_stale = True
+            self.scene.dirty = False
+
+        if not self.use_bvh or len(self.scene) < self.bvh_min_objects:
+            return self.empty_bvh
+
+        if self.bvh_stale:
+            self.bvh.update(self.scene)
+            self.bvh_stale = False
+        return self.bvh.arrays()
+
+    def update_coarse_depth(self, height: int, width: int) -> int:
+        """Calcula o coarse depth buffer de um frame; devolve os passos gastos."""
+        block = self.coarse_block
+        if block == 0:
+            return 0
+
+        shape = (-(-height // block), -(-width // block))
+        if self.coarse_depth.shape != shape:
+            self.coarse_depth = np.zeros(shape)
+
+        object_positions, object_sizes, _, object_types = self.scene.arrays()
+        return coarse_depth(
+            self.camera_position,
+            object_positions,
+            object_sizes,
+            object_types,
+            self.max_distance,
+            self.epsilon,
+            self.max_steps,
+            self.scene_bvh(),
+            width,
+            height,
+            block,
+            self.coarse_depth,
+        )
+
+    def render_to(self, framebuffer):
+        """Renderiza a cena atual para um framebuffer (H, W, 3) float32."""
+        # Arrays da cena já preparados para a função JIT (sem cópias)
+        object_positions, object_sizes, object_colors, object_types = (
+            self.scene.arrays()
+        )
+
+        steps = self.update_coarse_depth(*framebuffer.shape[:2])
+        steps += render_frame(
+            self.camera_position,
+            object_positions,
+            object_sizes,
+            object_colors,
+            object_types,
+            self.max_distance,
+            self.epsilon,
+            self.max_steps,
+            self.light_position,
+            self.light_color,
+            self.ambient_light,
+            self.scene_bvh(),
+            self.normal_mode,
+            self.relaxation,
+            self.coarse_depth,
+            self.coarse_block,
+            framebuffer,
+        )
+        self.steps_per_pixel = steps / (framebuffer.shape[0] * framebuffer.shape[1])
+
+    def render_image(self, width: int, height: int) -> np.ndarray:
+        """Renderiza a cena para um novo array (height, width, 3) float32."""
+        framebuffer = np.zeros((height, width, 3), dtype=np.float32)
+        self.render_to(framebuffer)
+        return framebuffer
+
+    def warmup(self):
+        """Corre os kernels uma vez e mostra o relatório do JIT."""
+        start = time.perf_counter()
+        self.render_to(np.zeros((8, 8, 3), dtype=np.float32))
+        print(jit_report())
+        print(f"Warmup frame rendered in {time.perf_counter() - start:.2f} s")
@@ -0,0 +1,66 @@
+import math
+
+
+class ResolutionController:
+    def __init__(
+        self,
+        target_ms: float = 16.0,
+        min_scale: float = 0.25,
+        max_scale: float = 1.0,
+        hysteresis: float = 0.2,
+        smoothing: float = 0.25,
+        cooldown: int = 8,
+    ) -> None:
+        """
+        Ajusta a escala da resolução interna para manter o tempo de frame no alvo.
+
+        target_ms: Orçamento por frame em milissegundos
+        min_scale, max_scale: Limites da escala (1.0 = resolução completa)
+        hysteresis: Margem relativa à volta do alvo onde a escala não muda
+        smoothing: Peso de cada frame na média móvel exponencial do tempo
+        cooldown: Frames a esperar depois de uma mudança antes de voltar a mudar
+        """
+        self.target_ms = target_ms
+        self.min_scale = min_scale
+        self.max_scale = max_scale
+        self.hysteresis = hysteresis
+        self.smoothing = smoothing
+        self.cooldown = cooldown
+
+        self.scale = max_scale
+        self.frame_ms = None  # Média móvel do tempo de render
+        self._frames_to_wait = 0
+
+    def update(self, frame_ms: float) -> float:
+        """Regista o tempo do último frame e devolve a escala para o próximo."""
+        if self.frame_ms is None:
+            self.frame_ms = frame_ms
+        else:
+            self.frame_ms += self.smoothing * (frame_ms - self.frame_ms)
+
+        if self._frames_to_wait > 0:
+            self._frames_to_wait -= 1
+            return self.scale
+
+        # O custo é proporcional ao número de pixels, ou seja a escala ao quadrado
+        ratio = self.target_ms / max(self.frame_ms, 1e-6)
+        if ratio < 1.0 - self.hysteresis:
+            new_scale = self.scale * math.sqrt(ratio)
+        elif ratio > 1.0 + self.hysteresis:
+            # Sobe devagar para não ultrapassar o orçamento logo a seguir
+            new_scale = self.scale * min(math.sqrt(ratio), 1.1)
+        else:
+            return self.scale
+
+        new_scale = min(max(new_scale, self.min_scale), self.max_scale)
+        if new_scale != self.scale:
+            # Mede de novo à nova resolução antes de decidir outra vez
+            self.scale = new_scale
+            self.frame_ms = None
+            self._frames_to_wait = self.cooldown
+
+        return self.scale
+
+    def resolution(self, full_resolution: int) -> int:
+        """Resolução interna para a escala atual."""
+        return max(1, round(full_resolution * self.scale))
@@ -0,0 +1,75 @@
+import numpy as np
+from . import signatures as sig
+from .jit import kernel
+
+
+@kernel((sig.scalar, sig.scalar, sig.scalar, sig.row, sig.size, sig.object_type))
+def object_distance(px, py, pz, position, size, object_type):
+    """
+    Distância com sinal de um ponto a um único objeto.
+
+    :param px, py, pz: Componentes da posição atual.
+    :param position: Centro do objeto (np.ndarray).
+    :param size: Raio (esfera) ou aresta (cubo).
+    :param object_type: Tipo do objeto (0=sphere, 1=cube).
+    :return: Distância, ou inf para tipos desconhecidos.
+    """
+    if object_type == 0:  # Sphere
+        dx = px - position[0]
+        dy = py - position[1]
+        dz = pz - position[2]
+        return np.sqrt(dx * dx + dy * dy + dz * dz) - size
+    elif object_type == 1:  # Cube
+        half_size = size / 2
+        dx = abs(px - position[0]) - half_size
+        dy = abs(py - position[1]) - half_size
+        dz = abs(pz - position[2]) - half_size
+        ox = max(dx, 0.0)
+        oy = max(dy, 0.0)
+        oz = max(dz, 0.0)
+        outside = np.sqrt(ox * ox + oy * oy + oz * oz)
+        inside = min(max(dx, max(dy, dz)), 0.0)
+        return outside + inside
+    return np.inf
+
+
+@kernel((sig.scalar, sig.scalar, sig.scalar, sig.row, sig.size, sig.object_type))
+def object_normal(px, py, pz, position, size, object_type):
+    """
+    Gradiente analítico (normal) da distância a um único objeto.
+
+    :param px, py, pz: Componentes da posição atual.
+    :param position: Centro do objeto (np.ndarray).
+    :param size: Raio (esfera) ou aresta (cubo).
+    :param object_type: Tipo do objeto (0=sphere, 1=cube).
+    :return: (nx, ny, nz) normalizado.
+    """
+    dx = px - position[0]
+    dy = py - position[1]
+    dz = pz - position[2]
+
+    if object_type == 1:  # Cube
+        half_size = size / 2
+        qx = abs(dx) - half_size
+        qy = abs(dy) - half_size
+        qz = abs(dz) - half_size
+
+        if max(qx, max(qy, qz)) > 0.0:
+            # Fora do cubo: direção do ponto mais próximo da superfície
+            gx = max(qx, 0.0)
+            gy = max(qy, 0.0)
+            gz = max(qz, 0.0)
+        elif qx >= qy and qx >= qz:
+            # Dentro: a face mais próxima decide
+            gx, gy, gz = 1.0, 0.0, 0.0
+        elif qy >= qz:
+            gx, gy, gz = 0.0, 1.0, 0.0
+        else:
+            gx, gy, gz = 0.0, 0.0, 1.0
+
+        dx = np.copysign(gx, dx)
+        dy = np.copysign(gy, dy)
+        dz = np.copysign(gz, dz)
+
+    length = np.sqrt(dx * dx + dy * dy + dz * dz)
+    return dx / length, dy / length, dz / length
@@ -0,0 +1,23 @@
+from numba import types
+
+# Tipos usados nas assinaturas explícitas dos kernels (ver jit.kernel)
+scalar = types.float64
+integer = types.int64
+size = types.float32  # Um elemento de sizes/colors
+object_type = types.int8
+
+vector = types.float64[::1]  # Câmera, luz e pontos dos kernels com np.ndarray
+positions = types.float32[:, ::1]
+sizes = types.float32[::1]
+colors = types.float32[:, ::1]
+object_types = types.int8[::1]
+row = types.float32[::1]  # Uma linha de positions/colors ou uma caixa da BVH
+indices = types.int32[::1]
+bvh = types.Tuple((positions, positions, indices, indices, indices, indices))
+framebuffer = types.float32[:, :, ::1]
+depth = types.float64[:, ::1]  # Coarse depth buffer (um valor por bloco de píxeis)
+
+# Kernels dos fractais (cpu/fractals.py)
+points = types.float64[:, ::1]
+iteration_counts = types.int32[::1]
+distances = types.float64[::1]
@@ -1,2 +1,5 @@
 from .sphere import Sphere
 from .cube import Cube
+from .group import Group
+from .scene import Scene
+from .compiler import compile_scene, scene_hash, specialize_shader
@@ -0,0 +1,326 @@
+import hashlib
+import json
+import math
+import numpy as np
+
+# Operações de combinação (Shape.operation); None = união
+OPERATIONS = {
+    None: "union",
+    0: "union",
+    1: "blend",
+    2: "cut",
+    3: "mask",
+    "union": "union",
+    "blend": "blend",
+    "cut": "cut",
+    "mask": "mask",
+}
+
+# Linha do template substituída pelo código da cena
+SCENE_MARKER = "// @scene"
+
+# Distância devolvida por uma cena vazia
+EMPTY_DISTANCE = 1e10
+
+# Funções auxiliares do código gerado (prefixo scn para não colidir com o template).
+# Tanto a forma cor+distância como a forma gradiente+distância usam vec4(xyz, w).
+HELPERS = """\
+float scnBox(vec3 p, vec3 b, float r) {
+    vec3 q = abs(p) - b;
+    return length(max(q, 0.0)) + min(max(q.x, max(q.y, q.z)), 0.0) - r;
+}
+
+vec4 scnSphereGrad(vec3 d, float r) {
+    float l = length(d);
+    return vec4(d / l, l - r);
+}
+
+vec4 scnBoxGrad(vec3 p, vec3 b, float r) {
+    vec3 q = abs(p) - b;
+    float inside = max(q.x, max(q.y, q.z));
+    vec3 g;
+    if (inside > 0.0) {
+        g = normalize(max(q, 0.0));
+    } else if (q.x >= q.y && q.x >= q.z) {
+        g = vec3(1.0, 0.0, 0.0);
+    } else if (q.y >= q.z) {
+        g = vec3(0.0, 1.0, 0.0);
+    } else {
+        g = vec3(0.0, 0.0, 1.0);
+    }
+    return vec4(g * sign(p), length(max(q, 0.0)) + min(inside, 0.0) - r);
+}
+
+vec4 scnBlend(vec4 a, vec4 b, float k) {
+    float h = clamp(0.5 + 0.5 * (b.w - a.w) / k, 0.0, 1.0);
+    return vec4(mix(b.xyz, a.xyz, h), mix(b.w, a.w, h) - k * h * (1.0 - h));
+}
+"""
+
+
+def _operation(node) -> str:
+    try:
+        return OPERATIONS[node.operation]
+    except (KeyError, TypeError):
+        raise ValueError(f"Unsupported operation: {node.operation!r}") from None
+
+
+def _float(value) -> str:
+    """Literal GLSL de um escalar; strings são expressões GLSL usadas tal como estão."""
+    if isinstance(value, str):
+        return f"({value})"
+
+    value = float(value)
+    if not math.isfinite(value):
+        raise ValueError(f"Non-finite value in scene: {value}")
+    text = repr(value)
+    return text if ("." in text or "e" in text) else text + ".0"
+
+
+def _vec3(value) -> str:
+    if isinstance(value, str):
+        return f"({value})"
+
+    values = np.ravel(np.asarray(value, dtype=object))
+    if values.size == 1:
+        values = np.repeat(values, 3)
+    if values.size != 3:
+        raise ValueError(f"Expected a 3-component value, got {value!r}")
+    return f"vec3({', '.join(_float(v) for v in values)})"
+
+
+def _half(size) -> str:
+    """Meias dimensões de um cubo de lado size (escalar, vetor ou expressão)."""
+    if isinstance(size, str):
+        return f"vec3({size}) * 0.5"
+
+    values = np.ravel(np.asarray(size, dtype=object))
+    if any(isinstance(v, str) for v in values):
+        return f"{_vec3(size)} * 0.5"
+    return _vec3(np.asarray(values, dtype=np.float64) * 0.5)
+
+
+def _describe(node):
+    """Descrição canónica (JSON) de um nó, usada no hash da cena."""
+
+    def plain(value):
+        if isinstance(value, str) or value is None:
+            return value
+        return np.asarray(value, dtype=np.float64).round(9).tolist()
+
+    description = {
+        "shape": node.shapeId,
+        "operation": _operation(node),
+        "blendStrength": plain(node.blendStrength),
+    }
+    if node.shapeId == "group":
+        description["children"] = [_describe(child) for child in node.children]
+        return description
+
+    description["position"] = plain(node.position)
+    description["color"] = plain(node.color)
+    if node.shapeId == "sphere":
+        description["radius"] = plain(node.radius)
+    elif node.shapeId == "cube":
+        description["size"] = plain(node.size)
+        description["roundness"] = plain(getattr(node, "roundness", 0.0))
+    else:
+        raise ValueError(f"Unsupported shape: {node.shapeId}")
+    return description
+
+
+def scene_hash(nodes) -> str:
+    """Hash estável da árvore de cena (igual para cenas com o mesmo código GLSL)."""
+    text = json.dumps([_describe(node) for node in nodes], sort_keys=True)
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+class _Emitter:
+    def __init__(self, gradient: bool) -> None:
+        self.gradient = gradient
+        self.lines = []
+        self.count = 0
+
+    def assign(self, expression: str) -> str:
+        name = f"v{self.count}"
+        self.count += 1
+        self.lines.append(f"    vec4 {name} = {expression};")
+        return name
+
+    def nodes(self, nodes) -> str:
+        result = None
+        for node in nodes:
+            value = self.node(node)
+            result = value if result is None else self.combine(node, result, value)
+        return result
+
+    def node(self, node) -> str:
+        if node.shapeId == "group":
+            if not node.children:
+                raise ValueError("Empty group in scene")
+            return self.nodes(node.children)
+
+        offset = f"p - {_vec3(node.position)}"
+        if node.shapeId == "sphere":
+            radius = _float(node.radius)
+            if self.gradient:
+                return self.assign(f"scnSphereGrad({offset}, {radius})")
+            return self.assign(
+                f"vec4({_vec3(node.color)}, length({offset}) - {radius})"
+            )
+
+        if node.shapeId == "cube":
+            half = _half(node.size)
+            roundness = _float(getattr(node, "roundness", 0.0))
+            if self.gradient:
+                return self.assign(f"scnBoxGrad({offset}, {half}, {roundness})")
+            return self.assign(
+                f"vec4({_vec3(node.color)}, scnBox({offset}, {half}, {roundness}))"
+            )
+
+        raise ValueError(f"Unsupported shape: {node.shapeId}")
+
+    def combine(self, node, a: str, b: str) -> str:
+        """Combina o acumulado a com o nó b (a cor do acumulado manda em cut/mask)."""
+        operation = _operation(node)
+        strength = node.blendStrength
+        if operation == "blend" and not isinstance(strength, str) and strength <= 0:
+            operation = "union"  # Blend com força 0 é uma união (sem divisão por 0)
+
+        if operation == "union":
+            return self.assign(f"{b}.w < {a}.w ? {b} : {a}")
+        if operation == "blend":
+            return self.assign(f"scnBlend({b}, {a}, {_float(strength)})")
+        if operation == "cut":
+            if self.gradient:
+                return self.assign(f"{a}.w > -{b}.w ? {a} : -{b}")
+            return self.assign(f"vec4({a}.xyz, max({a}.w, -{b}.w))")
+        # mask
+        if self.gradient:
+            return self.assign(f"{a}.w > {b}.w ? {a} : {b}")
+        return self.assign(f"vec4({a}.xyz, max({a}.w, {b}.w))")
+
+
+def _function(signature: str, nodes, gradient: bool) -> str:
+    emitter = _Emitter(gradient)
+    result = emitter.nodes(nodes)
+    if result is None:
+        result = emitter.assign(f"vec4(0.0, 0.0, 0.0, {_float(EMPTY_DISTANCE)})")
+    body = "\n".join(emitter.lines)
+    return f"{signature} {{\n{body}\n    return {result};\n}}\n"
+
+
+def compile_scene(nodes) -> str:
+    """
+    Gera GLSL sem ciclos para a cena dada.
+
+    Define vec4 sceneDistColor(vec3 p) (xyz = cor, w = distância) e
+    vec4 sceneDistGrad(vec3 p) (xyz = gradiente, w = distância), com as
+    posições, tamanhos, cores e forças de blend como constantes. Valores dados
+    como string são expressões GLSL (por exemplo um uniform como
+    "u_blend_strength") e são copiados tal como estão.
+
+    :param nodes: Lista de formas/grupos (dsf.Sphere, dsf.Cube, dsf.Group),
+                  combinados por ordem com operation e blendStrength de cada um.
+    """
+    nodes = list(nodes)
+    return "\n".join(
+        [
+            f"// Cena gerada por dsf.compiler ({scene_hash(nodes)[:12]})",
+            HELPERS,
+            _function("vec4 sceneDistColor(vec3 p)", nodes, gradient=False),
+            _function("vec4 sceneDistGrad(vec3 p)", nodes, gradient=True),
+        ]
+    )
+
+
+def specialize_shader(source: str, nodes) -> str:
+    """
+    Insere a cena compilada num template de fragment shader.
+
+    O template tem de ter uma linha "// @scene" (substituída pelo código da
+    cena) e recebe #define SCENE_SPECIALIZED logo a seguir a #version, para
+    poder desligar a sua versão genérica da cena com #ifndef.
+    """
+    lines = source.splitlines()
+    if SCENE_MARKER not in (line.strip() for line in lines):
+        raise ValueError(f"Shader template has no '{SCENE_MARKER}' line")
+
+    output = []
+    for line in lines:
+        if line.strip() == SCENE_MARKER:
+            output.append(compile_scene(nodes))
+        else:
+            output.append(line)
+        if line.startswith("#version"):
+            output.append("#define SCENE_SPECIALIZED")
+    return "\n".join(output) + "\n"
+
+
+def scene_dist_color(nodes, points, uniforms=None):
+    """
+    Referência em NumPy de sceneDistColor, para validar o código gerado.
+
+    :param nodes: Mesma lista de nós passada a compile_scene.
+    :param points: Array (N, 3) de pontos.
+    :param uniforms: Valores das expressões string usadas na cena (nome -> valor).
+    :return: (distâncias (N,), cores (N, 3))
+    """
+    points = np.asarray(points, dtype=np.float64)
+    uniforms = uniforms or {}
+
+    def value(v):
+        if isinstance(v, str):
+            if v not in uniforms:
+                raise ValueError(f"No value for scene expression {v!r}")
+            return np.asarray(uniforms[v], dtype=np.float64)
+        return np.asarray(v, dtype=np.float64)
+
+    def primitive(node):
+        offset = points - value(node.position)
+        color = np.broadcast_to(value(node.color), points.shape)
+        if node.shapeId == "sphere":
+            return np.linalg.norm(offset, axis=1) - value(node.radius), color
+        if node.shapeId == "cube":
+            q = np.abs(offset) - value(node.size) * 0.5
+            outside = np.linalg.norm(np.maximum(q, 0.0), axis=1)
+            inside = np.minimum(q.max(axis=1), 0.0)
+            return outside + inside - value(getattr(node, "roundness", 0.0)), color
+        raise ValueError(f"Unsupported shape: {node.shapeId}")
+
+    def evaluate(nodes):
+        result = None
+        for node in nodes:
+            if node.shapeId == "group":
+                d, c = evaluate(node.children)
+            else:
+                d, c = primitive(node)
+            if result is None:
+                result = (d, c)
+                continue
+
+            da, ca = result
+            operation = _operation(node)
+            strength = value(node.blendStrength)
+            if operation == "blend" and not isinstance(node.blendStrength, str):
+                operation = "blend" if node.blendStrength > 0 else "union"
+
+            if operation == "union":
+                closer = d < da
+                result = (np.where(closer, d, da), np.where(closer[:, None], c, ca))
+            elif operation == "blend":
+                h = np.clip(0.5 + 0.5 * (da - d) / strength, 0.0, 1.0)
+                result = (
+                    da + (d - da) * h - strength * h * (1.0 - h),
+                    ca + (c - ca) * h[:, None],
+                )
+            elif operation == "cut":
+                result = (np.maximum(da, -d), ca)
+            else:
+                result = (np.maximum(da, d), ca)
+        return result
+
+    result = evaluate(list(nodes))
+    if result is None:
+        return np.full(len(points), EMPTY_DISTANCE), np.zeros((len(points), 3))
+    return result[0], np.array(result[1])
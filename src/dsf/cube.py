@@ -10,6 +10,7 @@ class Cube(Shape):
         blendStrength=0,
         position=None,
         size=None,
+        roundness=0.0,
     ):
         super().__init__(
             shapeId="cube",
@@ -19,3 +20,4 @@ class Cube(Shape):
             position=position,
         )
         self.size = size
+        self.roundness = roundness  # Raio das arestas (caixa arredondada)
@@ -0,0 +1,19 @@
+from .shape import Shape
+
+
+class Group(Shape):
+    def __init__(self, children=None, operation=None, blendStrength=0):
+        """
+        Nó da árvore de cena: combina os filhos pela ordem dada e o resultado
+        é combinado com o resto da cena através de operation/blendStrength.
+
+        children: Lista de formas (ou grupos) filhas
+        """
+        super().__init__(
+            shapeId="group",
+            operation=operation,
+            color=None,
+            blendStrength=blendStrength,
+            position=None,
+        )
+        self.children = list(children or [])
@@ -0,0 +1,145 @@
+import json
+import numpy as np
+from .sphere import Sphere
+from .cube import Cube
+
+# Códigos de tipo usados pelos kernels do ray marcher
+SHAPE_TYPES = {"sphere": 0, "cube": 1}
+
+
+class Scene:
+    def __init__(self, capacity: int = 64) -> None:
+        """
+        Cena em estrutura-de-arrays, pronta a ser enviada para os kernels.
+
+        capacity: Número de objetos pré-alocados (cresce automaticamente)
+        """
+        self.objects = []
+        self.count = 0
+        self.dirty = True
+
+        self.positions = np.zeros((capacity, 3), dtype=np.float32)
+        self.sizes = np.zeros(capacity, dtype=np.float32)
+        self.colors = np.zeros((capacity, 3), dtype=np.float32)
+        self.types = np.zeros(capacity, dtype=np.int8)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Scene":
+        """
+        Cria uma cena a partir de um dicionário no formato:
+
+        {"objects": [{"type": "sphere", "position": [x, y, z], "radius": r,
+                      "color": [r, g, b]},
+                     {"type": "cube", "position": [x, y, z], "size": s,
+                      "color": [r, g, b]}]}
+        """
+        objects = data.get("objects", [])
+        scene = cls(capacity=max(1, len(objects)))
+        for index, entry in enumerate(objects):
+            shape_type = entry.get("type")
+            position = np.array(entry["position"], dtype=np.float64)
+            color = np.array(entry.get("color", [1.0, 0.0, 0.0]), dtype=np.float64)
+
+            if shape_type == "sphere":
+                shape = Sphere(position=position, radius=entry["radius"], color=color)
+            elif shape_type == "cube":
+                shape = Cube(position=position, size=entry["size"], color=color)
+            else:
+                raise ValueError(f"Unsupported shape in object {index}: {shape_type}")
+            scene.add(shape)
+        return scene
+
+    @classmethod
+    def load(cls, path: str) -> "Scene":
+        """Lê uma cena de um ficheiro JSON (ver from_dict)."""
+        with open(path, "r", encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
+
+    def __len__(self) -> int:
+        return self.count
+
+    def add(self, shape) -> int:
+        """Adiciona uma forma à cena e devolve o seu índice."""
+        if self.count == len(self.sizes):
+            self._grow(max(1, 2 * self.count))
+
+        index = self.count
+        self.objects.append(shape)
+        self.count += 1
+        self._write(index, shape)
+        return index
+
+    def remove(self, index: int) -> None:
+        """
+        Remove a forma no índice dado.
+
+        A última forma passa a ocupar o lugar da removida, por isso o índice
+        dessa forma muda.
+        """
+        last = self.count - 1
+        if index < 0 or index > last:
+            raise IndexError(f"Scene index out of range: {index}")
+
+        if index != last:
+            self.objects[index] = self.objects[last]
+            self.positions[index] = self.positions[last]
+            self.sizes[index] = self.sizes[last]
+            self.colors[index] = self.colors[last]
+            self.types[index] = self.types[last]
+
+        self.objects.pop()
+        self.count -= 1
+        self.dirty = True
+
+    def update(self, index: int, shape=None) -> None:
+        """
+        Atualiza a forma no índice dado.
+
+        Se shape não for passado, volta a ler os atributos da forma existente
+        (útil depois de alterar position/color/radius/size diretamente).
+        """
+        if index < 0 or index >= self.count:
+            raise IndexError(f"Scene index out of range: {index}")
+
+        if shape is not None:
+            self.objects[index] = shape
+        self._write(index, self.objects[index])
+
+    def clear(self) -> None:
+        self.objects = []
+        self.count = 0
+        self.dirty = True
+
+    def arrays(self):
+        """Devolve (positions, sizes, colors, types) sem cópias."""
+        n = self.count
+        return self.positions[:n], self.sizes[:n], self.colors[:n], self.types[:n]
+
+    def _write(self, index: int, shape) -> None:
+        if shape.shapeId not in SHAPE_TYPES:
+            raise ValueError(f"Unsupported shape: {shape.shapeId}")
+
+        self.positions[index] = shape.position
+        self.sizes[index] = shape.radius if shape.shapeId == "sphere" else shape.size
+        self.colors[index] = shape.color
+        self.types[index] = SHAPE_TYPES[shape.shapeId]
+        self.dirty = True
+
+    def _grow(self, capacity: int) -> None:
+        n = self.count
+        positions = np.zeros((capacity, 3), dtype=np.float32)
+        sizes = np.zeros(capacity, dtype=np.float32)
+        colors = np.zeros((capacity, 3), dtype=np.float32)
+        types = np.zeros(capacity, dtype=np.int8)
+
+        positions[:n] = self.positions[:n]
+        sizes[:n] = self.sizes[:n]
+        colors[:n] = self.colors[:n]
+        types[:n] = self.types[:n]
+
+        self.positions, self.sizes, self.colors, self.types = (
+            positions,
+            sizes,
+            colors,
+            types,
+        )
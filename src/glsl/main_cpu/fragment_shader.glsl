@@ -0,0 +1,15 @@
+#version 330
+
+precision highp float;
+
+uniform vec2 u_resolution;   // Tamanho da janela
+uniform sampler2D u_frame;   // Frame renderizado no CPU (linha 0 = topo)
+
+out vec4 fragColor;
+
+void main() {
+    vec2 uv = gl_FragCoord.xy / u_resolution;
+
+    // O framebuffer do CPU está de cima para baixo, o OpenGL de baixo para cima
+    fragColor = vec4(texture(u_frame, vec2(uv.x, 1.0 - uv.y)).rgb, 1.0);
+}
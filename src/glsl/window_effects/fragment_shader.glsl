@@ -14,6 +14,12 @@ uniform vec3 u_move_cube_coord;
 uniform ivec3 u_move_cube_func;
 uniform int u_reflection_steps;        // Número máximo de reflexos (default: 2)
 uniform float u_reflection_intensity; // Intensidade dos reflexos (default: 0.5)
+uniform int u_normal_mode;             // Modo de cálculo da normal (ver calculateNormal)
+uniform float u_relaxation;            // ω do sphere tracing (1 = sem over-relaxation)
+uniform int u_output_steps;            // 1 = escreve os passos de RayMarch em vez da cor
+uniform int u_cone_pass;               // 1 = prepass de cone marching (ver ConeMarch)
+uniform int u_cone_scale;              // Lado em píxeis dos blocos do prepass (0 = sem prepass)
+uniform sampler2D u_cone_depth;        // Prepass: distância segura (r) e passos (g) por bloco
 
 #define M_PI 3.14159265358979
 #define MAX_STEPS 100
@@ -36,6 +42,29 @@ float roundedBoxSDF(vec3 p, vec3 b, float r) {
     return length(max(q, 0.0)) + min(max(q.x, max(q.y, q.z)), 0.0) - r;
 }
 
+// Versões com gradiente analítico: xyz = gradiente, w = distância
+vec4 sphereSDFGrad(vec3 p, vec3 center, float radius) {
+    vec3 d = p - center;
+    float l = length(d);
+    return vec4(d / l, l - radius);
+}
+
+vec4 roundedBoxSDFGrad(vec3 p, vec3 b, float r) {
+    vec3 q = abs(p) - b;
+    float inside = max(q.x, max(q.y, q.z));
+    vec3 g;
+    if (inside > 0.0) {
+        g = normalize(max(q, 0.0));
+    } else if (q.x >= q.y && q.x >= q.z) {
+        g = vec3(1.0, 0.0, 0.0);
+    } else if (q.y >= q.z) {
+        g = vec3(0.0, 1.0, 0.0);
+    } else {
+        g = vec3(0.0, 0.0, 1.0);
+    }
+    return vec4(g * sign(p), length(max(q, 0.0)) + min(inside, 0.0) - r);
+}
+
 // Função de blend suave de distâncias e cores
 vec4 Blend(float a, float b, vec3 colA, vec3 colB, float k) {
     float h = clamp(0.5 + 0.5 * (b - a) / k, 0.0, 1.0);
@@ -44,6 +73,12 @@ vec4 Blend(float a, float b, vec3 colA, vec3 colB, float k) {
     return vec4(blendCol, blendDst);
 }
 
+// Blend suave de gradiente (xyz) e distância (w); a derivada do blend é h
+vec4 BlendGrad(vec4 a, vec4 b, float k) {
+    float h = clamp(0.5 + 0.5 * (b.w - a.w) / k, 0.0, 1.0);
+    return vec4(mix(b.xyz, a.xyz, h), mix(b.w, a.w, h) - k * h * (1.0 - h));
+}
+
 // Cena: retorna cor e distância
 vec4 sceneDistColor(vec3 p) {
     // Primitivas:
@@ -100,8 +135,53 @@ float sceneSDF(vec3 p) {
     return sceneDistColor(p).w;
 }
 
+// Mesma cena que sceneDistColor, com gradiente analítico em vez de cor
+vec4 sceneDistGrad(vec3 p) {
+    vec4 sphere1 = sphereSDFGrad(p, vec3(sin(u_time) * 2.0, 1.0, 6.0), 1.0);
+    vec4 sphere2 = sphereSDFGrad(p, vec3(-2.0, 1.0, 8.0), 1.0);
+    vec4 sphere3 = sphereSDFGrad(p, vec3(cos(u_time) * 10.0, 6.0, 6.0), 1.0);
+    vec4 cube1 = roundedBoxSDFGrad(p - vec3(2.0, 1.0, 6.0), vec3(1.0), 0.2);
+    vec4 cube2 = roundedBoxSDFGrad(p - vec3(-2.0, -3.0, 6.0), vec3(1.0), 0.2);
+
+    float func_x = u_move_cube_func[0] == 1 ? cos(u_time) : sin(u_time);
+    float func_y = u_move_cube_func[1] == 1 ? cos(u_time) : sin(u_time);
+    float func_z = u_move_cube_func[2] == 1 ? cos(u_time) : sin(u_time);
+
+    vec4 cube3 = roundedBoxSDFGrad(
+        p - vec3(
+            func_x * u_move_cube_coord[0],
+            func_y * u_move_cube_coord[1],
+            func_z * u_move_cube_coord[2] - 2.0
+        ),
+        vec3(1.0),
+        0.2
+    );
+
+    vec4 blend1 = BlendGrad(sphere1, cube1, u_blend_strength);
+    vec4 blend2 = BlendGrad(sphere2, blend1, u_blend_strength);
+    vec4 blend3 = BlendGrad(cube2, blend2, u_blend_strength);
+    vec4 blend4 = BlendGrad(sphere3, blend3, u_blend_strength);
+    return BlendGrad(cube3, blend4, u_blend_strength);
+}
+
 // Cálculo da normal no ponto p
+// u_normal_mode: 0 = diferenças centrais (6 amostras), 1 = tetraédrico (4 amostras),
+// 2 = gradiente analítico (1 avaliação da cena)
 vec3 calculateNormal(vec3 p) {
+    if (u_normal_mode == 2) {
+        return normalize(sceneDistGrad(p).xyz);
+    }
+    if (u_normal_mode == 1) {
+        // Amostras nos vértices de um tetraedro
+        const vec2 k = vec2(1.0, -1.0);
+        const float h = 0.001;
+        return normalize(
+            k.xyy * sceneSDF(p + k.xyy * h) +
+            k.yyx * sceneSDF(p + k.yyx * h) +
+            k.yxy * sceneSDF(p + k.yxy * h) +
+            k.xxx * sceneSDF(p + k.xxx * h)
+        );
+    }
     const vec2 e = vec2(0.001, 0.0);
     return normalize(vec3(
         sceneSDF(p + e.xyy) - sceneSDF(p - e.xyy),
@@ -110,14 +190,35 @@ vec3 calculateNormal(vec3 p) {
     ));
 }
 
-// Raymarch simples
-float RayMarch(vec3 ro, vec3 rd) {
-    float d0 = 0.0;
+// Passos de RayMarch deste píxel (escritos em vez da cor com u_output_steps)
+int g_marchSteps = 0;
+
+// Sphere tracing com over-relaxation opcional (u_relaxation = ω, 1 = passo normal).
+// Com ω > 1 avança ω * d; se a esfera de segurança do novo ponto não chega à do
+// ponto anterior, o passo pode ter saltado a superfície: volta para o passo
+// normal (d) a partir do ponto anterior, que é sempre seguro.
+// start: distância já percorrida sem superfícies (do prepass; 0 = desde ro)
+float RayMarch(vec3 ro, vec3 rd, float start) {
+    float d0 = start;
+    float previousDist = 0.0;
+    float stepLength = 0.0;
     for (int i = 0; i < MAX_STEPS; i++) {
+        g_marchSteps++;
         vec3 p = ro + rd * d0;
         float d1 = sceneSDF(p);
-        d0 += d1;
-        if (d1 < MIN_DIST || d0 > MAX_DIST) break;
+        if (stepLength > previousDist && d1 + previousDist < stepLength) {
+            d0 -= stepLength - previousDist;
+            stepLength = previousDist;
+            continue;
+        }
+        if (d1 < MIN_DIST) {
+            d0 += d1;
+            break;
+        }
+        stepLength = d1 * u_relaxation;
+        previousDist = d1;
+        d0 += stepLength;
+        if (d0 > MAX_DIST) break;
     }
     return d0;
 }
@@ -151,6 +252,35 @@ Ray CreateCameraRay(vec2 uv) {
     return r;
 }
 
+// Prepass de cone marching: um cone por bloco de píxeis, com o raio do centro
+// do bloco como eixo. À distância t da câmera, os raios do bloco estão a menos
+// de spread * t do eixo e o SDF é 1-Lipschitz, por isso avançar
+// (d - spread * t) / (1 + spread), com d o SDF no eixo, não atravessa nenhuma
+// superfície em nenhum raio do bloco.
+// Devolve a distância segura (x) e os passos do cone (y).
+vec2 ConeMarch(vec2 blockCenter, float blockSize) {
+    Ray ray = CreateCameraRay((blockCenter - 0.5 * u_resolution.xy) / u_resolution.y);
+
+    // Maior afastamento entre a direção do eixo e as dos cantos do bloco
+    float spread = 0.0;
+    for (int i = 0; i < 4; i++) {
+        vec2 corner = blockCenter + 0.5 * blockSize * vec2(i % 2 * 2 - 1, i / 2 * 2 - 1);
+        vec3 rd = CreateCameraRay((corner - 0.5 * u_resolution.xy) / u_resolution.y).direction;
+        spread = max(spread, length(rd - ray.direction));
+    }
+
+    float t = 0.0;
+    int steps = 0;
+    for (int i = 0; i < MAX_STEPS; i++) {
+        steps++;
+        float h = (sceneSDF(ray.origin + ray.direction * t) - spread * t) / (1.0 + spread);
+        if (h < MIN_DIST) break;
+        t += h;
+        if (t > MAX_DIST) break;
+    }
+    return vec2(min(t, MAX_DIST), float(steps));
+}
+
 // Cálculo de sombras simplificado
 float CalculateShadow(vec3 p, vec3 lightDir) {
     float rayDst = 0.0;
@@ -182,7 +312,7 @@ vec3 calculateReflection(vec3 origin, vec3 direction, int maxSteps) {
     float reflectivity = 1.0;       // Intensidade inicial do reflexo
 
     for (int i = 0; i < maxSteps; i++) {
-        float d = RayMarch(origin, direction);
+        float d = RayMarch(origin, direction, 0.0);
 
         if (d >= MAX_DIST) {
             // Se o raio não intersecta nada, retorna a cor de fundo
@@ -225,10 +355,26 @@ vec3 calculateReflection(vec3 origin, vec3 direction, int maxSteps) {
 }
 
 void main() {
+    if (u_cone_pass == 1) {
+        // Cada fragmento do prepass é um bloco de u_cone_scale x u_cone_scale píxeis
+        float scale = float(u_cone_scale);
+        fragColor = vec4(ConeMarch(gl_FragCoord.xy * scale, scale), 0.0, 1.0);
+        return;
+    }
+
     vec2 uv = (gl_FragCoord.xy - 0.5 * u_resolution.xy) / u_resolution.y;
     Ray ray = CreateCameraRay(uv);
 
-    float d = RayMarch(ray.origin, ray.direction);
+    // Com o prepass, o raio começa na distância segura do seu bloco
+    float coneStart = 0.0;
+    float coneSteps = 0.0;  // Passos do cone divididos pelos píxeis do bloco
+    if (u_cone_scale > 0) {
+        vec2 cone = texelFetch(u_cone_depth, ivec2(gl_FragCoord.xy) / u_cone_scale, 0).xy;
+        coneStart = cone.x;
+        coneSteps = cone.y / float(u_cone_scale * u_cone_scale);
+    }
+
+    float d = RayMarch(ray.origin, ray.direction, coneStart);
     vec3 color = background_color;
 
     if (d < MAX_DIST) {
@@ -254,4 +400,7 @@ void main() {
     }
 
     fragColor = vec4(color, 1.0);
+    if (u_output_steps == 1) {
+        fragColor = vec4(float(g_marchSteps) + coneSteps, 0.0, 0.0, 1.0);
+    }
 }
\ No newline at end of file
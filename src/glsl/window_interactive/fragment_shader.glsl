@@ -7,9 +7,16 @@ uniform vec3 u_camera_position;
 uniform vec2 u_camera_rotation;
 uniform float u_time;
 uniform float u_blend_strength;
+uniform int u_normal_mode;       // Modo de cálculo da normal (ver calculateNormal)
+uniform float u_relaxation;      // ω do sphere tracing (1 = sem over-relaxation)
+uniform int u_output_steps;      // 1 = escreve os passos de RayMarch em vez da cor
 
+// Capacidade do uniform block; a janela define-a a partir do tamanho da cena
+#ifndef MAX_PRIMITIVES
 #define MAX_PRIMITIVES 32
+#endif
 
+// Layout std140 (48 bytes): type @0, position @16, scale @32, radius @44
 struct Primitive {
     int type;           // 0 = esfera, 1 = cubo arredondado
     vec3 position;      // Posição
@@ -17,8 +24,11 @@ struct Primitive {
     float radius;       // Raio (para esferas ou borda arredondada de cubos)
 };
 
-uniform Primitive u_primitives[MAX_PRIMITIVES];
-uniform int u_primitive_count;
+// Preenchido a partir de PRIMITIVES_BLOCK_DTYPE (lib/window_interactive.py)
+layout(std140) uniform Primitives {
+    int u_primitive_count;                  // @0
+    Primitive u_primitives[MAX_PRIMITIVES]; // @16
+};
 
 #define M_PI 3.14159265358979
 #define MAX_STEPS 100
@@ -38,11 +48,49 @@ float roundedBoxSDF(vec3 p, vec3 b, float r) {
     return length(max(q, 0.0)) + min(max(q.x, max(q.y, q.z)), 0.0) - r;
 }
 
+// Versões com gradiente analítico: xyz = gradiente, w = distância
+vec4 sphereSDFGrad(vec3 p, vec3 center, float radius) {
+    vec3 d = p - center;
+    float l = length(d);
+    return vec4(d / l, l - radius);
+}
+
+vec4 roundedBoxSDFGrad(vec3 p, vec3 b, float r) {
+    vec3 q = abs(p) - b;
+    float inside = max(q.x, max(q.y, q.z));
+    vec3 g;
+    if (inside > 0.0) {
+        g = normalize(max(q, 0.0));
+    } else if (q.x >= q.y && q.x >= q.z) {
+        g = vec3(1.0, 0.0, 0.0);
+    } else if (q.y >= q.z) {
+        g = vec3(0.0, 1.0, 0.0);
+    } else {
+        g = vec3(0.0, 0.0, 1.0);
+    }
+    return vec4(g * sign(p), length(max(q, 0.0)) + min(inside, 0.0) - r);
+}
+
 float smoothUnionSDF(float d1, float d2, float k) {
     float h = clamp(0.5 + 0.5 * (d2 - d1) / k, 0.0, 1.0);
     return mix(d2, d1, h) - k * h * (1.0 - h);
 }
 
+// smoothUnionSDF com gradiente (xyz) e distância (w); a derivada em d1 é h
+vec4 smoothUnionSDFGrad(vec4 d1, vec4 d2, float k) {
+    float h = clamp(0.5 + 0.5 * (d2.w - d1.w) / k, 0.0, 1.0);
+    return vec4(mix(d2.xyz, d1.xyz, h), mix(d2.w, d1.w, h) - k * h * (1.0 - h));
+}
+
+// Com SCENE_SPECIALIZED, dsf.compiler substitui a linha seguinte por uma cena
+// sem ciclos (sceneDistColor/sceneDistGrad) e o ciclo sobre u_primitives é omitido
+// @scene
+
+#ifdef SCENE_SPECIALIZED
+float sceneSDF(vec3 p) {
+    return sceneDistColor(p).w;
+}
+#else
 float sceneSDF(vec3 p) {
     float dist = MAX_DIST;
 
@@ -53,7 +101,7 @@ float sceneSDF(vec3 p) {
         if (prim.type == 0) {
             d = sphereSDF(p, prim.position, prim.radius); 
         } else if (prim.type == 1) {
-            d = roundedBoxSDF(p - prim.position, vec3(1.0), prim.radius);
+            d = roundedBoxSDF(p - prim.position, prim.scale, prim.radius);
         } else {
             continue;
         }
@@ -64,7 +112,47 @@ float sceneSDF(vec3 p) {
     return dist;
 }
 
+// Mesma cena que sceneSDF, com gradiente analítico (xyz) e distância (w)
+vec4 sceneDistGrad(vec3 p) {
+    vec4 dist = vec4(0.0, 0.0, 0.0, MAX_DIST);
+
+    for (int i = 0; i < u_primitive_count; i++) {
+        Primitive prim = u_primitives[i];
+        vec4 d;
+
+        if (prim.type == 0) {
+            d = sphereSDFGrad(p, prim.position, prim.radius);
+        } else if (prim.type == 1) {
+            d = roundedBoxSDFGrad(p - prim.position, prim.scale, prim.radius);
+        } else {
+            continue;
+        }
+
+        dist = smoothUnionSDFGrad(dist, d, u_blend_strength);
+    }
+
+    return dist;
+}
+#endif
+
+// Cálculo da normal no ponto p
+// u_normal_mode: 0 = diferenças centrais (6 amostras), 1 = tetraédrico (4 amostras),
+// 2 = gradiente analítico (1 avaliação da cena)
 vec3 calculateNormal(vec3 p) {
+    if (u_normal_mode == 2) {
+        return normalize(sceneDistGrad(p).xyz);
+    }
+    if (u_normal_mode == 1) {
+        // Amostras nos vértices de um tetraedro
+        const vec2 k = vec2(1.0, -1.0);
+        const float h = 0.001;
+        return normalize(
+            k.xyy * sceneSDF(p + k.xyy * h) +
+            k.yyx * sceneSDF(p + k.yyx * h) +
+            k.yxy * sceneSDF(p + k.yxy * h) +
+            k.xxx * sceneSDF(p + k.xxx * h)
+        );
+    }
     const vec2 e = vec2(0.001, 0.0);
     return normalize(vec3(
         sceneSDF(p + e.xyy) - sceneSDF(p - e.xyy),
@@ -73,16 +161,35 @@ vec3 calculateNormal(vec3 p) {
     ));
 }
 
+// Passos de RayMarch deste píxel (escritos em vez da cor com u_output_steps)
+int g_marchSteps = 0;
+
+// Sphere tracing com over-relaxation opcional (u_relaxation = ω, 1 = passo normal).
+// Com ω > 1 avança ω * d; se a esfera de segurança do novo ponto não chega à do
+// ponto anterior, o passo pode ter saltado a superfície: volta para o passo
+// normal (d) a partir do ponto anterior, que é sempre seguro.
 float RayMarch(vec3 ro, vec3 rd) {
     float d0 = 0.0;
-
+    float previousDist = 0.0;
+    float stepLength = 0.0;
     for (int i = 0; i < MAX_STEPS; i++) {
+        g_marchSteps++;
         vec3 p = ro + rd * d0;
-        float dist = sceneSDF(p);
-        d0 += dist;
-        if (dist < MIN_DIST || d0 > MAX_DIST) break;
+        float d1 = sceneSDF(p);
+        if (stepLength > previousDist && d1 + previousDist < stepLength) {
+            d0 -= stepLength - previousDist;
+            stepLength = previousDist;
+            continue;
+        }
+        if (d1 < MIN_DIST) {
+            d0 += d1;
+            break;
+        }
+        stepLength = d1 * u_relaxation;
+        previousDist = d1;
+        d0 += stepLength;
+        if (d0 > MAX_DIST) break;
     }
-
     return d0;
 }
 
@@ -120,4 +227,7 @@ void main() {
     }
 
     fragColor = vec4(color, 1.0);
+    if (u_output_steps == 1) {
+        fragColor = vec4(float(g_marchSteps), 0.0, 0.0, 1.0);
+    }
 }
\ No newline at end of file
@@ -11,11 +11,26 @@ uniform float darkness;
 uniform float blackAndWhite;
 uniform vec3 colourAMix;
 uniform vec3 colourBMix;
+uniform int u_normal_mode;  // 0 = diferenças centrais, 1 ou 2 = tetraédrico
 uniform int plusIteration;
 
+// Nível de detalhe (0 = desligado, igual ao render sem LOD)
+uniform float u_lod_cone;               // Epsilon mínimo em larguras do cone do píxel
+uniform float u_lod_iteration_falloff;  // Iterações = maxIterations / (1 + falloff * distância)
+
+// Over-relaxation do ciclo principal (1 = sphere tracing normal)
+uniform float u_relaxation;
+
+// Prepass de cone marching a baixa resolução (ver ConeMarch)
+uniform int u_cone_pass;                // 1 = este desenho é o prepass
+uniform int u_cone_scale;               // Lado em píxeis dos blocos do prepass (0 = sem prepass)
+uniform sampler2D u_cone_depth;         // Prepass: distância segura (r) e passos (g) por bloco
+
 const float epsilon = 0.001f;
 const float maxDst = 200.0;
 const int maxStepCount = 250;
+const int maxIterations = 50;
+const int minLodIterations = 16;  // colourB satura às 16 iterações
 
 struct Ray {
     vec3 origin;
@@ -50,13 +65,13 @@ Ray CreateCameraRay(vec2 uv) {
     return CreateRay(origin, direction);
 }
 
-vec2 SceneInfo(vec3 position) {
+vec2 SceneInfo(vec3 position, int iterationBudget) {
     vec3 z = position;
     float dr = 1.0;
     float r = 0.0;
     int iterations = 0;
 
-    for (int i = 0; i < 50; i++) {
+    for (int i = 0; i < iterationBudget; i++) {
         iterations = i;
         r = length(z);
 
@@ -82,16 +97,86 @@ vec2 SceneInfo(vec3 position) {
     return vec2(iterations, dst);
 }
 
-vec3 EstimateNormal(vec3 p) {
-    float x = SceneInfo(vec3(p.x + epsilon, p.y, p.z)).y - SceneInfo(vec3(p.x - epsilon, p.y, p.z)).y;
-    float y = SceneInfo(vec3(p.x, p.y + epsilon, p.z)).y - SceneInfo(vec3(p.x, p.y - epsilon, p.z)).y;
-    float z = SceneInfo(vec3(p.x, p.y, p.z + epsilon)).y - SceneInfo(vec3(p.x, p.y, p.z - epsilon)).y;
+// Largura do cone de um píxel à distância rayDst (o epsilon não desce abaixo dela)
+float HitEpsilon(float rayDst) {
+    float pixelFootprint = 2.0 / min(u_resolution.x, u_resolution.y);
+    return max(epsilon, u_lod_cone * pixelFootprint * rayDst);
+}
+
+// Iterações do fractal à distância rayDst: longe, os detalhes finos não se veem
+int IterationBudget(float rayDst) {
+    int budget = int(float(maxIterations) / (1.0 + u_lod_iteration_falloff * rayDst));
+    return clamp(budget, minLodIterations, maxIterations);
+}
+
+// Não há gradiente analítico para o fractal, por isso o modo 2 usa o tetraédrico
+vec3 EstimateNormal(vec3 p, float e, int iterationBudget) {
+    if (u_normal_mode != 0) {
+        // 4 amostras nos vértices de um tetraedro em vez de 6
+        const vec2 k = vec2(1.0, -1.0);
+        return normalize(
+            k.xyy * SceneInfo(p + k.xyy * e, iterationBudget).y +
+            k.yyx * SceneInfo(p + k.yyx * e, iterationBudget).y +
+            k.yxy * SceneInfo(p + k.yxy * e, iterationBudget).y +
+            k.xxx * SceneInfo(p + k.xxx * e, iterationBudget).y
+        );
+    }
+    float x = SceneInfo(vec3(p.x + e, p.y, p.z), iterationBudget).y - SceneInfo(vec3(p.x - e, p.y, p.z), iterationBudget).y;
+    float y = SceneInfo(vec3(p.x, p.y + e, p.z), iterationBudget).y - SceneInfo(vec3(p.x, p.y - e, p.z), iterationBudget).y;
+    float z = SceneInfo(vec3(p.x, p.y, p.z + e), iterationBudget).y - SceneInfo(vec3(p.x, p.y, p.z - e), iterationBudget).y;
     return normalize(vec3(x, y, z));
 }
 
+// Prepass de cone marching: um cone por bloco de píxeis, com o raio do centro
+// do bloco como eixo. À distância t, os raios do bloco estão a menos de
+// spread * t do eixo, por isso avançar (dst - spread * t) / (1 + spread) não
+// atravessa o fractal em nenhum raio do bloco.
+// O rim conta os passos desde a câmera: além da distância segura (x), devolve
+// os passos que o raio central dá até lá (y), que o passe completo salta.
+vec2 ConeMarch(vec2 blockCenter, float blockSize) {
+    Ray ray = CreateCameraRay(blockCenter / u_resolution * 2.0 - 1.0);
+
+    // Maior afastamento entre a direção do eixo e as dos cantos do bloco
+    float spread = 0.0;
+    for (int i = 0; i < 4; i++) {
+        vec2 corner = blockCenter + 0.5 * blockSize * vec2(i % 2 * 2 - 1, i / 2 * 2 - 1);
+        vec3 direction = CreateCameraRay(corner / u_resolution * 2.0 - 1.0).direction;
+        spread = max(spread, length(direction - ray.direction));
+    }
+
+    float coneDst = 0.0;
+    for (int i = 0; i < maxStepCount; i++) {
+        float dst = SceneInfo(ray.origin + ray.direction * coneDst, IterationBudget(coneDst)).y;
+        float h = (dst - spread * coneDst) / (1.0 + spread);
+        if (h < HitEpsilon(coneDst)) {
+            break;
+        }
+        coneDst += h;
+        if (coneDst > maxDst) {
+            break;
+        }
+    }
+    coneDst = min(coneDst, maxDst);
+
+    float rayDst = 0.0;
+    int stepCount = 0;
+    while (rayDst < coneDst && stepCount < maxStepCount) {
+        stepCount++;
+        rayDst += SceneInfo(ray.origin + ray.direction * rayDst, IterationBudget(rayDst)).y;
+    }
+    return vec2(coneDst, float(stepCount));
+}
+
 out vec4 fragColor;
 
 void main() {
+    if (u_cone_pass == 1) {
+        // Cada fragmento do prepass é um bloco de u_cone_scale x u_cone_scale píxeis
+        float scale = float(u_cone_scale);
+        fragColor = vec4(ConeMarch(gl_FragCoord.xy * scale, scale), 0.0, 1.0);
+        return;
+    }
+
     vec2 uv = gl_FragCoord.xy / u_resolution;
 
     vec4 result = mix(vec4(65.0 / 255.0, 3.0 / 255.0, 79.0 / 255.0, 1.0), vec4(16.0 / 255.0, 6.0 / 255.0, 28.0 / 255.0, 1.0), uv.y);
@@ -100,15 +185,45 @@ void main() {
 
     float rayDst = 0.0;
     int stepCount = 0;
+    float coneSteps = 0.0;  // Passos saltados com o prepass (contam para o rim)
+    // O rim conta passos de sphere tracing normal: um passo relaxado de ω * dst
+    // conta como ω e um recuo desconta o excesso, para que o rim não escureça
+    // com a over-relaxation
+    float marchSteps = 0.0;
+    float previousDst = 0.0;
+    float stepLength = 0.0;
+
+    // Com o prepass, o raio começa na distância segura do seu bloco
+    if (u_cone_scale > 0) {
+        rayDst = texelFetch(u_cone_depth, ivec2(gl_FragCoord.xy) / u_cone_scale, 0).x;
+        ray.origin += ray.direction * rayDst;
+        // Interpolados entre blocos, para o rim não ficar em degraus
+        vec2 coneUV = gl_FragCoord.xy / (float(u_cone_scale) * vec2(textureSize(u_cone_depth, 0)));
+        coneSteps = texture(u_cone_depth, coneUV).y;
+    }
 
     while (rayDst < maxDst && stepCount < maxStepCount) {
         stepCount++;
-        vec2 sceneInfo = SceneInfo(ray.origin);
+        float hitEpsilon = HitEpsilon(rayDst);
+        int iterationBudget = IterationBudget(rayDst);
+        vec2 sceneInfo = SceneInfo(ray.origin, iterationBudget);
         float dst = sceneInfo.y;
 
-        if (dst < epsilon) {
+        // Com ω > 1, se a esfera deste ponto não chega à do ponto anterior o
+        // passo pode ter saltado o fractal: recua para o passo normal (dst do
+        // ponto anterior), que é sempre seguro
+        if (stepLength > previousDst && dst + previousDst < stepLength) {
+            ray.origin -= ray.direction * (stepLength - previousDst);
+            rayDst -= stepLength - previousDst;
+            marchSteps -= u_relaxation - 1.0;
+            stepLength = previousDst;
+            continue;
+        }
+
+        if (dst < hitEpsilon) {
+            marchSteps += 1.0;
             float escapeIteration = sceneInfo.x;
-            vec3 normal = EstimateNormal(ray.origin - ray.direction * epsilon * 2.0);
+            vec3 normal = EstimateNormal(ray.origin - ray.direction * hitEpsilon * 2.0, hitEpsilon, iterationBudget);
 
             float colourA = clamp(dot(normal * 0.5 + 0.5, -vec3(1.0, 1.0, 1.0)), 0.0, 1.0);
             float colourB = clamp(escapeIteration / 16.0, 0.0, 1.0);
@@ -117,9 +232,12 @@ void main() {
             result = vec4(colour, 1.0);
             break;
         }
-        ray.origin += ray.direction * dst;
-        rayDst += dst;
+        stepLength = dst * u_relaxation;
+        previousDst = dst;
+        marchSteps += u_relaxation;
+        ray.origin += ray.direction * stepLength;
+        rayDst += stepLength;
     }
-    float rim = float(stepCount) / darkness;
+    float rim = (coneSteps + marchSteps) / darkness;
     fragColor = mix(result, vec4(1.0), blackAndWhite) * rim;
 }
\ No newline at end of file
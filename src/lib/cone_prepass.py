@@ -0,0 +1,98 @@
+import math
+from OpenGL.GL import *
+
+
+class ConePrepass:
+    def __init__(self, scale: int = 8, unit: int = 1) -> None:
+        """
+        Prepass de cone marching a baixa resolução.
+
+        Antes do frame, o mesmo shader desenha para uma textura RG32F com
+        1/scale da resolução e u_cone_pass a 1: cada texel marcha um cone que
+        contém os raios do seu bloco de scale x scale píxeis e guarda a
+        distância até onde todos podem avançar sem atravessar uma superfície
+        (r) e os passos que gastou (g). No passe completo, cada raio começa a
+        marchar nessa distância em vez de na câmera.
+
+        scale: Lado dos blocos em píxeis
+        unit: Unidade de textura onde o resultado fica ligado (u_cone_depth)
+        """
+        self.scale = scale
+        self.unit = unit
+        self.enabled = False
+
+        self.framebuffer = None
+        self.texture = None
+        self.size = None  # Tamanho da textura (coarse)
+
+        self.pass_location = None
+        self.scale_location = None
+
+    def bind(self, program) -> None:
+        """Lê os uniforms do programa (que tem de estar em uso)."""
+        self.pass_location = glGetUniformLocation(program, "u_cone_pass")
+        self.scale_location = glGetUniformLocation(program, "u_cone_scale")
+        glUniform1i(glGetUniformLocation(program, "u_cone_depth"), self.unit)
+        glUniform1i(self.pass_location, 0)
+        self._update_scale()
+
+    def toggle(self) -> None:
+        self.enabled = not self.enabled
+        self._update_scale()
+
+    def _update_scale(self) -> None:
+        # u_cone_scale = 0 desliga a leitura da textura no passe completo
+        glUniform1i(self.scale_location, self.scale if self.enabled else 0)
+
+    def _allocate(self, width: int, height: int) -> None:
+        size = (math.ceil(width / self.scale), math.ceil(height / self.scale))
+        if self.size == size:
+            return
+        if self.framebuffer is None:
+            self.framebuffer = glGenFramebuffers(1)
+            self.texture = glGenTextures(1)
+
+        glBindTexture(GL_TEXTURE_2D, self.texture)
+        glTexImage2D(GL_TEXTURE_2D, 0, GL_RG32F, *size, 0, GL_RG, GL_FLOAT, None)
+        # Linear para os passos (g); a distância (r) é lida com texelFetch
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_LINEAR)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, GL_CLAMP_TO_EDGE)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, GL_CLAMP_TO_EDGE)
+        glBindTexture(GL_TEXTURE_2D, 0)
+
+        glBindFramebuffer(GL_FRAMEBUFFER, self.framebuffer)
+        glFramebufferTexture2D(
+            GL_FRAMEBUFFER, GL_COLOR_ATTACHMENT0, GL_TEXTURE_2D, self.texture, 0
+        )
+        glBindFramebuffer(GL_FRAMEBUFFER, 0)
+        self.size = size
+
+    def render(self, width: int, height: int, draw) -> None:
+        """
+        Desenha o prepass do frame atual (não faz nada se estiver desligado).
+
+        width, height: Tamanho do frame completo (u_resolution)
+        draw: Função que desenha o quad de ecrã inteiro
+        """
+        if not self.enabled:
+            return
+        self._allocate(width, height)
+        viewport = glGetIntegerv(GL_VIEWPORT)
+
+        # Desliga a textura da unidade enquanto é o destino do desenho
+        glActiveTexture(GL_TEXTURE0 + self.unit)
+        glBindTexture(GL_TEXTURE_2D, 0)
+        glActiveTexture(GL_TEXTURE0)
+
+        glBindFramebuffer(GL_FRAMEBUFFER, self.framebuffer)
+        glViewport(0, 0, *self.size)
+        glUniform1i(self.pass_location, 1)
+        draw()
+        glUniform1i(self.pass_location, 0)
+        glBindFramebuffer(GL_FRAMEBUFFER, 0)
+        glViewport(*viewport)
+
+        glActiveTexture(GL_TEXTURE0 + self.unit)
+        glBindTexture(GL_TEXTURE_2D, self.texture)
+        glActiveTexture(GL_TEXTURE0)
@@ -0,0 +1,141 @@
+import collections
+import threading
+import time
+import numpy as np
+from OpenGL.GL import *
+
+# Tempos medidos em cada frame (ms)
+#   input     eventos, teclado e rato
+#   uniforms  comandos do websocket e envio de uniforms/primitivas
+#   draw      submissão do desenho (CPU)
+#   present   pg.display.flip
+#   frame     frame completo, incluindo a espera de clock.tick
+#   gpu       tempo do desenho na GPU (GL_TIME_ELAPSED, chega uns frames depois)
+METRICS = ("input", "uniforms", "draw", "present", "frame", "gpu")
+PERCENTILES = (50, 95, 99)
+
+
+class FrameStats:
+    def __init__(self, capacity: int = 600, gpu_queries: int = 4) -> None:
+        """
+        Tempos por frame guardados num ring buffer, com percentis.
+
+        O render loop chama begin_frame, mark (no fim de cada fase), begin_gpu/
+        end_gpu (à volta do desenho) e end_frame; summary() pode ser chamado de
+        outra thread (ex.: comando get_stats do websocket).
+
+        capacity: Número de frames guardados por métrica
+        gpu_queries: Queries GL_TIME_ELAPSED em voo (o resultado só é lido
+                     quando está disponível, para não parar o pipeline)
+        """
+        self.capacity = capacity
+        self.lock = threading.Lock()
+        self.samples = np.zeros((len(METRICS), capacity))
+        self.counts = np.zeros(len(METRICS), dtype=np.int64)
+
+        self.frame_start = None
+        self.last_mark = None
+
+        self.gpu_queries = gpu_queries
+        self.gpu_enabled = True
+        self.free_queries = (
+            None  # Criadas no primeiro begin_gpu (precisa de contexto GL)
+        )
+        self.pending_queries = collections.deque()
+        self.active_query = None
+        self.gpu_warmup = 1  # Resultados iniciais descartados
+
+    def _record(self, metric: str, milliseconds: float) -> None:
+        index = METRICS.index(metric)
+        with self.lock:
+            self.samples[index, self.counts[index] % self.capacity] = milliseconds
+            self.counts[index] += 1
+
+    def begin_frame(self) -> None:
+        self.frame_start = self.last_mark = time.perf_counter()
+
+    def mark(self, metric: str) -> None:
+        """Regista o tempo desde a marca anterior como a fase metric."""
+        now = time.perf_counter()
+        self._record(metric, 1000 * (now - self.last_mark))
+        self.last_mark = now
+
+    def end_frame(self) -> None:
+        self._record("frame", 1000 * (time.perf_counter() - self.frame_start))
+
+    def begin_gpu(self) -> None:
+        if not self.gpu_enabled:
+            return
+        if self.free_queries is None:
+            try:
+                self.free_queries = list(np.atleast_1d(glGenQueries(self.gpu_queries)))
+            except GLError:
+                self.gpu_enabled = False  # Sem timer queries: só tempos de CPU
+                return
+
+        self._collect_gpu()
+        if not self.free_queries:
+            return  # Todas em voo: este frame não é medido na GPU
+        self.active_query = self.free_queries.pop()
+        glBeginQuery(GL_TIME_ELAPSED, self.active_query)
+
+    def end_gpu(self) -> None:
+        if self.active_query is None:
+            return
+        glEndQuery(GL_TIME_ELAPSED)
+        self.pending_queries.append(self.active_query)
+        self.active_query = None
+
+    def _collect_gpu(self) -> None:
+        """Lê os resultados das queries já terminadas (por ordem)."""
+        while self.pending_queries:
+            query = self.pending_queries[0]
+            if not glGetQueryObjectiv(query, GL_QUERY_RESULT_AVAILABLE):
+                break
+            nanoseconds = GLuint64(0)  # Saída explícita (o PyOpenGL não a cria)
+            glGetQueryObjectui64v(query, GL_QUERY_RESULT, nanoseconds)
+            self.free_queries.append(self.pending_queries.popleft())
+
+            if self.gpu_warmup:
+                self.gpu_warmup -= 1  # Alguns drivers (llvmpipe) erram a 1.ª medição
+                continue
+            self._record("gpu", nanoseconds.value / 1e6)
+
+    def summary(self) -> dict:
+        """Percentis (ms) de cada métrica nos últimos frames, mais fps e contagens."""
+        with self.lock:
+            samples = self.samples.copy()
+            counts = self.counts.copy()
+
+        summary = {"frames": int(counts[METRICS.index("frame")])}
+        for index, metric in enumerate(METRICS):
+            values = samples[index, : min(counts[index], self.capacity)]
+            if not len(values):
+                continue
+            percentiles = np.percentile(values, PERCENTILES)
+            summary[metric] = {
+                "mean": float(values.mean()),
+                **{f"p{p}": float(v) for p, v in zip(PERCENTILES, percentiles)},
+            }
+        if "frame" in summary:
+            summary["fps"] = 1000.0 / summary["frame"]["mean"]
+        return summary
+
+    def caption(self) -> str:
+        """Resumo numa linha (para o título da janela)."""
+        summary = self.summary()
+        if "frame" not in summary:
+            return "no frames yet"
+
+        def describe(metric):
+            values = summary.get(metric)
+            if values is None:
+                return f"{metric} -"
+            return (
+                f"{metric} {values['p50']:.1f}/{values['p95']:.1f}/"
+                f"{values['p99']:.1f}"
+            )
+
+        return f"{summary['fps']:.0f} fps | p50/p95/p99 ms: " + " | ".join(
+            describe(metric) for metric in ("frame", "gpu", "uniforms")
+        )
@@ -0,0 +1,142 @@
+import ctypes
+import hashlib
+import os
+import struct
+from OpenGL.GL import *
+from OpenGL.GL.shaders import compileShader
+
+# Cabeçalho dos ficheiros da cache: magic, formato do binário, tamanho
+HEADER = struct.Struct("<4sII")
+MAGIC = b"GLPB"
+
+# Estatísticas da cache neste processo
+cache_stats = {"hits": 0, "misses": 0, "errors": 0}
+
+
+def _cache_dir() -> str:
+    return os.environ.get("SHADER_CACHE_DIR", os.path.join("glsl", "__pycache__"))
+
+
+def _gl_string(name) -> bytes:
+    return glGetString(name) or b""
+
+
+def program_key(vertex_source: str, fragment_source: str) -> str:
+    """Chave da cache: hash das fontes e do driver (vendor, renderer, versão)."""
+    digest = hashlib.sha256()
+    for part in (
+        vertex_source.encode("utf-8"),
+        fragment_source.encode("utf-8"),
+        _gl_string(GL_VENDOR),
+        _gl_string(GL_RENDERER),
+        _gl_string(GL_VERSION),
+    ):
+        digest.update(part)
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def _binary_supported() -> bool:
+    try:
+        return glGetIntegerv(GL_NUM_PROGRAM_BINARY_FORMATS) > 0
+    except GLError:
+        return False
+
+
+def _link_status(program) -> bool:
+    return bool(glGetProgramiv(program, GL_LINK_STATUS))
+
+
+def _link(vertex_source: str, fragment_source: str, retrievable: bool):
+    vertex_shader = compileShader(vertex_source, GL_VERTEX_SHADER)
+    fragment_shader = compileShader(fragment_source, GL_FRAGMENT_SHADER)
+
+    program = glCreateProgram()
+    glAttachShader(program, vertex_shader)
+    glAttachShader(program, fragment_shader)
+    if retrievable:
+        glProgramParameteri(program, GL_PROGRAM_BINARY_RETRIEVABLE_HINT, GL_TRUE)
+    glLinkProgram(program)
+
+    glDetachShader(program, vertex_shader)
+    glDetachShader(program, fragment_shader)
+    glDeleteShader(vertex_shader)
+    glDeleteShader(fragment_shader)
+
+    if not _link_status(program):
+        log = glGetProgramInfoLog(program)
+        glDeleteProgram(program)
+        raise RuntimeError(f"Shader link failure: {log}")
+    return program
+
+
+def _load(path: str):
+    """Cria um programa a partir do binário guardado (None se não servir)."""
+    try:
+        with open(path, "rb") as f:
+            magic, binary_format, length = HEADER.unpack(f.read(HEADER.size))
+            binary = f.read(length)
+    except (OSError, struct.error):
+        return None
+    if magic != MAGIC or len(binary) != length:
+        return None
+
+    program = glCreateProgram()
+    try:
+        glProgramBinary(program, binary_format, binary, length)
+        accepted = _link_status(program)
+    except GLError:
+        accepted = False
+    if not accepted:
+        # O driver pode recusar binários de outra versão: compila de novo
+        glDeleteProgram(program)
+        return None
+    return program
+
+
+def _save(path: str, program) -> None:
+    length = int(glGetProgramiv(program, GL_PROGRAM_BINARY_LENGTH))
+    if length <= 0:
+        return
+
+    binary = (ctypes.c_ubyte * length)()
+    written = GLsizei(0)
+    binary_format = GLenum(0)
+    glGetProgramBinary(program, length, written, binary_format, binary)
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, binary_format.value, written.value))
+        f.write(bytes(binary)[: written.value])
+    os.replace(tmp_path, path)  # Escrita atómica (vários processos podem arrancar)
+
+
+def load_program(vertex_source: str, fragment_source: str):
+    """
+    Devolve um programa linkado para as fontes dadas, usando a cache em disco.
+
+    Com a cache (glProgramBinary) evita-se compilar os shaders a cada arranque;
+    se a cache falhar ou o driver não suportar binários, compila normalmente.
+    A pasta da cache é SHADER_CACHE_DIR (por omissão, glsl/__pycache__).
+    """
+    if not _binary_supported():
+        cache_stats["misses"] += 1
+        return _link(vertex_source, fragment_source, retrievable=False)
+
+    path = os.path.join(
+        _cache_dir(), f"{program_key(vertex_source, fragment_source)}.bin"
+    )
+    program = _load(path)
+    if program is not None:
+        cache_stats["hits"] += 1
+        return program
+
+    cache_stats["misses"] += 1
+    program = _link(vertex_source, fragment_source, retrievable=True)
+    try:
+        _save(path, program)
+    except (OSError, GLError) as error:
+        cache_stats["errors"] += 1
+        print(f"Could not store program binary in {path}: {error}")
+    return program
@@ -0,0 +1,45 @@
+from collections import OrderedDict
+from OpenGL.GL import *
+from dsf import scene_hash, specialize_shader
+from .program_cache import load_program
+
+
+class ScenePrograms:
+    def __init__(
+        self, vertex_source: str, fragment_template: str, capacity: int = 16
+    ) -> None:
+        """
+        Cache de programas especializados para cenas dsf, indexada pelo hash da cena.
+
+        vertex_source: Código do vertex shader
+        fragment_template: Fragment shader com a linha "// @scene"
+        capacity: Número máximo de programas guardados (os menos usados são apagados)
+        """
+        self.vertex_source = vertex_source
+        self.fragment_template = fragment_template
+        self.capacity = capacity
+        self.programs = OrderedDict()
+        self.compiled = 0  # Número de programas criados (falhas da cache em memória)
+
+    def get(self, nodes):
+        """Devolve o programa para a cena dada, compilando-o só na primeira vez."""
+        key = scene_hash(nodes)
+        program = self.programs.get(key)
+        if program is not None:
+            self.programs.move_to_end(key)
+            return program
+
+        fragment_source = specialize_shader(self.fragment_template, nodes)
+        program = load_program(self.vertex_source, fragment_source)
+
+        self.programs[key] = program
+        self.compiled += 1
+        while len(self.programs) > self.capacity:
+            _, old = self.programs.popitem(last=False)
+            glDeleteProgram(old)
+        return program
+
+    def release(self) -> None:
+        for program in self.programs.values():
+            glDeleteProgram(program)
+        self.programs.clear()
@@ -0,0 +1,59 @@
+import threading
+
+
+class StagedCommands:
+    def __init__(self, ordered=()) -> None:
+        """
+        Comandos recebidos pelo websocket, à espera de serem aplicados no render loop.
+
+        Os comandos normais ficam num mapa comando -> último valor (só o último
+        interessa para o próximo frame); os comandos em ordered (ex.:
+        add_primitive) ficam numa lista e são todos aplicados, pela ordem
+        em que chegaram. O render loop troca o mapa uma vez por frame.
+
+        ordered: Nomes dos comandos que não podem ser juntados
+        """
+        self.ordered = frozenset(ordered)
+        self.lock = threading.Lock()
+        self.pending = {}
+        self.pending_ordered = []
+
+        # Contadores
+        self.received = 0
+        self.coalesced = 0
+        self.applied = 0  # Entregues ao render loop
+        self.rejected = 0  # Entregues mas inválidos (contados pelo render loop)
+
+    def stage(self, command: str, value: str) -> None:
+        """Guarda um comando (ainda por interpretar) para o próximo frame."""
+        with self.lock:
+            self.received += 1
+            if command in self.ordered:
+                self.pending_ordered.append((command, value))
+            else:
+                if command in self.pending:
+                    self.coalesced += 1
+                    del self.pending[command]  # Fica na posição do valor mais recente
+                self.pending[command] = value
+
+    def take(self) -> list:
+        """Devolve e limpa os comandos pendentes (uma troca por frame)."""
+        if not self.pending and not self.pending_ordered:
+            return []
+
+        with self.lock:
+            pending, self.pending = self.pending, {}
+            pending_ordered, self.pending_ordered = self.pending_ordered, []
+        commands = pending_ordered + list(pending.items())
+        self.applied += len(commands)
+        return commands
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "received": self.received,
+                "coalesced": self.coalesced,
+                "applied": self.applied,
+                "rejected": self.rejected,
+                "pending": len(self.pending) + len(self.pending_ordered),
+            }
@@ -0,0 +1,60 @@
+import asyncio
+import threading
+import websockets
+import protocol
+
+
+class StateBroadcaster:
+    def __init__(self) -> None:
+        """
+        Estado de referência da janela, difundido para todos os clientes ligados.
+
+        O render loop publica uma vez por frame os comandos que aplicou; o
+        estado e o envio (um delta binário por frame, igual para todos os
+        clientes) tratam-se na thread do websocket, para não atrasar o render.
+        Um cliente novo recebe primeiro o snapshot do estado e depois os deltas.
+        """
+        self.lock = threading.Lock()
+        self.state = protocol.ControlState()
+        self.clients = set()
+        self.loop = None
+
+        # Contadores
+        self.snapshots = 0
+        self.deltas = 0
+
+    def start(self, updates) -> None:
+        """Define o estado inicial e liga-se ao event loop do servidor."""
+        with self.lock:
+            self.state = protocol.ControlState(updates)
+            self.loop = asyncio.get_running_loop()
+
+    def register(self, websocket) -> None:
+        """Envia o snapshot a um cliente novo e passa a incluí-lo nos deltas."""
+        with self.lock:
+            snapshot = protocol.encode(self.state.updates())
+        # Escrita síncrona: nenhum delta pode ficar entre o snapshot e o registo
+        websockets.broadcast([websocket], snapshot)
+        self.clients.add(websocket)
+        self.snapshots += 1
+
+    def unregister(self, websocket) -> None:
+        self.clients.discard(websocket)
+
+    def publish(self, updates: list) -> None:
+        """Chamado pelo render loop com os comandos aceites neste frame."""
+        if not updates:
+            return
+        if self.loop is None:
+            # Servidor ainda não arrancou: não há clientes a avisar
+            with self.lock:
+                self.state.apply_all(updates)
+            return
+        self.loop.call_soon_threadsafe(self._broadcast, updates)
+
+    def _broadcast(self, updates: list) -> None:
+        with self.lock:
+            self.state.apply_all(updates)
+        if self.clients:
+            websockets.broadcast(self.clients, protocol.encode(updates))
+            self.deltas += 1
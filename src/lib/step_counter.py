@@ -0,0 +1,62 @@
+import numpy as np
+from OpenGL.GL import *
+
+
+class StepCounter:
+    def __init__(self) -> None:
+        """
+        Passos de ray marching por píxel, medidos na GPU.
+
+        Desenha um frame extra para um FBO R32F com o uniform output_steps a 1:
+        em vez da cor, o shader escreve o número de passos de RayMarch de cada
+        píxel, e a média é lida com glReadPixels. A leitura espera pela GPU,
+        por isso a janela só mede quando alguém está a ver (título com F3).
+        """
+        self.steps_per_pixel = None  # Última medição
+        self.framebuffer = None
+        self.texture = None
+        self.size = None
+
+    def _allocate(self, width: int, height: int) -> None:
+        if self.size == (width, height):
+            return
+        if self.framebuffer is None:
+            self.framebuffer = glGenFramebuffers(1)
+            self.texture = glGenTextures(1)
+
+        glBindTexture(GL_TEXTURE_2D, self.texture)
+        glTexImage2D(
+            GL_TEXTURE_2D, 0, GL_R32F, width, height, 0, GL_RED, GL_FLOAT, None
+        )
+        glBindTexture(GL_TEXTURE_2D, 0)
+        glBindFramebuffer(GL_FRAMEBUFFER, self.framebuffer)
+        glFramebufferTexture2D(
+            GL_FRAMEBUFFER, GL_COLOR_ATTACHMENT0, GL_TEXTURE_2D, self.texture, 0
+        )
+        glBindFramebuffer(GL_FRAMEBUFFER, 0)
+        self.size = (width, height)
+
+    def measure(self, uniforms, width: int, height: int, draw) -> float:
+        """
+        Mede a média de passos por píxel do frame atual.
+
+        uniforms: UniformState da janela (com o parâmetro "output_steps")
+        width, height: Tamanho do frame
+        draw: Função que desenha o quad de ecrã inteiro
+        """
+        self._allocate(width, height)
+        viewport = glGetIntegerv(GL_VIEWPORT)
+
+        glBindFramebuffer(GL_FRAMEBUFFER, self.framebuffer)
+        glViewport(0, 0, width, height)
+        uniforms.set("output_steps", 1)
+        uniforms.upload()
+        draw()
+        steps = glReadPixels(0, 0, width, height, GL_RED, GL_FLOAT)
+        uniforms.set("output_steps", 0)
+        uniforms.upload()
+        glBindFramebuffer(GL_FRAMEBUFFER, 0)
+        glViewport(*viewport)
+
+        self.steps_per_pixel = float(np.frombuffer(steps, dtype=np.float32).mean())
+        return self.steps_per_pixel
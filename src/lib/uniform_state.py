@@ -0,0 +1,103 @@
+import threading
+from OpenGL.GL import *
+
+# Funções glUniform* por tipo de uniform
+UNIFORM_SETTERS = {
+    "1f": glUniform1f,
+    "2f": glUniform2f,
+    "3f": glUniform3f,
+    "1i": glUniform1i,
+    "3i": glUniform3i,
+}
+
+
+class UniformState:
+    def __init__(self) -> None:
+        """
+        Valores de uniforms partilhados entre a thread do websocket e o render loop.
+
+        Cada alteração marca o valor como sujo; o render loop tira um snapshot
+        por frame (um único lock) e só envia para a GPU os valores alterados.
+        """
+        self.lock = threading.Lock()
+        self.values = {}
+        self.kinds = {}
+        self.uniforms = {}
+        self.locations = {}
+        self.dirty = set()
+
+    def declare(self, name: str, uniform: str, kind: str, value) -> None:
+        """
+        Regista um parâmetro.
+
+        name: Nome do parâmetro (usado em set/get)
+        uniform: Nome do uniform no shader
+        kind: Tipo do uniform ("1f", "2f", "3f", "1i" ou "3i")
+        value: Valor inicial
+        """
+        if kind not in UNIFORM_SETTERS:
+            raise ValueError(f"Unsupported uniform type: {kind}")
+
+        with self.lock:
+            self.kinds[name] = kind
+            self.uniforms[name] = uniform
+            self.values[name] = self._normalize(kind, value)
+            self.dirty.add(name)
+
+    def bind(self, program) -> None:
+        """Lê as locations do programa e marca tudo para ser reenviado."""
+        with self.lock:
+            self.locations = {
+                name: glGetUniformLocation(program, uniform)
+                for name, uniform in self.uniforms.items()
+            }
+            self.dirty.update(self.values)
+
+    def get(self, name: str):
+        with self.lock:
+            return self.values[name]
+
+    def set(self, name: str, value) -> None:
+        """Altera um parâmetro; só fica sujo se o valor mudou."""
+        self.update(**{name: value})
+
+    def update(self, **values) -> None:
+        """Altera vários parâmetros de forma atómica (visíveis no mesmo frame)."""
+        with self.lock:
+            for name, value in values.items():
+                value = self._normalize(self.kinds[name], value)
+                if self.values[name] != value:
+                    self.values[name] = value
+                    self.dirty.add(name)
+
+    def snapshot(self) -> dict:
+        """Devolve os parâmetros alterados desde o último snapshot e limpa-os."""
+        # Leitura sem lock: uma alteração concorrente fica para o frame seguinte
+        if not self.dirty:
+            return {}
+
+        with self.lock:
+            changed = {name: self.values[name] for name in self.dirty}
+            self.dirty.clear()
+        return changed
+
+    def upload(self) -> int:
+        """Envia os parâmetros alterados para o programa atual; devolve quantos."""
+        changed = self.snapshot()
+        for name, value in changed.items():
+            location = self.locations.get(name, -1)
+            if location == -1:
+                continue
+            setter = UNIFORM_SETTERS[self.kinds[name]]
+            if isinstance(value, tuple):
+                setter(location, *value)
+            else:
+                setter(location, value)
+        return len(changed)
+
+    @staticmethod
+    def _normalize(kind: str, value):
+        cast = float if kind.endswith("f") else int
+        if kind[0] == "1":
+            return cast(value)
+        return tuple(cast(v) for v in value)
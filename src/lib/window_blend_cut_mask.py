@@ -5,7 +5,14 @@ import asyncio
 import websockets
 import threading
 from OpenGL.GL import *
-from OpenGL.GL.shaders import compileProgram, compileShader
+import protocol
+from .cone_prepass import ConePrepass
+from .frame_stats import FrameStats
+from .program_cache import load_program
+from .staged_commands import StagedCommands
+from .state_broadcast import StateBroadcaster
+from .step_counter import StepCounter
+from .uniform_state import UniformState
 
 WEBSOCKET_HOST = "localhost"
 WEBSOCKET_PORT = 8765
@@ -23,29 +30,65 @@ class WindowBlendCutMask:
         self.running = False
         self.renderer = renderer
         self.clock = pg.time.Clock()
-        self.program = None
 
-        # Shader stuff
-        self.resolution_location = None
+        # Tempos por frame; F3 mostra os percentis no título da janela
+        self.frame_stats = FrameStats()
+        self.show_frame_stats = False
+        self.frame_stats_caption = ""
+        self.frame_stats_shown = 0  # Última atualização do título (ms)
+        self.program = None
 
         # Camera stuff
         self.camera_position = [-15.0, 6.0, 3.0]  # Posição inicial da câmera
         self.camera_rotation = [0.3, 1.55]  # [pitch, yaw]
         self.mouse_sensitivity = 0.005
         self.center_mouse = True
-        self.global_light_dir = [-1.0, 1.0, 0.0]
 
-        # Blending strength (thread-safe)
-        self.blend_strength = 2.0
-        self.brightness = 1.0
-        self.shadowIntensity = 0.2
-        self.lock = threading.Lock()  # Para sincronização segura
+        # Normais: 0 = diferenças centrais, 1 = tetraédrico, 2 = gradiente analítico
+        self.normal_mode = 2
 
-        self.move_cube_coord = [0.0, 0.0, 0.0]
-        self.move_cube_func = [0, 0, 0]
+        # Uniforms partilhados com a thread do websocket (thread-safe);
+        # o render loop só envia os que mudaram
+        self.uniforms = UniformState()
+        self.uniforms.declare("resolution", "u_resolution", "2f", (width, height))
+        self.uniforms.declare(
+            "camera_position", "u_camera_position", "3f", self.camera_position
+        )
+        self.uniforms.declare(
+            "camera_rotation", "u_camera_rotation", "2f", self.camera_rotation
+        )
+        self.uniforms.declare("blend_strength", "u_blend_strength", "1f", 2.0)
+        self.uniforms.declare("brightness", "u_brightness", "1f", 1.0)
+        self.uniforms.declare("shadowIntensity", "u_shadow_intensity", "1f", 0.2)
+        self.uniforms.declare(
+            "global_light_dir", "u_global_light_dir", "3f", [-1.0, 1.0, 0.0]
+        )
+        self.uniforms.declare(
+            "move_cube_coord", "u_move_cube_coord", "3f", [0.0, 0.0, 0.0]
+        )
+        self.uniforms.declare("move_cube_func", "u_move_cube_func", "3i", [0, 0, 0])
+        self.uniforms.declare("reflection_steps", "u_reflection_steps", "1i", 2)
+        self.uniforms.declare(
+            "reflection_intensity", "u_reflection_intensity", "1f", 0.5
+        )
+        self.uniforms.declare("normal_mode", "u_normal_mode", "1i", self.normal_mode)
+        self.uniforms.declare("relaxation", "u_relaxation", "1f", 1.0)
+        self.uniforms.declare("output_steps", "u_output_steps", "1i", 0)
+
+        # O alterna a over-relaxation do RayMarch; com F3, o título mostra
+        # também a média de passos por píxel (medida num frame extra)
+        self.over_relaxation = 1.5
+        self.step_counter = StepCounter()
+        self.quad_vao = None
+
+        # Prepass de cone marching a 1/8 da resolução (P liga/desliga)
+        self.cone_prepass = ConePrepass(scale=8)
 
-        self.reflection_steps = 2
-        self.reflection_intensity = 0.5
+        # Comandos do websocket à espera do próximo frame
+        self.staged = StagedCommands()
+
+        # Estado difundido para todos os clientes ligados (snapshot + deltas)
+        self.broadcaster = StateBroadcaster()
 
     def create_window(self) -> None:
         pg.init()
@@ -72,64 +115,16 @@ class WindowBlendCutMask:
             "glsl/window_blend_cut_mask/fragment_shader.glsl"
         )
 
-        # Compile shaders
-        vertex_shader = compileShader(vertex_shader_source, GL_VERTEX_SHADER)
-        fragment_shader = compileShader(fragment_shader_source, GL_FRAGMENT_SHADER)
-
-        # Create and bind a VAO for validation
-        VAO = glGenVertexArrays(1)
-        glBindVertexArray(VAO)
-
-        # Compile the shader program
-        self.program = compileProgram(vertex_shader, fragment_shader)
-
-        # Unbind the VAO after validation
-        glBindVertexArray(0)
+        # Compile the shader program (or load its binary from the on-disk cache)
+        self.program = load_program(vertex_shader_source, fragment_shader_source)
 
         glUseProgram(self.program)
 
         # Variable locations and first-time setting
-        self.resolution_location = glGetUniformLocation(self.program, "u_resolution")
-        glUniform2f(self.resolution_location, self.width, self.height)
-        self.camera_position_location = glGetUniformLocation(
-            self.program, "u_camera_position"
-        )
-        glUniform3f(self.camera_position_location, *self.camera_position)
-        self.camera_rotation_location = glGetUniformLocation(
-            self.program, "u_camera_rotation"
-        )
-        glUniform2f(self.camera_rotation_location, *self.camera_rotation)
         self.time_location = glGetUniformLocation(self.program, "u_time")
-        self.blend_strength_location = glGetUniformLocation(
-            self.program, "u_blend_strength"
-        )
-        glUniform1f(self.blend_strength_location, self.blend_strength)
-        self.brightness_location = glGetUniformLocation(self.program, "u_brightness")
-        glUniform1f(self.brightness_location, self.brightness)
-        self.shadowIntensity_location = glGetUniformLocation(
-            self.program, "u_shadow_intensity"
-        )
-        glUniform1f(self.shadowIntensity_location, self.shadowIntensity)
-        self.global_light_dir_location = glGetUniformLocation(
-            self.program, "u_global_light_dir"
-        )
-        glUniform3f(self.global_light_dir_location, *self.global_light_dir)
-        self.move_cube_coord_location = glGetUniformLocation(
-            self.program, "u_move_cube_coord"
-        )
-        glUniform3f(self.move_cube_coord_location, *self.move_cube_coord)
-        self.move_cube_func_location = glGetUniformLocation(
-            self.program, "u_move_cube_func"
-        )
-        glUniform3i(self.move_cube_func_location, *self.move_cube_func)
-        self.reflection_steps_location = glGetUniformLocation(
-            self.program, "u_reflection_steps"
-        )
-        glUniform1i(self.reflection_steps_location, self.reflection_steps)
-        self.reflection_intensity_location = glGetUniformLocation(
-            self.program, "u_reflection_intensity"
-        )
-        glUniform1f(self.reflection_intensity_location, self.reflection_intensity)
+        self.uniforms.bind(self.program)
+        self.cone_prepass.bind(self.program)
+        self.uniforms.upload()
 
     def _read_shader(self, path: str) -> str:
         with open(path, "r") as file:
@@ -162,8 +157,8 @@ class WindowBlendCutMask:
         if keys[pg.K_e]:  # Move para cima
             self.camera_position += up * speed
 
-        # Atualiza a posição da câmera no shader
-        glUniform3f(self.camera_position_location, *self.camera_position)
+        # Atualiza a posição da câmera (enviada no próximo upload, se mudou)
+        self.uniforms.set("camera_position", self.camera_position)
 
     def _process_events(self) -> None:
         for event in pg.event.get():
@@ -175,11 +170,17 @@ class WindowBlendCutMask:
                 self.screen = pg.display.set_mode(
                     (self.width, self.height), OPENGL | DOUBLEBUF | RESIZABLE
                 )
-                glUniform2f(self.resolution_location, self.width, self.height)
+                self.uniforms.set("resolution", (self.width, self.height))
             if event.type == pg.KEYDOWN and event.key == pg.K_ESCAPE:
                 self.center_mouse = not self.center_mouse
                 pg.event.set_grab(self.center_mouse)
                 pg.mouse.set_visible(not self.center_mouse)
+            if event.type == pg.KEYDOWN and event.key == pg.K_F3:
+                self._toggle_frame_stats()
+            if event.type == pg.KEYDOWN and event.key == pg.K_o:
+                self._toggle_relaxation()
+            if event.type == pg.KEYDOWN and event.key == pg.K_p:
+                self.cone_prepass.toggle()
 
     def _process_mouse_movement(self):
         """Calcula e aplica o movimento do mouse para ajustar a rotação da câmera."""
@@ -197,11 +198,51 @@ class WindowBlendCutMask:
             )
 
             # Atualizar o shader com os valores novos
-            glUniform2f(self.camera_rotation_location, *self.camera_rotation)
+            self.uniforms.set("camera_rotation", self.camera_rotation)
 
             # Reposicionar o mouse no centro da tela
             pg.mouse.set_pos(self.width // 2, self.height // 2)
 
+    def _toggle_frame_stats(self) -> None:
+        self.show_frame_stats = not self.show_frame_stats
+        if self.show_frame_stats:
+            self.frame_stats_caption = pg.display.get_caption()[0]
+            self.frame_stats_shown = 0
+        else:
+            pg.display.set_caption(self.frame_stats_caption)
+
+    def _show_frame_stats(self) -> None:
+        """Põe os percentis dos tempos no título da janela (2 vezes por segundo)."""
+        now = pg.time.get_ticks()
+        if self.show_frame_stats and now - self.frame_stats_shown >= 500:
+            self.frame_stats_shown = now
+            steps = self._measure_steps()
+            prepass = self.cone_prepass
+            pg.display.set_caption(
+                f"{self.frame_stats.caption()} | {steps:.1f} steps/px, "
+                f"ω {self.uniforms.get('relaxation'):g}, "
+                f"prepass {f'1/{prepass.scale}' if prepass.enabled else 'off'}"
+            )
+
+    def _toggle_relaxation(self) -> None:
+        """Liga/desliga a over-relaxation e avisa os clientes ligados."""
+        relaxation = self.over_relaxation
+        if self.uniforms.get("relaxation") != 1.0:
+            relaxation = 1.0
+        self.uniforms.set("relaxation", relaxation)
+        self.broadcaster.publish([("change_relaxation", (relaxation,))])
+
+    def _measure_steps(self) -> float:
+        """Média de passos de RayMarch por píxel do frame atual (com o prepass)."""
+        return self.step_counter.measure(
+            self.uniforms, self.width, self.height, self._draw_quad
+        )
+
+    def _draw_quad(self) -> None:
+        glBindVertexArray(self.quad_vao)
+        glDrawElements(GL_TRIANGLES, 6, GL_UNSIGNED_INT, None)
+        glBindVertexArray(0)
+
     def render_loop(self) -> None:
         self.running = True
 
@@ -216,6 +257,7 @@ class WindowBlendCutMask:
         # Create and bind a Vertex Array Object (VAO)
         VAO = glGenVertexArrays(1)
         glBindVertexArray(VAO)
+        self.quad_vao = VAO
 
         # Create a Vertex Buffer Object (VBO)
         VBO = glGenBuffers(1)
@@ -236,48 +278,40 @@ class WindowBlendCutMask:
         glBindVertexArray(0)
 
         while self.running:
+            self.frame_stats.begin_frame()
             self._process_events()
             self._process_keys()
             self._process_mouse_movement()
+            self.frame_stats.mark("input")
 
             # Calcula o tempo em segundos
             current_time = pg.time.get_ticks() / 1000.0
             glUniform1f(self.time_location, current_time)
 
-            # Atualiza a força de blending com thread-safe lock
-            with self.lock:
-                glUniform1f(self.blend_strength_location, self.blend_strength)
-
-            with self.lock:
-                glUniform1f(self.brightness_location, self.brightness)
-
-            with self.lock:
-                glUniform1f(self.shadowIntensity_location, self.shadowIntensity)
-
-            with self.lock:
-                glUniform3f(self.global_light_dir_location, *self.global_light_dir)
-
-            with self.lock:
-                glUniform3f(self.move_cube_coord_location, *self.move_cube_coord)
-                glUniform3i(self.move_cube_func_location, *self.move_cube_func)
-
-            with self.lock:
-                glUniform1i(self.reflection_steps_location, self.reflection_steps)
-                glUniform1f(
-                    self.reflection_intensity_location, self.reflection_intensity
-                )
+            # Uma troca de comandos e um snapshot por frame; só os uniforms
+            # alterados são enviados
+            self._apply_staged_commands()
+            self.uniforms.upload()
 
             # OpenGL stuff
             glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+            self.frame_stats.mark("uniforms")
 
             # Bind the VAO and draw
+            self.frame_stats.begin_gpu()
+            self.cone_prepass.render(self.width, self.height, self._draw_quad)
             glBindVertexArray(VAO)
             glDrawElements(GL_TRIANGLES, len(indices), GL_UNSIGNED_INT, None)
             glBindVertexArray(0)
+            self.frame_stats.end_gpu()
+            self.frame_stats.mark("draw")
 
             # Atualiza a tela
             pg.display.flip()
+            self.frame_stats.mark("present")
             self.clock.tick(self.max_fps)
+            self.frame_stats.end_frame()
+            self._show_frame_stats()
 
     def run(self):
         threading.Thread(target=self.start_websocket_server, daemon=True).start()
@@ -287,55 +321,93 @@ class WindowBlendCutMask:
         asyncio.run(self.run_server())
 
     async def websocket_handler(self, websocket):
-        async for message in websocket:
+        # Só guarda o comando; é interpretado e aplicado no render loop
+        # (mensagens binárias trazem várias atualizações; ver protocol.py)
+        # O cliente recebe o estado atual e depois os deltas de todos os clientes
+        self.broadcaster.register(websocket)
+        try:
+            async for message in websocket:
+                try:
+                    updates = protocol.decode_message(message)
+                except ValueError as error:
+                    print(f"Invalid update received: {error}")
+                    continue
+                for command, value in updates:
+                    if command == "get_stats":
+                        # Pedido sem estado: responde já, só a quem perguntou
+                        await websocket.send(protocol.format_stats(self._stats()))
+                    else:
+                        self.staged.stage(command, value)
+        finally:
+            self.broadcaster.unregister(websocket)
+
+    def _apply_staged_commands(self):
+        """Aplica os comandos recebidos desde o último frame (último valor de cada)."""
+        accepted = []
+        for command, value in self.staged.take():
             try:
-                command, value = message.split(":")
-                if command == "change_blend_strength":
-                    new_blend_strength = float(value)
-
-                    with self.lock:
-                        self.blend_strength = new_blend_strength
-                elif command == "change_brightness":
-                    new_brightness = float(value)
-
-                    with self.lock:
-                        self.brightness = new_brightness
-                elif command == "change_shadowIntensity":
-                    new_shadowIntensity = float(value)
-
-                    with self.lock:
-                        self.shadowIntensity = new_shadowIntensity
-                elif command == "update_global_light_dir":
-                    new_global_light_dir = [
-                        float(number) for number in value[1:-1].split(",")
-                    ]
-
-                    with self.lock:
-                        self.global_light_dir = new_global_light_dir
-                elif command == "update_move_cube":
-                    new_move_cube_coord = [
-                        float(number[1:]) for number in value.split(",")
-                    ]
-
-                    new_move_cube_func = [
-                        int(number[:1]) for number in value.split(",")
-                    ]
-
-                    with self.lock:
-                        self.move_cube_coord = new_move_cube_coord
-                        self.move_cube_func = new_move_cube_func
-                elif command == "update_reflection":
-                    new_reflection_steps, new_reflection_intensity = [
-                        number for number in value[1:-1].split(",")
-                    ]
-
-                    with self.lock:
-                        self.reflection_steps = int(new_reflection_steps)
-                        self.reflection_intensity = float(new_reflection_intensity)
+                values = protocol.parse_value(command, value)
+                self._apply_command(command, values)
             except ValueError:
-                print(f"Invalid update received: {message}")
+                self.staged.rejected += 1
+                print(f"Invalid update received: {command}:{value}")
+            else:
+                accepted.append((command, values))
+        self.broadcaster.publish(accepted)
+
+    def _apply_command(self, command: str, values: tuple):
+        if command == "change_blend_strength":
+            self.uniforms.set("blend_strength", values[0])
+        elif command == "change_relaxation":
+            if not 1.0 <= values[0] < 2.0:
+                raise ValueError(f"Relaxation must be in [1, 2), got {values[0]}")
+            self.uniforms.set("relaxation", values[0])
+        elif command == "change_brightness":
+            self.uniforms.set("brightness", values[0])
+        elif command == "change_shadowIntensity":
+            self.uniforms.set("shadowIntensity", values[0])
+        elif command == "update_global_light_dir":
+            self.uniforms.set("global_light_dir", values)
+        elif command == "update_move_cube":
+            self.uniforms.update(
+                move_cube_coord=values[:3],
+                move_cube_func=[int(function) for function in values[3:]],
+            )
+        elif command == "update_reflection":
+            new_reflection_steps, new_reflection_intensity = values
+
+            self.uniforms.update(
+                reflection_steps=int(new_reflection_steps),
+                reflection_intensity=new_reflection_intensity,
+            )
+
+    def _stats(self) -> dict:
+        """Resposta ao get_stats: tempos por frame, comandos e clientes."""
+        return {
+            **self.frame_stats.summary(),
+            "commands": self.staged.stats(),
+            "clients": len(self.broadcaster.clients),
+            "steps_per_pixel": self.step_counter.steps_per_pixel,
+        }
+
+    def _state_updates(self) -> list:
+        """Estado atual como comandos (o snapshot inicial dos clientes)."""
+        get = self.uniforms.get
+        return [
+            ("change_blend_strength", get("blend_strength")),
+            ("change_relaxation", get("relaxation")),
+            ("change_brightness", get("brightness")),
+            ("change_shadowIntensity", get("shadowIntensity")),
+            ("update_global_light_dir", get("global_light_dir")),
+            ("update_move_cube", get("move_cube_coord") + get("move_cube_func")),
+            (
+                "update_reflection",
+                (get("reflection_steps"), get("reflection_intensity")),
+            ),
+        ]
 
     async def run_server(self):
+        self.broadcaster.start(self._state_updates())
         server = await websockets.serve(
             self.websocket_handler, WEBSOCKET_HOST, WEBSOCKET_PORT
         )
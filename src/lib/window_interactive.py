@@ -5,28 +5,117 @@ import asyncio
 import websockets
 import threading
 from OpenGL.GL import *
-from OpenGL.GL.shaders import compileProgram, compileShader
+import protocol
+from .frame_stats import FrameStats
+from .program_cache import load_program
+from .staged_commands import StagedCommands
+from .state_broadcast import StateBroadcaster
+from .step_counter import StepCounter
+from dsf import Cube, Sphere
+from .scene_programs import ScenePrograms
+from .uniform_state import UniformState
 
 WEBSOCKET_HOST = "localhost"
 WEBSOCKET_PORT = 8765
 
+MIN_PRIMITIVES = 32  # Capacidade inicial do uniform block (cresce com a cena)
+MAX_SPECIALIZED_PRIMITIVES = 64  # Cenas maiores usam o shader genérico
+PRIMITIVES_BINDING = 0  # Ponto de ligação do uniform block "Primitives"
+
+# Layout std140 de struct Primitive (ver glsl/window_interactive/fragment_shader.glsl)
+PRIMITIVE_DTYPE = np.dtype(
+    {
+        "names": ["type", "position", "scale", "radius"],
+        "formats": ["<i4", ("<f4", 3), ("<f4", 3), "<f4"],
+        "offsets": [0, 16, 32, 44],
+        "itemsize": 48,
+    }
+)
+
+
+def primitives_block_dtype(capacity: int) -> np.dtype:
+    """Layout std140 do uniform block "Primitives" com MAX_PRIMITIVES = capacity."""
+    return np.dtype(
+        {
+            "names": ["count", "primitives"],
+            "formats": ["<i4", (PRIMITIVE_DTYPE, capacity)],
+            "offsets": [0, 16],
+            "itemsize": 16 + PRIMITIVE_DTYPE.itemsize * capacity,
+        }
+    )
+
+
+def with_max_primitives(source: str, capacity: int) -> str:
+    """Define MAX_PRIMITIVES no fragment shader (logo a seguir a #version)."""
+    lines = source.splitlines()
+    for index, line in enumerate(lines):
+        if line.startswith("#version"):
+            lines.insert(index + 1, f"#define MAX_PRIMITIVES {capacity}")
+            break
+    return "\n".join(lines) + "\n"
+
 
 class Primitive:
-    def __init__(self, prim_type: int, position: list, radius: float):
+    def __init__(
+        self, prim_type: int, position: list, radius: float, scale: list = None
+    ):
         """
         prim_type: Tipo da primitiva (0 = esfera, 1 = cubo arredondado)
         position: Posição da primitiva (x, y, z)
-        scale: Escala ou dimensões (para cubos arredondados)
         radius: Raio (para esferas ou bordas arredondadas de cubos)
+        scale: Escala ou dimensões (para cubos arredondados, por omissão 1)
         """
         self.prim_type = prim_type
         self.position = position
         self.radius = radius
+        self.scale = scale if scale is not None else [1.0, 1.0, 1.0]
 
     def to_array(self):
         """Converte a primitiva para um array plano (compatível com uniformes OpenGL)."""
         return [self.prim_type, *self.position, *self.scale, self.radius]
 
+    def to_values(self) -> tuple:
+        """Valores da primitiva no protocolo de controlo (tipo, x, y, z, raio)."""
+        return (self.prim_type, *self.position, self.radius)
+
+    def to_record(self):
+        """Converte a primitiva para um registo de PRIMITIVE_DTYPE."""
+        return (self.prim_type, self.position, self.scale, self.radius)
+
+    def to_shape(self):
+        """
+        Converte a primitiva para uma forma dsf (None se o tipo não for suportado).
+
+        As primitivas juntam-se com smooth union de força u_blend_strength,
+        que continua a ser um uniform para não recompilar a cada alteração.
+        """
+        if self.prim_type == 0:
+            return Sphere(
+                operation="blend",
+                blendStrength="u_blend_strength",
+                position=self.position,
+                radius=self.radius,
+            )
+        if self.prim_type == 1:
+            return Cube(
+                operation="blend",
+                blendStrength="u_blend_strength",
+                position=self.position,
+                size=[2.0 * s for s in self.scale],
+                roundness=self.radius,
+            )
+        return None
+
+    @classmethod
+    def from_values(cls, values) -> list:
+        """Primitivas a partir de valores em grupos de (tipo, x, y, z, raio)."""
+        return [
+            cls(int(prim_type), [x, y, z], radius)
+            for prim_type, x, y, z, radius in zip(
+                *[iter(values)] * protocol.PRIMITIVE_VALUES
+            )
+        ]
+
 
 class WindowInteractive:
 
@@ -40,10 +129,13 @@ class WindowInteractive:
         self.running = False
         self.renderer = renderer
         self.clock = pg.time.Clock()
-        self.program = None
 
-        # Shader stuff
-        self.resolution_location = None
+        # Tempos por frame; F3 mostra os percentis no título da janela
+        self.frame_stats = FrameStats()
+        self.show_frame_stats = False
+        self.frame_stats_caption = ""
+        self.frame_stats_shown = 0  # Última atualização do título (ms)
+        self.program = None
 
         # Camera stuff
         self.camera_position = [0.0, 1.0, 0.0]  # Posição inicial da câmera
@@ -51,12 +143,63 @@ class WindowInteractive:
         self.mouse_sensitivity = 0.005
         self.center_mouse = True
 
-        # Blending strength (thread-safe)
-        self.blend_strength = 2.0
-        self.lock = threading.Lock()  # Para sincronização segura
+        self.lock = threading.Lock()  # Protege a lista de primitivas
 
         # Primitives
         self.primitives = []  # Lista para armazenar primitivas
+        self.primitives_ubo = None
+        self.primitives_capacity = MIN_PRIMITIVES  # MAX_PRIMITIVES do shader genérico
+        # Limite do driver (GL_MAX_UNIFORM_BLOCK_SIZE), lido em _shader_init
+        self.max_primitives = MIN_PRIMITIVES
+        self.primitives_block = np.zeros(
+            1, dtype=primitives_block_dtype(self.primitives_capacity)
+        )
+        self.primitives_dirty = True  # Só reenvia o bloco quando a lista muda
+
+        # Programas especializados para a lista de primitivas atual (dsf.compiler);
+        # o programa genérico (ciclo sobre o uniform block) fica como alternativa
+        self.specialize_scene = True
+        self.scene_programs = None
+        self.generic_program = None
+
+        # Normais: 0 = diferenças centrais, 1 = tetraédrico, 2 = gradiente analítico
+        self.normal_mode = 2
+
+        # Uniforms partilhados com a thread do websocket (thread-safe);
+        # o render loop só envia os que mudaram
+        self.uniforms = UniformState()
+        self.uniforms.declare("resolution", "u_resolution", "2f", (width, height))
+        self.uniforms.declare(
+            "camera_position", "u_camera_position", "3f", self.camera_position
+        )
+        self.uniforms.declare(
+            "camera_rotation", "u_camera_rotation", "2f", self.camera_rotation
+        )
+        self.uniforms.declare("blend_strength", "u_blend_strength", "1f", 2.0)
+        self.uniforms.declare("normal_mode", "u_normal_mode", "1i", self.normal_mode)
+        self.uniforms.declare("relaxation", "u_relaxation", "1f", 1.0)
+        self.uniforms.declare("output_steps", "u_output_steps", "1i", 0)
+
+        # O alterna a over-relaxation do RayMarch; com F3, o título mostra
+        # também a média de passos por píxel (medida num frame extra)
+        self.over_relaxation = 1.5
+        self.step_counter = StepCounter()
+        self.quad_vao = None
+
+        # Comandos do websocket à espera do próximo frame; os que mudam a lista
+        # de primitivas não são juntados e aplicam-se pela ordem de chegada
+        self.staged = StagedCommands(
+            ordered=(
+                "add_primitive",
+                "add_primitives",
+                "replace_scene",
+                "remove_primitive",
+                "clear",
+            )
+        )
+
+        # Estado difundido para todos os clientes ligados (snapshot + deltas)
+        self.broadcaster = StateBroadcaster()
 
     def create_window(self) -> None:
         pg.init()
@@ -83,42 +226,77 @@ class WindowInteractive:
             "glsl/window_interactive/fragment_shader.glsl"
         )
 
-        # Compile shaders
-        vertex_shader = compileShader(vertex_shader_source, GL_VERTEX_SHADER)
-        fragment_shader = compileShader(fragment_shader_source, GL_FRAGMENT_SHADER)
+        self.vertex_shader_source = vertex_shader_source
+        self.fragment_shader_source = fragment_shader_source
 
-        # Create and bind a VAO for validation
-        VAO = glGenVertexArrays(1)
-        glBindVertexArray(VAO)
-
-        # Compile the shader program
-        self.program = compileProgram(vertex_shader, fragment_shader)
+        # Número de primitivas que cabem num uniform block neste driver
+        max_block_size = int(glGetIntegerv(GL_MAX_UNIFORM_BLOCK_SIZE))
+        self.max_primitives = (max_block_size - 16) // PRIMITIVE_DTYPE.itemsize
 
-        # Unbind the VAO after validation
-        glBindVertexArray(0)
+        # Compile the shader program (or load its binary from the on-disk cache)
+        self.program = self._generic_program(self.primitives_capacity)
 
         glUseProgram(self.program)
+        self.generic_program = self.program
+        self.scene_programs = ScenePrograms(
+            vertex_shader_source, fragment_shader_source
+        )
 
         # Variable locations and first-time setting
-        self.resolution_location = glGetUniformLocation(self.program, "u_resolution")
-        glUniform2f(self.resolution_location, self.width, self.height)
-        self.camera_position_location = glGetUniformLocation(
-            self.program, "u_camera_position"
-        )
-        glUniform3f(self.camera_position_location, *self.camera_position)
-        self.camera_rotation_location = glGetUniformLocation(
-            self.program, "u_camera_rotation"
-        )
-        glUniform2f(self.camera_rotation_location, *self.camera_rotation)
         self.time_location = glGetUniformLocation(self.program, "u_time")
-        self.blend_strength_location = glGetUniformLocation(
-            self.program, "u_blend_strength"
+        self.uniforms.bind(self.program)
+        self.uniforms.upload()
+
+        # Uniform block das primitivas (u_primitive_count + u_primitives)
+        self.primitives_ubo = glGenBuffers(1)
+        self._allocate_primitives_ubo()
+
+    def _generic_program(self, capacity: int):
+        """Programa com o ciclo sobre o uniform block, para capacity primitivas."""
+        fragment_source = with_max_primitives(self.fragment_shader_source, capacity)
+        program = load_program(self.vertex_shader_source, fragment_source)
+        block_index = glGetUniformBlockIndex(program, "Primitives")
+        glUniformBlockBinding(program, block_index, PRIMITIVES_BINDING)
+        return program
+
+    def _allocate_primitives_ubo(self):
+        """(Re)cria o buffer do uniform block com a capacidade atual."""
+        self.primitives_block = np.zeros(
+            1, dtype=primitives_block_dtype(self.primitives_capacity)
         )
-        glUniform1f(self.blend_strength_location, self.blend_strength)
-
-        self.primitive_count_location = glGetUniformLocation(
-            self.program, "u_primitive_count"
+        glBindBuffer(GL_UNIFORM_BUFFER, self.primitives_ubo)
+        glBufferData(
+            GL_UNIFORM_BUFFER,
+            self.primitives_block.nbytes,
+            self.primitives_block,
+            GL_DYNAMIC_DRAW,
         )
+        glBindBufferBase(GL_UNIFORM_BUFFER, PRIMITIVES_BINDING, self.primitives_ubo)
+        glBindBuffer(GL_UNIFORM_BUFFER, 0)
+        self.primitives_dirty = True
+
+    def _reserve_primitives(self, count: int):
+        """
+        Garante que o uniform block tem espaço para count primitivas.
+
+        A capacidade cresce em potências de 2 (até ao limite do driver), o que
+        obriga a recompilar o shader genérico com outro MAX_PRIMITIVES.
+        """
+        if count <= self.primitives_capacity:
+            return
+
+        capacity = self.primitives_capacity
+        while capacity < count:
+            capacity *= 2
+        capacity = min(capacity, self.max_primitives)
+
+        old_program = self.generic_program
+        self.generic_program = self._generic_program(capacity)
+        self.primitives_capacity = capacity
+        self._allocate_primitives_ubo()
+        if self.program == old_program:
+            self._use_program(self.generic_program)
+        glDeleteProgram(old_program)
 
     def _read_shader(self, path: str) -> str:
         with open(path, "r") as file:
@@ -151,8 +329,8 @@ class WindowInteractive:
         if keys[pg.K_e]:  # Move para cima
             self.camera_position += up * speed
 
-        # Atualiza a posição da câmera no shader
-        glUniform3f(self.camera_position_location, *self.camera_position)
+        # Atualiza a posição da câmera (enviada no próximo upload, se mudou)
+        self.uniforms.set("camera_position", self.camera_position)
 
     def _process_events(self) -> None:
         for event in pg.event.get():
@@ -164,11 +342,15 @@ class WindowInteractive:
                 self.screen = pg.display.set_mode(
                     (self.width, self.height), OPENGL | DOUBLEBUF | RESIZABLE
                 )
-                glUniform2f(self.resolution_location, self.width, self.height)
+                self.uniforms.set("resolution", (self.width, self.height))
             if event.type == pg.KEYDOWN and event.key == pg.K_ESCAPE:
                 self.center_mouse = not self.center_mouse
                 pg.event.set_grab(self.center_mouse)
                 pg.mouse.set_visible(not self.center_mouse)
+            if event.type == pg.KEYDOWN and event.key == pg.K_F3:
+                self._toggle_frame_stats()
+            if event.type == pg.KEYDOWN and event.key == pg.K_o:
+                self._toggle_relaxation()
 
     def _process_mouse_movement(self):
         """Calcula e aplica o movimento do mouse para ajustar a rotação da câmera."""
@@ -186,31 +368,98 @@ class WindowInteractive:
             )
 
             # Atualizar o shader com os valores novos
-            glUniform2f(self.camera_rotation_location, *self.camera_rotation)
+            self.uniforms.set("camera_rotation", self.camera_rotation)
 
             # Reposicionar o mouse no centro da tela
             pg.mouse.set_pos(self.width // 2, self.height // 2)
 
-    def _update_blend_strength(self):
-        """Atualiza o valor de força de mistura no shader."""
-        with self.lock:
-            glUniform1f(self.blend_strength_location, self.blend_strength)
+    def _pack_primitives(self) -> np.ndarray:
+        """Preenche o bloco std140 com as primitivas atuais e devolve-o."""
+        block = self.primitives_block[0]
+        block["count"] = len(self.primitives)
+        block["primitives"][: len(self.primitives)] = [
+            prim.to_record() for prim in self.primitives
+        ]
+        return self.primitives_block
 
     def _send_primitives_to_shader(self):
-        """Envia todas as primitivas para o shader."""
-        for i, prim in enumerate(self.primitives):
-            loc_type = glGetUniformLocation(self.program, f"u_primitives[{i}].type")
-            loc_position = glGetUniformLocation(
-                self.program, f"u_primitives[{i}].position"
+        """Envia as primitivas para o shader, só quando a lista mudou."""
+        with self.lock:
+            if not self.primitives_dirty:
+                return
+            data = self._pack_primitives()
+            primitives = list(self.primitives)
+            self.primitives_dirty = False
+
+        glBindBuffer(GL_UNIFORM_BUFFER, self.primitives_ubo)
+        glBufferSubData(GL_UNIFORM_BUFFER, 0, data.nbytes, data)
+        glBindBuffer(GL_UNIFORM_BUFFER, 0)
+
+        self._use_program(self._scene_program(primitives))
+
+    def _scene_program(self, primitives):
+        """Programa especializado para as primitivas dadas (ou o genérico)."""
+        shapes = [prim.to_shape() for prim in primitives]
+        shapes = [shape for shape in shapes if shape is not None]
+        if (
+            not self.specialize_scene
+            or not shapes
+            or len(shapes) > MAX_SPECIALIZED_PRIMITIVES
+        ):
+            return self.generic_program
+
+        try:
+            return self.scene_programs.get(shapes)
+        except RuntimeError as error:
+            print(f"Scene specialization failed, using the generic shader: {error}")
+            self.specialize_scene = False
+            return self.generic_program
+
+    def _use_program(self, program):
+        """Troca de programa e marca todos os uniforms para reenvio."""
+        if program == self.program:
+            return
+        self.program = program
+        glUseProgram(self.program)
+        self.time_location = glGetUniformLocation(self.program, "u_time")
+        self.uniforms.bind(self.program)
+
+    def _toggle_frame_stats(self) -> None:
+        self.show_frame_stats = not self.show_frame_stats
+        if self.show_frame_stats:
+            self.frame_stats_caption = pg.display.get_caption()[0]
+            self.frame_stats_shown = 0
+        else:
+            pg.display.set_caption(self.frame_stats_caption)
+
+    def _show_frame_stats(self) -> None:
+        """Põe os percentis dos tempos no título da janela (2 vezes por segundo)."""
+        now = pg.time.get_ticks()
+        if self.show_frame_stats and now - self.frame_stats_shown >= 500:
+            self.frame_stats_shown = now
+            steps = self._measure_steps()
+            pg.display.set_caption(
+                f"{self.frame_stats.caption()} | {steps:.1f} steps/px, "
+                f"ω {self.uniforms.get('relaxation'):g}"
             )
-            loc_radius = glGetUniformLocation(self.program, f"u_primitives[{i}].radius")
 
-            # Atualizando os valores dos uniforms para cada primitiva
-            glUniform1i(loc_type, prim.prim_type)
-            glUniform3f(loc_position, *prim.position)
-            glUniform1f(loc_radius, prim.radius)
+    def _toggle_relaxation(self) -> None:
+        """Liga/desliga a over-relaxation e avisa os clientes ligados."""
+        relaxation = self.over_relaxation
+        if self.uniforms.get("relaxation") != 1.0:
+            relaxation = 1.0
+        self.uniforms.set("relaxation", relaxation)
+        self.broadcaster.publish([("change_relaxation", (relaxation,))])
 
-        glUniform1i(self.primitive_count_location, len(self.primitives))
+    def _measure_steps(self) -> float:
+        """Média de passos de RayMarch por píxel do frame atual."""
+
+        def draw():
+            glBindVertexArray(self.quad_vao)
+            glDrawElements(GL_TRIANGLES, 6, GL_UNSIGNED_INT, None)
+            glBindVertexArray(0)
+
+        return self.step_counter.measure(self.uniforms, self.width, self.height, draw)
 
     def render_loop(self) -> None:
         self.running = True
@@ -226,6 +475,7 @@ class WindowInteractive:
         # Create and bind a Vertex Array Object (VAO)
         VAO = glGenVertexArrays(1)
         glBindVertexArray(VAO)
+        self.quad_vao = VAO
 
         # Create a Vertex Buffer Object (VBO)
         VBO = glGenBuffers(1)
@@ -246,26 +496,34 @@ class WindowInteractive:
         glBindVertexArray(0)
 
         while self.running:
+            self.frame_stats.begin_frame()
             # Processa eventos e entradas do usuário
             self._process_events()
             self._process_keys()
             self._process_mouse_movement()
+            self.frame_stats.mark("input")
 
-            with self.lock:
-                glUniform1f(self.blend_strength_location, self.blend_strength)
-            # Renderiza a cena
+            # Renderiza a cena; só os uniforms e primitivas alterados são enviados
             glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
-            self._update_blend_strength()
+            self._apply_staged_commands()
             self._send_primitives_to_shader()
+            self.uniforms.upload()
+            self.frame_stats.mark("uniforms")
 
             # Desenho da cena
+            self.frame_stats.begin_gpu()
             glBindVertexArray(VAO)
             glDrawElements(GL_TRIANGLES, len(indices), GL_UNSIGNED_INT, None)
             glBindVertexArray(0)
+            self.frame_stats.end_gpu()
+            self.frame_stats.mark("draw")
 
             # Atualiza a tela
             pg.display.flip()
+            self.frame_stats.mark("present")
             self.clock.tick(self.max_fps)
+            self.frame_stats.end_frame()
+            self._show_frame_stats()
 
     def run(self):
         threading.Thread(target=self.start_websocket_server, daemon=True).start()
@@ -275,31 +533,107 @@ class WindowInteractive:
         asyncio.run(self.run_server())
 
     async def websocket_handler(self, websocket):
-        async for message in websocket:
+        # Só guarda o comando; é interpretado e aplicado no render loop
+        # (mensagens binárias trazem várias atualizações; ver protocol.py)
+        # O cliente recebe o estado atual e depois os deltas de todos os clientes
+        self.broadcaster.register(websocket)
+        try:
+            async for message in websocket:
+                try:
+                    updates = protocol.decode_message(message)
+                except ValueError as error:
+                    print(f"Invalid command received: {error}")
+                    continue
+                for command, value in updates:
+                    if command == "get_stats":
+                        # Pedido sem estado: responde já, só a quem perguntou
+                        await websocket.send(protocol.format_stats(self._stats()))
+                    else:
+                        self.staged.stage(command, value)
+        finally:
+            self.broadcaster.unregister(websocket)
+
+    def _apply_staged_commands(self):
+        """Aplica os comandos recebidos desde o último frame."""
+        accepted = []
+        for command, value in self.staged.take():
             try:
-                command, value = message.split(":")
-                if command == "change_blend_strength":
-                    new_blend_strength = float(value)
-
-                    with self.lock:
-                        self.blend_strength = new_blend_strength
-                elif command == "add_primitive":
-                    prim_type, x, y, z, radius = map(float, value.split(","))
-                    new_primitive = Primitive(int(prim_type), [x, y, z], radius)
-
-                    with self.lock:
-                        self.add_primitive(new_primitive)
-            except ValueError:
-                print(f"Invalid command received: {message}")
+                values = protocol.parse_value(command, value)
+                self._apply_command(command, values)
+            except ValueError as error:
+                self.staged.rejected += 1
+                print(f"Invalid command received: {command} ({error})")
+            else:
+                accepted.append((command, values))
+        self.broadcaster.publish(accepted)
+
+    def _apply_command(self, command: str, values: tuple):
+        if command == "change_blend_strength":
+            self.uniforms.set("blend_strength", values[0])
+        elif command == "change_relaxation":
+            if not 1.0 <= values[0] < 2.0:
+                raise ValueError(f"Relaxation must be in [1, 2), got {values[0]}")
+            self.uniforms.set("relaxation", values[0])
+        elif command in ("add_primitive", "add_primitives"):
+            self.add_primitives(Primitive.from_values(values))
+        elif command == "replace_scene":
+            self.replace_scene(Primitive.from_values(values))
+        elif command == "remove_primitive":
+            self.remove_primitive(int(values[0]))
+        elif command == "clear":
+            self.replace_scene([])
 
     def add_primitive(self, primitive: Primitive):
         """Adiciona uma primitiva à lista de primitivas."""
-        if len(self.primitives) < 32:  # Limite de primitivas no shader
-            self.primitives.append(primitive)
-        else:
-            print("Número máximo de primitivas atingido!")
+        self.add_primitives([primitive])
+
+    def add_primitives(self, primitives: list):
+        """Acrescenta primitivas à cena (todas ou nenhuma)."""
+        self.replace_scene(self.primitives + primitives)
+
+    def replace_scene(self, primitives: list):
+        """Substitui a lista de primitivas (aplicada no próximo frame)."""
+        if len(primitives) > self.max_primitives:
+            raise ValueError(
+                f"{len(primitives)} primitives requested, "
+                f"the shader supports at most {self.max_primitives}"
+            )
+
+        self._reserve_primitives(len(primitives))
+        with self.lock:
+            self.primitives = list(primitives)
+            self.primitives_dirty = True
+
+    def remove_primitive(self, index: int):
+        """Remove a primitiva na posição index."""
+        if not 0 <= index < len(self.primitives):
+            raise ValueError(f"No primitive at index {index}")
+
+        with self.lock:
+            del self.primitives[index]
+            self.primitives_dirty = True
+
+    def _stats(self) -> dict:
+        """Resposta ao get_stats: tempos por frame, comandos e clientes."""
+        return {
+            **self.frame_stats.summary(),
+            "commands": self.staged.stats(),
+            "clients": len(self.broadcaster.clients),
+            "steps_per_pixel": self.step_counter.steps_per_pixel,
+        }
+
+    def _state_updates(self) -> list:
+        """Estado atual como comandos (o snapshot inicial dos clientes)."""
+        with self.lock:
+            primitives = [prim.to_values() for prim in self.primitives]
+        return [
+            ("change_blend_strength", self.uniforms.get("blend_strength")),
+            ("change_relaxation", self.uniforms.get("relaxation")),
+            ("replace_scene", tuple(v for values in primitives for v in values)),
+        ]
 
     async def run_server(self):
+        self.broadcaster.start(self._state_updates())
         server = await websockets.serve(
             self.websocket_handler, WEBSOCKET_HOST, WEBSOCKET_PORT
         )
@@ -3,7 +3,9 @@ from pygame.locals import *
 import numpy as np
 import threading
 from OpenGL.GL import *
-from OpenGL.GL.shaders import compileProgram, compileShader
+from .cone_prepass import ConePrepass
+from .frame_stats import FrameStats
+from .program_cache import load_program
 
 
 class WindowMandelbulb:
@@ -18,6 +20,12 @@ class WindowMandelbulb:
         self.running = False
         self.renderer = renderer
         self.clock = pg.time.Clock()
+
+        # Tempos por frame; F3 mostra os percentis no título da janela
+        self.frame_stats = FrameStats()
+        self.show_frame_stats = False
+        self.frame_stats_caption = ""
+        self.frame_stats_shown = 0  # Última atualização do título (ms)
         self.program = None
 
         # Shader stuff
@@ -45,6 +53,22 @@ class WindowMandelbulb:
         self.fractalPower = 10
         self.fractalGrow = 1
 
+        # Normais: 0 = diferenças centrais, 1 = tetraédrico (sem gradiente analítico)
+        self.normal_mode = 1
+
+        # Nível de detalhe: epsilon e iterações adaptados à distância (L liga/desliga)
+        self.lod_enabled = False
+        self.lod_cone = 1.0  # Epsilon mínimo em larguras do cone do píxel
+        self.lod_iteration_falloff = 0.1  # Iterações = 50 / (1 + falloff * distância)
+
+        # Over-relaxation do ciclo principal (O liga/desliga; 1 = sphere tracing normal)
+        self.relaxation = 1.0
+        self.over_relaxation = 1.5
+
+        # Prepass de cone marching a 1/8 da resolução (P liga/desliga)
+        self.cone_prepass = ConePrepass(scale=8)
+        self.quad_vao = None
+
     def create_window(self) -> None:
         pg.init()
         pg.display.gl_set_attribute(pg.GL_CONTEXT_MAJOR_VERSION, 3)
@@ -70,19 +94,8 @@ class WindowMandelbulb:
             "glsl/window_mandelbulb/fragment_shader.glsl"
         )
 
-        # Compile shaders
-        vertex_shader = compileShader(vertex_shader_source, GL_VERTEX_SHADER)
-        fragment_shader = compileShader(fragment_shader_source, GL_FRAGMENT_SHADER)
-
-        # Create and bind a VAO for validation
-        VAO = glGenVertexArrays(1)
-        glBindVertexArray(VAO)
-
-        # Compile the shader program
-        self.program = compileProgram(vertex_shader, fragment_shader)
-
-        # Unbind the VAO after validation
-        glBindVertexArray(0)
+        # Compile the shader program (or load its binary from the on-disk cache)
+        self.program = load_program(vertex_shader_source, fragment_shader_source)
 
         glUseProgram(self.program)
 
@@ -129,6 +142,18 @@ class WindowMandelbulb:
             self.program, "plusIteration"
         )
 
+        self.normal_mode_location = glGetUniformLocation(self.program, "u_normal_mode")
+        glUniform1i(self.normal_mode_location, self.normal_mode)
+
+        self.lod_cone_location = glGetUniformLocation(self.program, "u_lod_cone")
+        self.lod_iteration_falloff_location = glGetUniformLocation(
+            self.program, "u_lod_iteration_falloff"
+        )
+        self._update_lod()
+        self.relaxation_location = glGetUniformLocation(self.program, "u_relaxation")
+        glUniform1f(self.relaxation_location, self.relaxation)
+        self.cone_prepass.bind(self.program)
+
     def _read_shader(self, path: str) -> str:
         with open(path, "r") as file:
             return file.read()
@@ -177,6 +202,15 @@ class WindowMandelbulb:
                 self.center_mouse = not self.center_mouse
                 pg.event.set_grab(self.center_mouse)
                 pg.mouse.set_visible(not self.center_mouse)
+            if event.type == pg.KEYDOWN and event.key == pg.K_F3:
+                self._toggle_frame_stats()
+            if event.type == pg.KEYDOWN and event.key == pg.K_l:
+                self.lod_enabled = not self.lod_enabled
+                self._update_lod()
+            if event.type == pg.KEYDOWN and event.key == pg.K_p:
+                self.cone_prepass.toggle()
+            if event.type == pg.KEYDOWN and event.key == pg.K_o:
+                self._toggle_relaxation()
 
     def _process_mouse_movement(self):
         """Calcula e aplica o movimento do mouse para ajustar a rotação da câmera."""
@@ -199,6 +233,39 @@ class WindowMandelbulb:
             # Reposicionar o mouse no centro da tela
             pg.mouse.set_pos(self.width // 2, self.height // 2)
 
+    def _update_lod(self) -> None:
+        """Envia os fatores do LOD ao shader (0 quando está desligado)."""
+        enabled = float(self.lod_enabled)
+        glUniform1f(self.lod_cone_location, self.lod_cone * enabled)
+        glUniform1f(
+            self.lod_iteration_falloff_location, self.lod_iteration_falloff * enabled
+        )
+
+    def _toggle_relaxation(self) -> None:
+        """Alterna ω entre 1 (sphere tracing normal) e over_relaxation."""
+        self.relaxation = self.over_relaxation if self.relaxation == 1.0 else 1.0
+        glUniform1f(self.relaxation_location, self.relaxation)
+
+    def _toggle_frame_stats(self) -> None:
+        self.show_frame_stats = not self.show_frame_stats
+        if self.show_frame_stats:
+            self.frame_stats_caption = pg.display.get_caption()[0]
+            self.frame_stats_shown = 0
+        else:
+            pg.display.set_caption(self.frame_stats_caption)
+
+    def _show_frame_stats(self) -> None:
+        """Põe os percentis dos tempos no título da janela (2 vezes por segundo)."""
+        now = pg.time.get_ticks()
+        if self.show_frame_stats and now - self.frame_stats_shown >= 500:
+            self.frame_stats_shown = now
+            pg.display.set_caption(self.frame_stats.caption())
+
+    def _draw_quad(self) -> None:
+        glBindVertexArray(self.quad_vao)
+        glDrawElements(GL_TRIANGLES, 6, GL_UNSIGNED_INT, None)
+        glBindVertexArray(0)
+
     def render_loop(self) -> None:
         self.running = True
 
@@ -213,6 +280,7 @@ class WindowMandelbulb:
         # Create and bind a Vertex Array Object (VAO)
         VAO = glGenVertexArrays(1)
         glBindVertexArray(VAO)
+        self.quad_vao = VAO
 
         # Create a Vertex Buffer Object (VBO)
         VBO = glGenBuffers(1)
@@ -235,9 +303,11 @@ class WindowMandelbulb:
         previous_time = pg.time.get_ticks() / 1000.0
 
         while self.running:
+            self.frame_stats.begin_frame()
             self._process_events()
             self._process_keys()
             self._process_mouse_movement()
+            self.frame_stats.mark("input")
 
             # Calcula o tempo em segundos
             # Calculate the current time and delta time
@@ -254,15 +324,23 @@ class WindowMandelbulb:
 
             # OpenGL stuff
             glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+            self.frame_stats.mark("uniforms")
 
             # Bind the VAO and draw
+            self.frame_stats.begin_gpu()
+            self.cone_prepass.render(self.width, self.height, self._draw_quad)
             glBindVertexArray(VAO)
             glDrawElements(GL_TRIANGLES, len(indices), GL_UNSIGNED_INT, None)
             glBindVertexArray(0)
+            self.frame_stats.end_gpu()
+            self.frame_stats.mark("draw")
 
             # Atualiza a tela
             pg.display.flip()
+            self.frame_stats.mark("present")
             self.clock.tick(self.max_fps)
+            self.frame_stats.end_frame()
+            self._show_frame_stats()
 
     def run(self):
         self.render_loop()
@@ -1,228 +1,43 @@
-﻿import glfw
+﻿import argparse
+import time
+import glfw
 from OpenGL.GL import *
+from OpenGL.GL.shaders import compileProgram, compileShader
 import numpy as np
-from dsf import Sphere, Cube
-from numba import jit
-
-
-@jit(nopython=True)
-def norm(vector):
-    return np.sqrt(np.sum(vector**2))
-
-
-@jit(nopython=True)
-def calculate_distance(
-    point, object_positions, object_sizes, object_colors, object_types
-):
-    """
-    Calcula a menor distância do ponto até os objetos na cena.
-
-    :param point: Posição atual (np.ndarray).
-    :param object_positions: Array de posições dos objetos.
-    :param object_sizes: Array de tamanhos/raios dos objetos.
-    :param object_colors: Array de cores dos objetos.
-    :param object_types: Array de tipos dos objetos (0=sphere, 1=cube).
-    :return: (distância mínima, cor do objeto mais próximo).
-    """
-    min_distance = float("inf")
-    color = np.array([0.0, 0.0, 0.0])  # Cor de fundo
-
-    for i in range(len(object_positions)):
-        if object_types[i] == 0:  # Sphere
-            dist = norm(point - object_positions[i]) - object_sizes[i]
-        elif object_types[i] == 1:  # Cube
-            half_size = np.array([object_sizes[i] / 2] * 3)
-            delta = np.abs(point - object_positions[i]) - half_size
-            outside = np.sqrt(np.sum(np.maximum(delta, 0) ** 2))
-            inside = np.max(np.minimum(delta, 0))
-            dist = outside + inside
-        else:
-            continue
-
-        if dist < min_distance:
-            min_distance = dist
-            color = object_colors[i]
-
-    return min_distance, color
-
-
-@jit(nopython=True)
-def estimate_normal(
-    point, object_positions, object_sizes, object_types, object_colors, epsilon
-):
-    """
-    Estima a normal da superfície em um ponto.
-
-    :param point: Ponto na superfície (np.ndarray).
-    :param object_positions: Array de posições dos objetos.
-    :param object_sizes: Array de tamanhos/raios dos objetos.
-    :param object_types: Array de tipos dos objetos (0=sphere, 1=cube).
-    :param object_colors: Array de cores dos objetos.
-    :param epsilon: Delta pequeno para aproximação.
-    :return: Vetor normal (np.ndarray).
-    """
-    dx = np.array([epsilon, 0, 0])
-    dy = np.array([0, epsilon, 0])
-    dz = np.array([0, 0, epsilon])
-
-    nx, _ = calculate_distance(
-        point + dx, object_positions, object_sizes, object_colors, object_types
-    )
-    px, _ = calculate_distance(
-        point - dx, object_positions, object_sizes, object_colors, object_types
-    )
-    ny, _ = calculate_distance(
-        point + dy, object_positions, object_sizes, object_colors, object_types
-    )
-    py, _ = calculate_distance(
-        point - dy, object_positions, object_sizes, object_colors, object_types
-    )
-    nz, _ = calculate_distance(
-        point + dz, object_positions, object_sizes, object_colors, object_types
-    )
-    pz, _ = calculate_distance(
-        point - dz, object_positions, object_sizes, object_colors, object_types
-    )
-
-    normal = np.array([nx - px, ny - py, nz - pz])
-    return normal / norm(normal)
-
-
-@jit(nopython=True)
-def calculate_lighting(
-    point, normal, color, light_position, light_color, ambient_light
-):
-    """
-    Calcula a iluminação de um ponto na superfície.
-
-    :param point: Ponto na superfície (np.ndarray).
-    :param normal: Normal da superfície (np.ndarray).
-    :param color: Cor do objeto (np.ndarray).
-    :param light_position: Posição da luz (np.ndarray).
-    :param light_color: Cor da luz (np.ndarray).
-    :param ambient_light: Intensidade da luz ambiente (np.ndarray).
-    :return: Cor iluminada (np.ndarray).
-    """
-    # Direção da luz
-    light_dir = light_position - point
-    light_dir /= norm(light_dir)
-
-    # Intensidade difusa
-    diffuse_intensity = max(0, np.dot(normal, light_dir))
-    diffuse = color * diffuse_intensity * light_color
-
-    # Luz ambiente
-    ambient = color * ambient_light
-
-    # Cor final
-    return diffuse + ambient
-
-
-@jit(nopython=True)
-def ray_march(
-    ray_origin,
-    ray_direction,
-    object_positions,
-    object_sizes,
-    object_colors,
-    object_types,
-    max_distance,
-    epsilon,
-    max_steps,
-    light_position,
-    light_color,
-    ambient_light,
-):
-    """
-    Realiza o Ray Marching para encontrar interseções com objetos na cena, incluindo iluminação.
-
-    :param ray_origin: Origem do raio (np.ndarray).
-    :param ray_direction: Direção do raio (np.ndarray).
-    :param object_positions: Array de posições dos objetos.
-    :param object_sizes: Array de tamanhos/raios dos objetos.
-    :param object_colors: Array de cores dos objetos.
-    :param object_types: Array de tipos dos objetos (0=sphere, 1=cube).
-    :param max_distance: Distância máxima do raio.
-    :param epsilon: Tolerância para considerar uma interseção.
-    :param max_steps: Número máximo de passos.
-    :param light_position: Posição da luz (np.ndarray).
-    :param light_color: Cor da luz (np.ndarray).
-    :param ambient_light: Intensidade da luz ambiente (np.ndarray).
-    :return: Cor iluminada ou cor de fundo.
-    """
-    distance_traveled = 0.0
-
-    for _ in range(max_steps):
-        current_position = ray_origin + ray_direction * distance_traveled
-        min_distance, color = calculate_distance(
-            current_position,
-            object_positions,
-            object_sizes,
-            object_colors,
-            object_types,
-        )
+from cpu import Renderer, ResolutionController
 
-        if min_distance < epsilon:
-            # Estimar a normal na superfície
-            normal = estimate_normal(
-                current_position,
-                object_positions,
-                object_sizes,
-                object_types,
-                object_colors,
-                epsilon,
-            )
-            # Calcular iluminação
-            return calculate_lighting(
-                current_position,
-                normal,
-                color,
-                light_position,
-                light_color,
-                ambient_light,
-            )
 
-        distance_traveled += min_distance
-        if distance_traveled > max_distance:
-            break
-
-    return np.array([0.0, 0.0, 0.0])  # Cor de fundo
-
-
-class Main:
+class Main(Renderer):
     def __init__(self):
+        super().__init__()
         self.window = None
         self.resolution = 300
-        self.camera_position = np.array([0.0, 0.0, 0.0])
-        self.camera_direction = np.array([0.0, 0.0, 1.0])
-        self.light_position = np.array([5.0, 5.0, -5.0])
-        self.light_color = np.array([1.0, 1.0, 1.0])
-        self.ambient_light = np.array([0.2, 0.2, 0.2])
         self.move_speed = 0.05
-        self.max_distance = 80.0
-        self.epsilon = 0.001
-        self.max_steps = 50
         self.keys = set()
-
-        # Controle de desempenho
-        self.dynamic_resolution = False
-
-        # Objetos da cena
-        self.objects = [
-            Sphere(
-                position=np.array([0.0, 0.0, 5.0]),
-                radius=1.0,
-                color=np.array([1.0, 0.0, 0.0]),
-            ),
-            Cube(
-                position=np.array([3.0, 3.0, 5.0]),
-                size=1.0,
-                color=np.array([0.0, 1.0, 0.0]),
-            ),
-        ]
-
-    def run(self):
+        self.framebuffer = None
+
+        # Apresentação do frame (textura + quad de ecrã inteiro)
+        self.program = None
+        self.vao = None
+        self.texture = None
+        self.texture_size = None
+        self.resolution_location = None
+
+        # Controle de desempenho: a resolução interna segue o orçamento por frame
+        self.dynamic_resolution = True
+        self.resolution_controller = ResolutionController(target_ms=16.0)
+        self.frame_ms = 0.0  # Tempo de render do último frame
+        self.frame_count = 0
+
+        # O alterna a over-relaxation dos passos de marcha; C alterna o
+        # coarse depth buffer (prepass de cone marching por blocos)
+        self.over_relaxation = 1.5
+        self.prepass_block = 8
+
+    def run(self, warmup: bool = False):
         print("Running Ray Marching!")
+        if warmup:
+            self.warmup()
         self.init()
         self.loop()
         glfw.terminate()
@@ -233,6 +48,10 @@ class Main:
 
         glfw.window_hint(glfw.VISIBLE, glfw.FALSE)
         glfw.window_hint(glfw.RESIZABLE, glfw.TRUE)
+        glfw.window_hint(glfw.CONTEXT_VERSION_MAJOR, 3)
+        glfw.window_hint(glfw.CONTEXT_VERSION_MINOR, 3)
+        glfw.window_hint(glfw.OPENGL_PROFILE, glfw.OPENGL_CORE_PROFILE)
+        glfw.window_hint(glfw.OPENGL_FORWARD_COMPAT, glfw.TRUE)
         self.window = glfw.create_window(
             self.resolution, self.resolution, "Ray Marching", None, None
         )
@@ -250,8 +69,111 @@ class Main:
         glfw.set_key_callback(self.window, self.key_callback)
         glfw.make_context_current(self.window)
         glfw.swap_interval(0)  # Remove o bloqueio de sincronização com o monitor
+        self._shader_init()
+        self._quad_init()
         glfw.show_window(self.window)
 
+    def _shader_init(self):
+        vertex_shader_source = self._read_shader("glsl/vertex_shader.glsl")
+        fragment_shader_source = self._read_shader("glsl/main_cpu/fragment_shader.glsl")
+
+        # Compile shaders
+        vertex_shader = compileShader(vertex_shader_source, GL_VERTEX_SHADER)
+        fragment_shader = compileShader(fragment_shader_source, GL_FRAGMENT_SHADER)
+
+        # Create and bind a VAO for validation
+        VAO = glGenVertexArrays(1)
+        glBindVertexArray(VAO)
+
+        # Compile the shader program
+        self.program = compileProgram(vertex_shader, fragment_shader)
+
+        # Unbind the VAO after validation
+        glBindVertexArray(0)
+
+        glUseProgram(self.program)
+
+        self.resolution_location = glGetUniformLocation(self.program, "u_resolution")
+        glUniform1i(glGetUniformLocation(self.program, "u_frame"), 0)
+
+        # Textura onde o frame do CPU é carregado
+        self.texture = glGenTextures(1)
+        glActiveTexture(GL_TEXTURE0)
+        glBindTexture(GL_TEXTURE_2D, self.texture)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_LINEAR)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, GL_CLAMP_TO_EDGE)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, GL_CLAMP_TO_EDGE)
+        glPixelStorei(GL_UNPACK_ALIGNMENT, 1)
+
+    def _read_shader(self, path: str) -> str:
+        with open(path, "r") as file:
+            return file.read()
+
+    def _quad_init(self):
+        # Define the vertex data
+        vertices = np.array(
+            [-1.0, -1.0, 0.0, 1.0, -1.0, 0.0, 1.0, 1.0, 0.0, -1.0, 1.0, 0.0],
+            dtype=np.float32,
+        )
+
+        indices = np.array([0, 1, 2, 2, 3, 0], dtype=np.uint32)
+
+        # Create and bind a Vertex Array Object (VAO)
+        self.vao = glGenVertexArrays(1)
+        glBindVertexArray(self.vao)
+
+        # Create a Vertex Buffer Object (VBO)
+        VBO = glGenBuffers(1)
+        glBindBuffer(GL_ARRAY_BUFFER, VBO)
+        glBufferData(GL_ARRAY_BUFFER, vertices.nbytes, vertices, GL_STATIC_DRAW)
+
+        # Create an Element Buffer Object (EBO)
+        EBO = glGenBuffers(1)
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, EBO)
+        glBufferData(GL_ELEMENT_ARRAY_BUFFER, indices.nbytes, indices, GL_STATIC_DRAW)
+
+        # Define the position attribute
+        position = glGetAttribLocation(self.program, "vPosition")
+        glEnableVertexAttribArray(position)
+        glVertexAttribPointer(position, 3, GL_FLOAT, GL_FALSE, 0, None)
+
+        # Unbind the VAO to avoid unintended modifications
+        glBindVertexArray(0)
+
+    def _present(self, framebuffer):
+        """Carrega o framebuffer numa textura e desenha-o num quad de ecrã inteiro."""
+        height, width = framebuffer.shape[0], framebuffer.shape[1]
+
+        glBindTexture(GL_TEXTURE_2D, self.texture)
+        if self.texture_size != (width, height):
+            # Só realoca a textura quando a resolução interna muda
+            glTexImage2D(
+                GL_TEXTURE_2D,
+                0,
+                GL_RGB32F,
+                width,
+                height,
+                0,
+                GL_RGB,
+                GL_FLOAT,
+                framebuffer,
+            )
+            self.texture_size = (width, height)
+        else:
+            glTexSubImage2D(
+                GL_TEXTURE_2D, 0, 0, 0, width, height, GL_RGB, GL_FLOAT, framebuffer
+            )
+
+        window_width, window_height = glfw.get_framebuffer_size(self.window)
+        glViewport(0, 0, window_width, window_height)
+        glUniform2f(self.resolution_location, window_width, window_height)
+
+        glClear(GL_COLOR_BUFFER_BIT)
+        glBindVertexArray(self.vao)
+        glDrawElements(GL_TRIANGLES, 6, GL_UNSIGNED_INT, None)
+        glBindVertexArray(0)
+
     def key_callback(self, window, key, scancode, action, mods):
         if action == glfw.PRESS:
             self.keys.add(key)
@@ -260,6 +182,10 @@ class Main:
 
         if key == glfw.KEY_ESCAPE and action == glfw.RELEASE:
             glfw.set_window_should_close(window, True)
+        if key == glfw.KEY_O and action == glfw.PRESS:
+            self.relaxation = self.over_relaxation if self.relaxation == 1.0 else 1.0
+        if key == glfw.KEY_C and action == glfw.PRESS:
+            self.coarse_block = 0 if self.coarse_block else self.prepass_block
 
     def handle_camera_movement(self):
         forward = self.camera_direction
@@ -281,59 +207,35 @@ class Main:
             self.camera_position -= up * self.move_speed
 
     def render(self):
-        # Pré-processar os objetos para usar na função JIT
-        object_positions = np.array([obj.position for obj in self.objects])
-        object_sizes = np.array(
-            [
-                obj.radius if isinstance(obj, Sphere) else obj.size
-                for obj in self.objects
-            ]
-        )
-        object_colors = np.array([obj.color for obj in self.objects])
-        object_types = np.array(
-            [0 if isinstance(obj, Sphere) else 1 for obj in self.objects]
-        )
-
         # Ajusta dinamicamente a resolução
         current_resolution = self.resolution
-        if glfw.KEY_LEFT_CONTROL in self.keys:
-            current_resolution = 150  # Resolução reduzida
-        elif self.dynamic_resolution and len(self.keys) > 0:
-            current_resolution = 150
+        if self.dynamic_resolution:
+            current_resolution = self.resolution_controller.resolution(self.resolution)
 
         width, height = current_resolution, current_resolution
-        inv_resolution = 2 / current_resolution
+        if self.framebuffer is None or self.framebuffer.shape[:2] != (height, width):
+            self.framebuffer = np.zeros((height, width, 3), dtype=np.float32)
 
-        glClear(GL_COLOR_BUFFER_BIT)
-        glBegin(GL_POINTS)
-
-        for y in range(height):
-            for x in range(width):
-                uv_x = x * inv_resolution - 1
-                uv_y = 1 - y * inv_resolution
-                ray_direction = np.array([uv_x, uv_y, 1.0])
-                ray_direction /= np.linalg.norm(ray_direction)
-
-                color = ray_march(
-                    self.camera_position,
-                    ray_direction,
-                    object_positions,
-                    object_sizes,
-                    object_colors,
-                    object_types,
-                    self.max_distance,
-                    self.epsilon,
-                    self.max_steps,
-                    self.light_position,
-                    self.light_color,
-                    self.ambient_light,
-                )
-                glColor3f(color[0], color[1], color[2])
-                glVertex2f(uv_x, uv_y)
-
-        glEnd()
+        start = time.perf_counter()
+        self.render_to(self.framebuffer)
+        self.frame_ms = (time.perf_counter() - start) * 1000
+        if self.dynamic_resolution:
+            self.resolution_controller.update(self.frame_ms)
+
+        # O quad de ecrã inteiro amplia o frame para o tamanho da janela
+        self._present(self.framebuffer)
         glfw.swap_buffers(self.window)
 
+        self.frame_count += 1
+        if self.frame_count % 30 == 0:
+            glfw.set_window_title(
+                self.window,
+                f"Ray Marching - {width}x{height} "
+                f"({self.resolution_controller.scale:.0%}, {self.frame_ms:.1f} ms, "
+                f"{self.steps_per_pixel:.1f} steps/px, ω {self.relaxation:g}, "
+                f"prepass {f'1/{self.coarse_block}' if self.coarse_block else 'off'})",
+            )
+
     def loop(self):
         while not glfw.window_should_close(self.window):
             self.handle_camera_movement()
@@ -342,4 +244,12 @@ class Main:
 
 
 if __name__ == "__main__":
-    Main().run()
+    parser = argparse.ArgumentParser(description="CPU ray marcher.")
+    parser.add_argument(
+        "--warmup",
+        action="store_true",
+        help="run the kernels once before opening the window and report JIT time",
+    )
+    args = parser.parse_args()
+
+    Main().run(warmup=args.warmup)
@@ -0,0 +1,303 @@
+"""
+Protocolo do canal de controlo (websocket) entre a UI e as janelas de render.
+
+Aceita dois formatos:
+
+- Texto (legado): uma atualização por mensagem, "comando:valor", com o valor
+  no formato histórico de cada comando (ver TEXT_FORMATS).
+- Binário (versão 1): várias atualizações por mensagem.
+
+      cabeçalho  "<2sBBH"  magic b"RM", versão, flags (0), número de registos
+      registo    "<BH"     id do comando (COMMAND_IDS), número de valores
+                 "<{n}f"   valores float32
+
+Os valores de um comando são sempre um tuplo de números; inteiros (tipos,
+funções, passos) viajam como float32 e são convertidos por quem os aplica.
+"""
+
+import json
+import numbers
+import struct
+
+MAGIC = b"RM"
+VERSION = 1
+HEADER = struct.Struct("<2sBBH")
+RECORD = struct.Struct("<BH")
+MAX_RECORDS = 0xFFFF
+MAX_VALUES = 0xFFFF
+
+# Identificadores binários dos comandos (nunca reutilizar um número)
+COMMAND_IDS = {
+    "change_blend_strength": 1,
+    "change_brightness": 2,
+    "change_shadowIntensity": 3,
+    "update_global_light_dir": 4,
+    "update_move_cube": 5,
+    "update_reflection": 6,
+    "add_primitive": 7,
+    "add_primitives": 8,
+    "replace_scene": 9,
+    "remove_primitive": 10,
+    "clear": 11,
+    "get_stats": 12,
+    "change_relaxation": 13,
+}
+COMMAND_NAMES = {command_id: name for name, command_id in COMMAND_IDS.items()}
+
+# Número de valores de cada comando (None = qualquer número)
+ARITY = {
+    "change_blend_strength": 1,
+    "change_brightness": 1,
+    "change_shadowIntensity": 1,
+    "update_global_light_dir": 3,
+    "update_move_cube": 6,  # x, y, z, função x, função y, função z
+    "update_reflection": 2,  # passos, intensidade
+    "add_primitive": 5,  # tipo, x, y, z, raio
+    "add_primitives": None,  # Grupos de 5 (como add_primitive)
+    "replace_scene": None,  # Grupos de 5; vazio = cena vazia
+    "remove_primitive": 1,  # Índice
+    "clear": 0,
+    "get_stats": 0,  # Pedido: a resposta é uma mensagem de texto STATS_PREFIX + JSON
+    "change_relaxation": 1,  # ω do ray marching, em [1, 2)
+}
+
+# Comandos com um número variável de valores, em grupos deste tamanho
+GROUP_SIZE = {
+    "add_primitives": 5,
+    "replace_scene": 5,
+}
+
+# Comandos que alteram a lista de primitivas (nos restantes fica o último valor)
+PRIMITIVE_COMMANDS = (
+    "add_primitive",
+    "add_primitives",
+    "replace_scene",
+    "remove_primitive",
+    "clear",
+)
+PRIMITIVE_VALUES = GROUP_SIZE["replace_scene"]
+
+# Formato do valor no protocolo de texto
+#   scalar     "1.5"
+#   tuple      "(1.0, 2.0, 3.0)"
+#   csv        "1.0,2.0,3.0"
+#   move_cube  "01.0,12.0,03.0" (dígito da função seguido da coordenada)
+#   empty      "" (comando sem valores)
+TEXT_FORMATS = {
+    "change_blend_strength": "scalar",
+    "change_brightness": "scalar",
+    "change_shadowIntensity": "scalar",
+    "update_global_light_dir": "tuple",
+    "update_move_cube": "move_cube",
+    "update_reflection": "tuple",
+    "add_primitive": "csv",
+    "add_primitives": "csv",
+    "replace_scene": "csv",
+    "remove_primitive": "scalar",
+    "clear": "empty",
+    "get_stats": "empty",
+    "change_relaxation": "scalar",
+}
+
+# Resposta ao get_stats (só do servidor para quem o pediu)
+STATS_PREFIX = "stats:"
+
+
+class ProtocolError(ValueError):
+    pass
+
+
+def _check(command: str, values: tuple) -> tuple:
+    if command not in ARITY:
+        raise ProtocolError(f"Unknown command: {command}")
+    arity = ARITY[command]
+    if arity is not None and len(values) != arity:
+        raise ProtocolError(f"{command} expects {arity} values, got {len(values)}")
+    group = GROUP_SIZE.get(command)
+    if group is not None and len(values) % group:
+        raise ProtocolError(
+            f"{command} expects groups of {group} values, got {len(values)}"
+        )
+    return values
+
+
+class ControlState:
+    def __init__(self, updates=()) -> None:
+        """
+        Estado de uma janela reconstruído a partir das atualizações aceites.
+
+        É o que o servidor envia a um cliente novo (snapshot) e o que os
+        clientes mantêm a partir dos deltas que recebem.
+
+        parameters: comando -> últimos valores
+        primitives: Lista de (tipo, x, y, z, raio), ou None se a janela não
+                    tiver primitivas
+        """
+        self.parameters = {}
+        self.primitives = None
+        self.apply_all(updates)
+
+    def apply(self, command: str, values) -> None:
+        values = parse_value(command, values)
+        if command not in PRIMITIVE_COMMANDS:
+            self.parameters[command] = values
+            return
+        if command == "remove_primitive":
+            index = int(values[0])
+            if not 0 <= index < len(self.primitives or ()):
+                raise ProtocolError(f"No primitive at index {index}")
+
+        if self.primitives is None:
+            self.primitives = []
+        groups = [
+            tuple(values[i : i + PRIMITIVE_VALUES])
+            for i in range(0, len(values), PRIMITIVE_VALUES)
+        ]
+        if command in ("add_primitive", "add_primitives"):
+            self.primitives.extend(groups)
+        elif command == "replace_scene":
+            self.primitives = groups
+        elif command == "remove_primitive":
+            del self.primitives[int(values[0])]
+        else:
+            self.primitives = []
+
+    def apply_all(self, updates) -> None:
+        for command, values in updates:
+            self.apply(command, values)
+
+    def updates(self) -> list:
+        """Atualizações que reproduzem o estado atual (o snapshot)."""
+        updates = list(self.parameters.items())
+        if self.primitives is not None:
+            flat = tuple(value for group in self.primitives for value in group)
+            updates.append(("replace_scene", flat))
+        return updates
+
+
+def format_stats(stats: dict) -> str:
+    return STATS_PREFIX + json.dumps(stats)
+
+
+def parse_stats(message):
+    """Estatísticas de uma resposta a get_stats (None se não for uma)."""
+    if isinstance(message, str) and message.startswith(STATS_PREFIX):
+        return json.loads(message[len(STATS_PREFIX) :])
+    return None
+
+
+def split_text(message: str):
+    """Divide uma mensagem de texto em (comando, valor por interpretar)."""
+    command, value = message.split(":")
+    return command, value
+
+
+def parse_value(command: str, value) -> tuple:
+    """
+    Devolve os valores (tuplo de floats) de uma atualização.
+
+    :param value: Um número, uma sequência de números ou uma string no formato
+                  de texto do comando (TEXT_FORMATS).
+    """
+    if isinstance(value, numbers.Real):
+        return _check(command, (float(value),))
+    if not isinstance(value, str):
+        return _check(command, tuple(float(v) for v in value))
+
+    text_format = TEXT_FORMATS.get(command)
+    if text_format == "scalar":
+        values = (float(value),)
+    elif text_format == "tuple":
+        values = tuple(float(number) for number in value[1:-1].split(","))
+    elif text_format == "csv":
+        numbers_text = value.split(",") if value.strip() else []
+        values = tuple(float(number) for number in numbers_text)
+    elif text_format == "empty":
+        if value.strip():
+            raise ProtocolError(f"{command} takes no values")
+        values = ()
+    elif text_format == "move_cube":
+        parts = value.split(",")
+        values = tuple(float(part[1:]) for part in parts)
+        values += tuple(float(int(part[:1])) for part in parts)
+    else:
+        raise ProtocolError(f"Unknown command: {command}")
+    return _check(command, values)
+
+
+def format_text(command: str, values) -> str:
+    """Codifica uma atualização no protocolo de texto (legado)."""
+    values = parse_value(command, values)
+    text_format = TEXT_FORMATS[command]
+    if text_format == "scalar":
+        value = f"{values[0]}"
+    elif text_format == "tuple":
+        value = f"({', '.join(str(v) for v in values)})"
+    elif text_format == "csv":
+        value = ",".join(str(v) for v in values)
+    elif text_format == "empty":
+        value = ""
+    else:
+        coords, functions = values[:3], values[3:]
+        value = ",".join(f"{int(f)}{c}" for c, f in zip(coords, functions))
+    return f"{command}:{value}"
+
+
+def encode(updates) -> bytes:
+    """
+    Codifica várias atualizações numa mensagem binária.
+
+    :param updates: Lista de (comando, valores); valores pode ser um número,
+                    uma sequência de números ou uma string no formato de texto.
+    """
+    updates = list(updates)
+    if len(updates) > MAX_RECORDS:
+        raise ProtocolError(f"Too many records in one message: {len(updates)}")
+
+    parts = [HEADER.pack(MAGIC, VERSION, 0, len(updates))]
+    for command, values in updates:
+        values = parse_value(command, values)
+        if len(values) > MAX_VALUES:
+            raise ProtocolError(f"Too many values for {command}: {len(values)}")
+        parts.append(RECORD.pack(COMMAND_IDS[command], len(values)))
+        parts.append(struct.pack(f"<{len(values)}f", *values))
+    return b"".join(parts)
+
+
+def decode(message: bytes) -> list:
+    """Descodifica uma mensagem binária numa lista de (comando, valores)."""
+    try:
+        magic, version, _, count = HEADER.unpack_from(message, 0)
+    except struct.error:
+        raise ProtocolError("Truncated message header") from None
+    if magic != MAGIC:
+        raise ProtocolError("Not a binary control message")
+    if version != VERSION:
+        raise ProtocolError(f"Unsupported protocol version: {version}")
+
+    updates = []
+    offset = HEADER.size
+    try:
+        for _ in range(count):
+            command_id, length = RECORD.unpack_from(message, offset)
+            offset += RECORD.size
+            values = struct.unpack_from(f"<{length}f", message, offset)
+            offset += 4 * length
+
+            command = COMMAND_NAMES.get(command_id)
+            if command is None:
+                raise ProtocolError(f"Unknown command id: {command_id}")
+            updates.append((command, _check(command, values)))
+    except struct.error:
+        raise ProtocolError("Truncated message") from None
+
+    if offset != len(message):
+        raise ProtocolError("Trailing bytes after the last record")
+    return updates
+
+
+def decode_message(message) -> list:
+    """Mensagem de texto ou binária -> lista de (comando, valor)."""
+    if isinstance(message, (bytes, bytearray, memoryview)):
+        return decode(bytes(message))
+    return [split_text(message)]
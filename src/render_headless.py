@@ -0,0 +1,164 @@
+import argparse
+import os
+import time
+import numpy as np
+from dsf import Scene
+from cpu import Renderer
+from cpu.farm import TileFarm
+from cpu.image import write_png
+from cpu.kernels import NORMAL_ANALYTIC, NORMAL_CENTRAL, NORMAL_TETRAHEDRAL
+
+NORMAL_MODES = {
+    "central": NORMAL_CENTRAL,
+    "tetrahedral": NORMAL_TETRAHEDRAL,
+    "analytic": NORMAL_ANALYTIC,
+}
+
+
+def frame_camera(camera: np.ndarray, camera_step: np.ndarray, frame: int):
+    """
+    Posição da câmera no frame dado.
+
+    Depende só do número absoluto do frame, por isso vários nós podem
+    renderizar intervalos diferentes da mesma sequência.
+    """
+    return camera + frame * camera_step
+
+
+def render_frames(renderer: Renderer, args, farm: TileFarm = None) -> None:
+    """
+    Renderiza o intervalo de frames pedido e escreve-os no formato escolhido.
+
+    Se farm for dado, os frames são renderizados por tiles nos seus processos.
+    """
+    target = farm if farm is not None else renderer
+    frames = range(args.frame_start, args.frame_start + args.frame_count)
+    shape = (args.height, args.width, 3)
+    camera = np.array(args.camera, dtype=np.float64)
+    camera_step = np.array(args.camera_step, dtype=np.float64)
+
+    stack = None
+    if args.format == "memmap":
+        # Um único ficheiro .npy (N, H, W, 3); cada frame é escrito no seu lugar
+        directory = os.path.dirname(args.output)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        stack = np.lib.format.open_memmap(
+            args.output, mode="w+", dtype=np.float32, shape=(len(frames), *shape)
+        )
+    else:
+        os.makedirs(args.output, exist_ok=True)
+        framebuffer = np.zeros(shape, dtype=np.float32)
+
+    for index, frame in enumerate(frames):
+        renderer.camera_position = frame_camera(camera, camera_step, frame)
+
+        start = time.perf_counter()
+        if stack is not None:
+            # Vista sem cópia sobre o ficheiro mapeado
+            target.render_to(np.asarray(stack[index]))
+        else:
+            target.render_to(framebuffer)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        if args.format == "png":
+            path = os.path.join(args.output, f"frame_{frame:05d}.png")
+            write_png(path, framebuffer)
+        elif args.format == "npy":
+            path = os.path.join(args.output, f"frame_{frame:05d}.npy")
+            np.save(path, framebuffer)
+        else:
+            path = f"{args.output}[{index}]"
+
+        if not args.quiet:
+            print(
+                f"frame {frame}: {elapsed_ms:.1f} ms, "
+                f"{renderer.steps_per_pixel:.1f} steps/px -> {path}"
+            )
+
+    if stack is not None:
+        stack.flush()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Render CPU ray marching frames without a window or GPU."
+    )
+    parser.add_argument(
+        "--scene", help="scene JSON file (default: built-in demo scene)"
+    )
+    parser.add_argument(
+        "--camera",
+        type=float,
+        nargs=3,
+        default=[0.0, 0.0, 0.0],
+        metavar=("X", "Y", "Z"),
+        help="camera position at frame 0",
+    )
+    parser.add_argument(
+        "--camera-step",
+        type=float,
+        nargs=3,
+        default=[0.0, 0.0, 0.0],
+        metavar=("DX", "DY", "DZ"),
+        help="camera displacement per frame",
+    )
+    parser.add_argument("--width", type=int, default=300)
+    parser.add_argument("--height", type=int, default=300)
+    parser.add_argument("--frame-start", type=int, default=0)
+    parser.add_argument("--frame-count", type=int, default=1)
+    parser.add_argument(
+        "--format",
+        choices=("png", "npy", "memmap"),
+        default="png",
+        help="png/npy write one file per frame into --output; "
+        "memmap writes a single (N, H, W, 3) float32 .npy stack to --output",
+    )
+    parser.add_argument("--output", default="frames")
+    parser.add_argument("--normal-mode", choices=NORMAL_MODES, default="analytic")
+    parser.add_argument("--max-steps", type=int, default=None)
+    parser.add_argument(
+        "--relaxation",
+        type=float,
+        default=1.0,
+        help="over-relaxation factor for the march steps (1 = plain sphere tracing)",
+    )
+    parser.add_argument(
+        "--coarse-block",
+        type=int,
+        default=0,
+        help="cone-march a coarse depth buffer with one cone per NxN pixel block "
+        "and start every ray there (0 = off)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=0,
+        help="render tiles in this many processes (0 = threads of one process)",
+    )
+    parser.add_argument("--tile", type=int, default=64, help="tile size in pixels")
+    parser.add_argument("--quiet", action="store_true")
+    args = parser.parse_args()
+
+    if min(args.width, args.height, args.frame_count, args.tile) < 1:
+        parser.error("--width, --height, --frame-count and --tile must be positive")
+    if args.coarse_block < 0:
+        parser.error("--coarse-block must not be negative")
+
+    scene = Scene.load(args.scene) if args.scene else None
+    renderer = Renderer(scene)
+    renderer.normal_mode = NORMAL_MODES[args.normal_mode]
+    renderer.relaxation = args.relaxation
+    renderer.coarse_block = args.coarse_block
+    if args.max_steps is not None:
+        renderer.max_steps = args.max_steps
+
+    if args.workers > 0:
+        with TileFarm(renderer, workers=args.workers, tile=args.tile) as farm:
+            render_frames(renderer, args, farm)
+    else:
+        render_frames(renderer, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,320 @@
+import argparse
+import math
+import multiprocessing
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+import numpy as np
+from cpu.image import NpyWriter, Y4MWriter, to_uint8
+
+WRITERS = {"y4m": Y4MWriter, "npy": NpyWriter}
+
+
+def sweep_phase(frame: int, frames: int, cycles: float) -> float:
+    """
+    Posição (0 a 1) na ida e volta da potência, como o render_loop da janela.
+
+    O valor sobe de 0 a 1 e volta a 0 em cada ciclo; com um número inteiro de
+    ciclos o último frame encaixa no primeiro (animação em loop).
+    """
+    position = (frame / frames * cycles) % 1.0
+    return 1.0 - abs(2.0 * position - 1.0)
+
+
+def frame_parameters(args, frame: int) -> tuple:
+    """
+    Parâmetros do shader no frame dado.
+
+    Dependem só do número absoluto do frame, por isso os frames podem ser
+    renderizados por qualquer ordem (e em nós diferentes).
+    """
+    t = frame / args.frames
+    phase = sweep_phase(frame, args.frames, args.cycles)
+
+    position = np.array(args.camera) + t * (
+        np.array(args.camera_end or args.camera) - np.array(args.camera)
+    )
+    rotation = np.array(args.rotation) + t * (
+        np.array(args.rotation_end or args.rotation) - np.array(args.rotation)
+    )
+
+    # Órbita à volta do eixo Y; o yaw roda com a câmera para manter o alvo
+    angle = 2.0 * math.pi * args.orbit * t
+    x, z = position[0], position[2]
+    position[0] = x * math.cos(angle) + z * math.sin(angle)
+    position[2] = -x * math.sin(angle) + z * math.cos(angle)
+    rotation[1] += angle
+
+    power = args.power[0] + phase * (args.power[1] - args.power[0])
+    colour_a = np.array(args.colour_a) + phase * (
+        np.array(args.colour_a_end or args.colour_a) - np.array(args.colour_a)
+    )
+    colour_b = np.array(args.colour_b) + phase * (
+        np.array(args.colour_b_end or args.colour_b) - np.array(args.colour_b)
+    )
+    return position, rotation, power, colour_a, colour_b
+
+
+def render_frame(args, frame: int, parallel: bool) -> np.ndarray:
+    """Renderiza um frame da sequência e devolve-o em RGB de 8 bits."""
+    from cpu.fractals import render_mandelbulb, render_mandelbulb_tile
+
+    position, rotation, power, colour_a, colour_b = frame_parameters(args, frame)
+    framebuffer = np.zeros((args.height, args.width, 3), dtype=np.float32)
+    shading = (
+        position,
+        rotation,
+        float(power),
+        args.darkness,
+        args.black_and_white,
+        colour_a,
+        colour_b,
+        args.normal_mode,
+        args.lod_cone,
+        args.lod_falloff,
+    )
+    if parallel:
+        render_mandelbulb(*shading, framebuffer)
+    else:
+        # Um processo por frame: cada um usa um só núcleo
+        render_mandelbulb_tile(*shading, 0, args.height, 0, args.width, framebuffer)
+    return to_uint8(framebuffer)
+
+
+def _init_worker() -> None:
+    from cpu import fractals  # noqa: F401  (carrega os kernels da cache do Numba)
+
+
+def _render_frame(args, frame: int) -> tuple:
+    start = time.perf_counter()
+    pixels = render_frame(args, frame, parallel=False)
+    return frame, pixels, time.perf_counter() - start
+
+
+def render_sweep(args, writer) -> None:
+    """
+    Renderiza o intervalo de frames pedido e escreve-o pela ordem dos frames.
+
+    Com workers > 0 cada frame é renderizado num processo; os frames acabam
+    por qualquer ordem e esperam num buffer de reordenação até poderem ser
+    escritos. Só há no máximo 2 * workers frames em voo ou à espera, por isso
+    a memória não depende do tamanho da sequência.
+    """
+    frames = range(args.frame_start, args.frame_start + args.frame_count)
+    start = time.perf_counter()
+
+    def report(frame, seconds):
+        if not args.quiet:
+            print(f"frame {frame}: {seconds * 1000:.1f} ms -> {args.output}")
+
+    if args.workers <= 0:
+        for frame in frames:
+            frame_start = time.perf_counter()
+            writer.write(render_frame(args, frame, parallel=True))
+            report(frame, time.perf_counter() - frame_start)
+    else:
+        limit = 2 * args.workers
+        executor = ProcessPoolExecutor(
+            max_workers=args.workers,
+            # "spawn" evita herdar o estado das threads do Numba do processo pai
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+        )
+        with executor:
+            submitted = iter(frames)
+            next_frame = args.frame_start
+            pending = set()
+            finished = {}  # Frames acabados à espera dos anteriores
+
+            while next_frame < frames.stop:
+                while len(pending) + len(finished) < limit:
+                    frame = next(submitted, None)
+                    if frame is None:
+                        break
+                    pending.add(executor.submit(_render_frame, args, frame))
+
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    frame, pixels, seconds = future.result()
+                    finished[frame] = (pixels, seconds)
+
+                while next_frame in finished:
+                    pixels, seconds = finished.pop(next_frame)
+                    writer.write(pixels)
+                    report(next_frame, seconds)
+                    next_frame += 1
+
+    elapsed = time.perf_counter() - start
+    print(
+        f"{len(frames)} frames in {elapsed:.1f} s "
+        f"({len(frames) / elapsed:.2f} frames/s) -> {args.output}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Render the Mandelbulb power sweep offline, on the CPU, "
+        "as a Y4M video or an (N, H, W, 3) uint8 .npy sequence."
+    )
+    parser.add_argument("--frames", type=int, default=300, help="sequence length")
+    parser.add_argument("--frame-start", type=int, default=0)
+    parser.add_argument(
+        "--frame-count",
+        type=int,
+        default=None,
+        help="frames to render from --frame-start (default: up to --frames)",
+    )
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=400)
+    parser.add_argument("--fps", type=int, default=30, help="Y4M frame rate")
+    parser.add_argument(
+        "--power",
+        type=float,
+        nargs=2,
+        default=[10.0, 20.0],
+        metavar=("MIN", "MAX"),
+        help="power sweep range (the window sweeps 10 to 20)",
+    )
+    parser.add_argument(
+        "--cycles",
+        type=float,
+        default=1.0,
+        help="up-and-down power sweeps in the sequence (integer = seamless loop)",
+    )
+    parser.add_argument(
+        "--camera",
+        type=float,
+        nargs=3,
+        default=[0.0, 0.0, -2.5],
+        metavar=("X", "Y", "Z"),
+        help="camera position at the first frame",
+    )
+    parser.add_argument(
+        "--camera-end",
+        type=float,
+        nargs=3,
+        default=None,
+        metavar=("X", "Y", "Z"),
+        help="camera position at the end of the sequence (default: --camera)",
+    )
+    parser.add_argument(
+        "--rotation",
+        type=float,
+        nargs=2,
+        default=[0.0, 0.0],
+        metavar=("PITCH", "YAW"),
+        help="camera rotation in radians at the first frame",
+    )
+    parser.add_argument(
+        "--rotation-end",
+        type=float,
+        nargs=2,
+        default=None,
+        metavar=("PITCH", "YAW"),
+        help="camera rotation at the end of the sequence (default: --rotation)",
+    )
+    parser.add_argument(
+        "--orbit",
+        type=float,
+        default=0.0,
+        help="turns of the camera around the Y axis over the sequence",
+    )
+    parser.add_argument(
+        "--colour-a",
+        type=float,
+        nargs=3,
+        default=[1.0, 0.0, 0.0],
+        metavar=("R", "G", "B"),
+        help="colourAMix at the bottom of the power sweep",
+    )
+    parser.add_argument(
+        "--colour-a-end",
+        type=float,
+        nargs=3,
+        default=None,
+        metavar=("R", "G", "B"),
+        help="colourAMix at the top of the power sweep (default: --colour-a)",
+    )
+    parser.add_argument(
+        "--colour-b",
+        type=float,
+        nargs=3,
+        default=[0.94, 0.0, 1.0],
+        metavar=("R", "G", "B"),
+        help="colourBMix at the bottom of the power sweep",
+    )
+    parser.add_argument(
+        "--colour-b-end",
+        type=float,
+        nargs=3,
+        default=None,
+        metavar=("R", "G", "B"),
+        help="colourBMix at the top of the power sweep (default: --colour-b)",
+    )
+    parser.add_argument("--darkness", type=float, default=40.0)
+    parser.add_argument("--black-and-white", type=float, default=0.1)
+    parser.add_argument(
+        "--normal-mode",
+        type=int,
+        choices=(0, 1),
+        default=1,
+        help="0 = central differences, 1 = tetrahedral",
+    )
+    parser.add_argument(
+        "--lod-cone",
+        type=float,
+        default=0.0,
+        help="minimum hit epsilon in pixel cone widths (0 = fixed epsilon)",
+    )
+    parser.add_argument(
+        "--lod-falloff",
+        type=float,
+        default=0.0,
+        help="iteration budget = 50 / (1 + falloff * distance) (0 = always 50)",
+    )
+    parser.add_argument("--format", choices=WRITERS, default=None)
+    parser.add_argument(
+        "--output",
+        default="mandelbulb.y4m",
+        help="output file (the extension picks the format unless --format is given)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="render frames in this many processes (0 = threads of one process)",
+    )
+    parser.add_argument("--quiet", action="store_true")
+    args = parser.parse_args()
+
+    if args.frame_count is None:
+        args.frame_count = args.frames - args.frame_start
+    if min(args.width, args.height, args.frames, args.frame_count, args.fps) < 1:
+        parser.error(
+            "--width, --height, --frames, --frame-count and --fps must be positive"
+        )
+    if args.frame_start < 0:
+        parser.error("--frame-start must not be negative")
+
+    if args.format is None:
+        extension = os.path.splitext(args.output)[1].lstrip(".").lower()
+        if extension not in WRITERS:
+            parser.error("--output must end in .y4m or .npy, or pass --format")
+        args.format = extension
+
+    directory = os.path.dirname(args.output)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    if args.format == "y4m":
+        writer = Y4MWriter(
+            args.output, args.width, args.height, args.frame_count, fps=args.fps
+        )
+    else:
+        writer = NpyWriter(args.output, args.width, args.height, args.frame_count)
+    with writer:
+        render_sweep(args, writer)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,34 +1,39 @@
-import asyncio
-import websockets
+import time
 from dearpygui.dearpygui import *
+from control_client import ControlClient
 
+# Uma única ligação ao servidor, numa thread própria; os callbacks nunca bloqueiam
+client = ControlClient("ws://localhost:8765")
 
-async def send_parameter(parameter, value):
-    """Send parameter update message to the WebSocket server."""
-    message = f"{parameter}:{value}"
-    async with websockets.connect("ws://localhost:8765") as websocket:
-        await websocket.send(message)
+
+def send_parameter(parameter, value):
+    """Agenda uma atualização de parâmetro (valores ainda não enviados são juntados)."""
+    client.send(parameter, value)
 
 
 def update_blend_strength(sender, app_data):
     """Callback to handle blend strength slider changes."""
     blend_strength = app_data
-    asyncio.run(send_parameter("change_blend_strength", blend_strength))
+    send_parameter("change_blend_strength", blend_strength)
 
 
 def update_brightness(sender, app_data):
     brightness = app_data
-    asyncio.run(send_parameter("change_brightness", brightness))
+    send_parameter("change_brightness", brightness)
 
 
 def update_shadowIntensity(sender, app_data):
     shadowIntensity = app_data
-    asyncio.run(send_parameter("change_shadowIntensity", shadowIntensity))
+    send_parameter("change_shadowIntensity", shadowIntensity)
+
+
+def update_relaxation(sender, app_data):
+    send_parameter("change_relaxation", app_data)
 
 
 def update_global_light_dir(sender, app_data):
     global_light_dir = (get_value("X"), get_value("Y"), get_value("Z"))
-    asyncio.run(send_parameter("update_global_light_dir", global_light_dir))
+    send_parameter("update_global_light_dir", global_light_dir)
 
 
 def update_move_cube(sender, app_data):
@@ -41,13 +46,13 @@ def update_move_cube(sender, app_data):
         type_map[get_value("Function_Z")],
     )
 
-    move_data = f"{func_type[0]}{move_cube[0]},{func_type[1]}{move_cube[1]},{func_type[2]}{move_cube[2]}"
-    asyncio.run(send_parameter("update_move_cube", move_data))
+    # Coordenadas seguidas das funções (ver protocol.ARITY)
+    send_parameter("update_move_cube", move_cube + func_type)
 
 
 def update_reflection(sender, app_data):
     reflection = (get_value("Reflection_Steps"), get_value("Reflection_Intensity"))
-    asyncio.run(send_parameter("update_reflection", reflection))
+    send_parameter("update_reflection", reflection)
 
 
 def add_primitive(sender, app_data):
@@ -60,11 +65,79 @@ def add_primitive(sender, app_data):
     type_map = {"Sphere": 0, "Rounded Cube": 1}
     primitive_type_id = type_map[primitive_type]
 
-    # Format data for WebSocket
-    primitive_data = (
-        f"{primitive_type_id},{position[0]},{position[1]},{position[2]},{radius}"
+    client.send_ordered("add_primitive", (primitive_type_id, *position, radius))
+
+
+def clear_primitives(sender, app_data):
+    client.send_ordered("clear", ())
+
+
+# Widgets de cada comando, pela ordem dos valores (ver protocol.ARITY)
+STATE_WIDGETS = {
+    "change_blend_strength": ["Blend_Strength"],
+    "change_brightness": ["Brightness"],
+    "change_shadowIntensity": ["Shadow_Intensity"],
+    "update_global_light_dir": ["X", "Y", "Z"],
+    "update_reflection": ["Reflection_Steps", "Reflection_Intensity"],
+    "change_relaxation": ["Relaxation"],
+    "update_move_cube": [
+        "move_X",
+        "move_Y",
+        "move_Z",
+        "Function_X",
+        "Function_Y",
+        "Function_Z",
+    ],
+}
+FUNCTION_NAMES = ["Sin", "Cos"]
+
+
+def apply_remote_state():
+    """Mostra nos widgets as alterações feitas por qualquer cliente (e o snapshot)."""
+    for command, values in client.take_updates():
+        tags = STATE_WIDGETS.get(command)
+        if tags is None or any(is_item_active(tag) for tag in tags):
+            continue  # Não mexe num widget que o utilizador está a arrastar
+
+        for tag, value in zip(tags, values):
+            if tag.startswith("Function_"):
+                value = FUNCTION_NAMES[int(value)]
+            elif tag == "Reflection_Steps":
+                value = int(value)
+            set_value(tag, value)
+
+    primitives = client.state.primitives
+    if primitives is not None:
+        set_value("scene_primitives", f"{len(primitives)} primitives in the scene")
+
+
+def update_client_stats():
+    """Mostra o estado da ligação: mensagens/s, juntadas e latência."""
+    stats = client.stats()
+    status = "connected" if stats["connected"] else "disconnected"
+    rtt = "-" if stats["rtt_ms"] is None else f"{stats['rtt_ms']:.1f} ms"
+    set_value(
+        "client_stats",
+        f"{status} | {stats['messages_per_s']} msg/s | "
+        f"{stats['coalesced']} coalesced | "
+        f"latency {stats['latency_avg_ms']:.1f} ms | rtt {rtt}",
     )
-    asyncio.run(send_parameter("add_primitive", primitive_data))
+
+    # Tempos da janela (pedidos agora, mostrados na próxima atualização)
+    window_stats = client.window_stats
+    if window_stats and "frame" in window_stats:
+        frame = window_stats["frame"]
+        gpu = window_stats.get("gpu")
+        steps = window_stats.get("steps_per_pixel")  # Só medido com F3 na janela
+        set_value(
+            "window_stats",
+            f"{window_stats['fps']:.0f} fps | frame p50 {frame['p50']:.1f} / "
+            f"p95 {frame['p95']:.1f} / p99 {frame['p99']:.1f} ms"
+            + ("" if gpu is None else f" | gpu p95 {gpu['p95']:.1f} ms")
+            + ("" if steps is None else f" | {steps:.1f} steps/px"),
+        )
+    if stats["connected"]:
+        client.request_stats()
 
 
 def create_ui():
@@ -110,6 +183,7 @@ def create_ui():
             default_value=2.0,
             callback=update_blend_strength,
             width=300,
+            tag="Blend_Strength",
         )
         bind_item_theme(slider_id, slider_theme)
 
@@ -121,6 +195,7 @@ def create_ui():
             default_value=1.0,
             callback=update_brightness,
             width=300,
+            tag="Brightness",
         )
         bind_item_theme(slider_id, slider_theme)
 
@@ -132,6 +207,7 @@ def create_ui():
             default_value=0.2,
             callback=update_shadowIntensity,
             width=300,
+            tag="Shadow_Intensity",
         )
         bind_item_theme(slider_id, slider_theme)
 
@@ -187,6 +263,18 @@ def create_ui():
             tag="Reflection_Intensity",
         )
 
+        add_text("Adjust Ray March Relaxation", color=[100, 200, 255], bullet=True)
+        slider_id = add_slider_float(
+            label="Relaxation",
+            min_value=1.0,
+            max_value=1.9,
+            default_value=1.0,
+            callback=update_relaxation,
+            width=300,
+            tag="Relaxation",
+        )
+        bind_item_theme(slider_id, slider_theme)
+
         add_text("Adjust Cube Movement", color=[100, 200, 255], bullet=True)
         slider_id = add_slider_float(
             label="X",
@@ -263,6 +351,12 @@ def create_ui():
         add_input_float(label="Radius", default_value=0.0, width=100, tag="Radius")
 
         add_button(label="Add Primitive", callback=add_primitive)
+        add_button(label="Clear Primitives", callback=clear_primitives)
+        add_text("", tag="scene_primitives", color=[150, 150, 150, 255])
+
+        add_separator()
+        add_text("", tag="client_stats", color=[150, 150, 150, 255])
+        add_text("", tag="window_stats", color=[150, 150, 150, 255])
 
     # Bind theme to the window using the captured ID
     bind_item_theme(window_id, main_theme)
@@ -276,10 +370,19 @@ def create_ui():
     setup_dearpygui()
     show_viewport()
 
+    client.start()
+
     # Main event loop
+    last_stats = 0.0
     while is_dearpygui_running():
+        now = time.perf_counter()
+        if now - last_stats > 0.5:
+            last_stats = now
+            update_client_stats()
+        apply_remote_state()
         render_dearpygui_frame()
 
+    client.stop()
     destroy_context()
 
 